@@ -0,0 +1,94 @@
+"""
+目录遍历基准：对比 RepoInventory 串行遍历与并行（工作窃取）遍历。
+
+用法：
+    python benchmarks/bench_walker.py --files 500000 --workers 8
+    python benchmarks/bench_walker.py --root /path/to/monorepo --workers 16
+
+未指定 --root 时在临时目录生成合成树（每个目录 --per-dir 个文件，两级目录），
+每种模式重复 --repeat 次取最小值，并校验两种遍历得到的清单完全一致。
+"""
+import argparse
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from gitseek.tools.IgnoreRules import IgnoreRules
+from gitseek.tools.RepoInventory import RepoInventory
+
+EXTENSIONS = ['.py', '.js', '.ts', '.go', '.java', '.md', '.json', '.txt']
+
+
+def build_tree(root, file_count, per_dir):
+    """生成合成目录树：pkgN/modM/fK.ext，文件内容很小，只考察目录列举和 stat 的开销"""
+    dir_count = max(1, file_count // per_dir)
+    modules_per_pkg = max(1, int(dir_count ** 0.5))
+    created = 0
+    for d in range(dir_count):
+        directory = os.path.join(root, f"pkg{d // modules_per_pkg}", f"mod{d % modules_per_pkg}")
+        os.makedirs(directory, exist_ok=True)
+        for k in range(min(per_dir, file_count - created)):
+            with open(os.path.join(directory, f"f{k}{EXTENSIONS[k % len(EXTENSIONS)]}"), 'w') as f:
+                f.write("x\n")
+        created += per_dir
+        if created >= file_count:
+            break
+
+
+def snapshot(inventory):
+    """用于比较的清单内容：所有条目的全部字段 + 每个目录排序后的子项列表"""
+    entries = sorted(tuple(e.to_dict().values()) for e in inventory.entries.values())
+    return entries, inventory.children, inventory.ignored, inventory.errors
+
+
+def timed_scan(root, workers, repeat):
+    best, inventory = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        inventory = RepoInventory.scan(root, IgnoreRules(root), workers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, inventory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="串行/并行目录遍历基准")
+    parser.add_argument('--root', default='', help="已有的目录树；不指定时生成合成树")
+    parser.add_argument('--files', type=int, default=500000, help="合成树的文件数")
+    parser.add_argument('--per-dir', type=int, default=100, help="合成树每个目录的文件数")
+    parser.add_argument('--workers', type=int, nargs='+', default=[4, 8, 16], help="并行线程数（可多个）")
+    parser.add_argument('--repeat', type=int, default=3, help="每种模式的重复次数")
+    parser.add_argument('--keep', action='store_true', help="保留生成的合成树")
+    args = parser.parse_args()
+
+    root = args.root
+    generated = not root
+    if generated:
+        root = tempfile.mkdtemp(prefix='gitseek-walker-')
+        start = time.perf_counter()
+        build_tree(root, args.files, args.per_dir)
+        print(f"生成合成树: {root}（{args.files} 个文件，{time.perf_counter() - start:.1f}s）")
+
+    try:
+        serial_time, serial = timed_scan(root, 0, args.repeat)
+        expected = snapshot(serial)
+        print(f"条目数: {len(serial)}，目录数: {len(serial.children)}")
+        print(f"{'模式':<12}{'耗时(s)':>10}{'加速比':>10}")
+        print(f"{'串行':<12}{serial_time:>10.3f}{1.0:>10.2f}")
+        for workers in args.workers:
+            parallel_time, parallel = timed_scan(root, workers, args.repeat)
+            if snapshot(parallel) != expected:
+                raise SystemExit(f"并行遍历（{workers} 线程）结果与串行不一致")
+            print(f"{f'并行 x{workers}':<12}{parallel_time:>10.3f}{serial_time / parallel_time:>10.2f}")
+        print("并行遍历结果与串行完全一致")
+    finally:
+        if generated and not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
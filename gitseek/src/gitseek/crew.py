@@ -1,10 +1,19 @@
 from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, crew, task
 from .tools.GitShellTool import GitShellTool  
+from .tools.GitArchiveFetcher import GitArchiveFetcher
+from .tools.CloneStore import CloneStoreManager
 from .tools.GitHubApiReader import GitHubAPIReader  
+from .tools.GitHistoryAnalyzer import GitHistoryAnalyzer
+from .tools.ContributorAnalyzer import ContributorAnalyzer
 from .tools.FileContentReader import FileContentReader
+from .tools.BatchFileReader import BatchFileContentReader
 from .tools.FileSystemBrowser import FileSystemBrowser
 from .tools.LLMCodeSummarizer import LLMCodeSummarizer
+from .tools.HotspotAnalyzer import HotspotAnalyzer
+from .tools.MultiRefAnalyzer import MultiRefAnalyzer
+from .tools.LanguageStats import LanguageStatsAnalyzer
+from .tools.MonorepoAnalyzer import MonorepoAnalyzerTool
 from .tools.ReportGenerator import ReportGenerator
 from .tools.SmartQuestionGuide import SmartQuestionGuide
 from crewai.agents.agent_builder.base_agent import BaseAgent
@@ -30,6 +39,8 @@ class GitSeek():
     def scout_agent(self) -> Agent:
         """GitHub仓库侦察员 - 负责克隆仓库和获取元数据"""
         git_tool = GitShellTool()
+        archive_tool = GitArchiveFetcher()
+        store_tool = CloneStoreManager()
         api_tool = GitHubAPIReader()
         
         return Agent(
@@ -38,7 +49,7 @@ class GitSeek():
             backstory="""You are an efficient technical scout specializing in GitHub ecosystem analysis. 
             With expertise in Git operations and GitHub API, you quickly acquire and organize 
             fundamental project intelligence for deeper analysis.""",
-            tools=[git_tool, api_tool],
+            tools=[git_tool, archive_tool, store_tool, api_tool],
             verbose=True,
             llm=self.llm
         )
@@ -48,6 +59,8 @@ class GitSeek():
         """软件架构分析师 - 负责分析项目结构和依赖"""
         fs_tool = FileSystemBrowser()
         fc_tool = FileContentReader()
+        loc_tool = LanguageStatsAnalyzer()
+        monorepo_tool = MonorepoAnalyzerTool()
 
         return Agent(
             role="Software Architecture Analyst",
@@ -55,7 +68,7 @@ class GitSeek():
             backstory="""As a seasoned software architect, you have an exceptional ability to understand 
             and document complex codebase structures. Your keen eye for design patterns and 
             dependency relationships makes you invaluable for project architecture assessment.""",
-            tools=[fs_tool, fc_tool], 
+            tools=[fs_tool, fc_tool, loc_tool, monorepo_tool], 
             verbose=True,
             llm=self.llm
         )
@@ -65,6 +78,9 @@ class GitSeek():
         """代码审查员 - 负责代码质量分析"""
         code_tool = LLMCodeSummarizer()
         file_reader = FileContentReader()
+        batch_reader = BatchFileContentReader()
+        hotspot_tool = HotspotAnalyzer()
+        multi_ref_tool = MultiRefAnalyzer()
         
         return Agent(
             role="Senior Code Quality Analyst",
@@ -72,7 +88,7 @@ class GitSeek():
             backstory="""You are a meticulous code reviewer with years of experience in multiple 
             programming languages. Known for your insightful analysis of code structure, 
             design patterns, and quality metrics that help maintain high coding standards.""",
-            tools=[code_tool, file_reader],
+            tools=[code_tool, file_reader, batch_reader, hotspot_tool, multi_ref_tool],
             verbose=True,
             llm=self.llm
         )
@@ -81,6 +97,8 @@ class GitSeek():
     def community_watcher_agent(self) -> Agent:
         """社区观察员 - 负责社区活跃度分析"""
         api_tool = GitHubAPIReader()
+        history_tool = GitHistoryAnalyzer()
+        contributor_tool = ContributorAnalyzer()
         
         return Agent(
             role="Open Source Community Analyst",
@@ -88,7 +106,7 @@ class GitSeek():
             backstory="""You specialize in understanding open source community dynamics. With deep 
             knowledge of GitHub collaboration patterns, you excel at identifying trending 
             issues, contributor engagement, and project health indicators.""",
-            tools=[api_tool],
+            tools=[api_tool, history_tool, contributor_tool],
             verbose=True,
             llm=self.llm
         )
@@ -150,8 +168,10 @@ class GitSeek():
         return Task(
             description="""对指定的GitHub仓库 {repo_url} 进行初步侦察：
             1. 提取仓库所有者和仓库名称
-            2. 使用Git工具克隆仓库到工作目录 {work_dir}
-            3. 使用GitHub API获取项目基本元数据（stars, forks, language等）
+            2. 使用GitHub API获取项目基本元数据（stars, forks, language, size等）
+            3. 使用Git工具克隆仓库到工作目录 {work_dir}，将元数据中的 size 作为 repo_size_kb 传入，
+               由工具自动选择获取方式（不需要提交历史时下载归档包，否则按大小选择 full/shallow/blobless/sparse 克隆），
+               克隆路径为 {work_dir}/[owner]/[repo_name]；随后用 Clone Store Manager 查看克隆目录的磁盘占用和缓存命中率
             4. 收集项目描述和README信息
             5. 记录项目的创建时间和最后更新时间
             
@@ -160,6 +180,8 @@ class GitSeek():
             agent=self.scout_agent(),
             expected_output="""一份包含项目基本信息的侦察报告，必须包括：
             - 仓库克隆状态和本地路径
+            - 使用的获取方式/克隆策略和拉取的字节数
+            - 克隆目录的磁盘占用和缓存命中率
             - 项目元数据（stars, forks, language等）
             - 项目描述和关键统计信息
             - 数据收集时间戳
@@ -179,11 +201,15 @@ class GitSeek():
         return Task(
             description="""基于侦察任务的结果，分析项目 {repo_url} 的整体架构：
             1. 使用侦察任务提供的克隆路径
-            2. 扫描项目的完整文件目录结构
+            2. 使用 File System Browser（output_format='compact'）获取按 token 预算折叠的目录概要，
+               需要细节的目录再用 output_format='page' 分页列出（subpath/extensions/roles/sort_by，按 next_cursor 翻页）
             3. 识别核心代码目录（如src, lib, app, components等）
             4. 定位并解析关键配置文件（package.json, requirements.txt等）
             5. 分析项目的依赖关系和外部库使用情况
-            6. 生成项目的架构层次描述
+            6. 使用 Language Statistics 统计全仓库各语言的代码行、注释行和空行
+            7. 如果 File System Browser 返回的 sub_project_count 大于 1（monorepo），使用 Monorepo Analyzer
+               分析每个子项目的结构、依赖和代码指标，并在架构描述中逐个子项目说明
+            8. 生成项目的架构层次描述
             
             重点关注项目的组织方式和模块化设计。""",
             agent=self.architect_agent(),
@@ -193,13 +219,17 @@ class GitSeek():
             - 依赖关系清单
             - 架构设计模式分析
             - 配置环境说明
+            - 语言与代码规模统计
+            - 子项目（monorepo）明细与汇总
             
             输出格式:
             {
                 "structure": {...},
                 "core_directories": [...],
                 "config_files": [...],
-                "dependencies": {...}
+                "dependencies": {...},
+                "language_stats": {...},
+                "packages": {...}
             }""",
             #context=[self.scout_task()]
             output_file='output/architect_data.json'  # 输出到文件 
@@ -210,12 +240,14 @@ class GitSeek():
         """代码审查任务"""
         return Task(
             description="""基于架构分析结果，对项目 {repo_url} 进行代码质量审查：
-            1. 从架构分析识别的核心目录中选择关键文件
-            2. 使用 LLMCodeSummarizer 工具随机抽取3-5个重要源代码文件
+            1. 使用 Code Hotspot Analyzer 对克隆路径生成变更频率 × 复杂度热点图，优先审查热点文件
+            2. 结合热点排行和架构分析识别的核心目录，使用 LLMCodeSummarizer 工具抽取3-5个重要源代码文件
             3. 深度分析每个文件的功能、代码质量和设计模式
             4. 评估代码的可读性、注释质量和命名规范
             5. 分析代码复杂度、函数长度和模块耦合度
             6. 识别使用的设计模式和架构模式
+            7. 需要对比的版本：{compare_refs}。不是"无"时，使用 Multi-Ref Analyzer 传入这些 ref（按时间顺序），
+               汇总各版本的架构/代码质量指标及相邻版本之间的差值
             
             提供具体的代码示例和改进建议。""",
             agent=self.code_reviewer_agent(),
@@ -233,6 +265,8 @@ class GitSeek():
                 "overall_quality": "Good/Fair/Needs Improvement",
                 "average_score": 85,
                 "design_patterns": [...],
+                "hotspots": [...],
+                "ref_comparison": {"refs": [...], "deltas": [...]},
                 "recommendations": [...]
             }""",
             #context=[self.scout_task(),self.architect_task()]
@@ -249,9 +283,12 @@ class GitSeek():
             3. 获取最近10个pull request记录
             4. 分析issue的类型分布（bug、feature、question等）
             5. 识别社区关注的热点问题和趋势
-            6. 统计主要贡献者和他们的活跃度
+            6. 使用 Local Contributor Analyzer 基于本地提交历史统计主要贡献者和他们的活跃度
+               （提交数、代码行数、基尼系数、巴士因子、各时间窗口活跃人数）
             7. 评估项目的响应速度和问题解决效率
             8. 计算社区健康度评分
+            9. 使用 Git History Analyzer 对侦察任务的克隆路径做本地提交历史分析
+               （文件变更热度、提交节奏、周活跃度、作者数量），结果放入 history 字段
             
             重点关注社区的健康发展状况和活跃度。""",
             agent=self.community_watcher_agent(),
@@ -268,7 +305,8 @@ class GitSeek():
                 "prs": {...},
                 "contributors": {...},
                 "health_score": 85,
-                "activity_level": "Highly Active"
+                "activity_level": "Highly Active",
+                "history": {...}
             }""",
             #context=[self.scout_task()]
             output_file='output/community_data.json'  # 输出到文件
@@ -39,6 +39,9 @@ def run():
         else:
             print("🔄 请重新输入URL...")
     
+    # 可选：对比多个分支/标签（共用同一个对象库，只重新分析变化的文件）
+    compare_refs = input("🏷️ 需要对比的分支/标签（逗号分隔，直接回车跳过）: ").strip()
+
     # 2. 显示分析流程并执行完整分析
     print(f"\n🚀 开始分析: {repo_url}")
     print("⏳ 分析流程（预计5-10分钟，取决于仓库大小）:")
@@ -51,11 +54,7 @@ def run():
     print("-" * 60)
     
     # 准备输入参数
-    inputs = {
-        'repo_url': repo_url,
-        'analysis_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        'work_dir': './cloned_repos'  # 仓库克隆目录
-    }
+    inputs = _build_inputs(repo_url, compare_refs)
     
     try:
         # 初始化并运行完整分析团队
@@ -83,6 +82,13 @@ def run():
         print("  ✅ 社区活跃度与健康度评分")
         print("  ✅ 结构化技术报告（output/project_analysis_report.md）")
         print("  ✅ 智能问题推荐（output/question_guide.json）")
+        try:
+            from gitseek.tools.CloneStore import CloneStore
+            usage = CloneStore(inputs['work_dir']).usage()
+            print(f"💾 克隆目录: {usage['repos']} 个仓库，占用 {usage['used_bytes'] / 1024 / 1024:.1f} MB，"
+                  f"缓存命中率 {usage['hit_rate']:.0%}")
+        except OSError:
+            pass
         print("-" * 60)
         
         # 4. 智能提问引导功能（新增部分）
@@ -97,6 +103,7 @@ def run():
                 with open('output/scout_data.json', 'r', encoding='utf-8') as f:
                     scout_data = json.load(f)
                     project_data['metadata'] = scout_data.get('metadata', {})
+                    project_data['clone_path'] = scout_data.get('clone_path', '')
                 
                 with open('output/architect_data.json', 'r', encoding='utf-8') as f:
                     project_data['architecture'] = json.load(f)
@@ -110,6 +117,11 @@ def run():
             except Exception as e:
                 print(f"⚠️ 读取分析数据失败: {e}")
                 project_data = {'metadata': {}}
+
+            # 侦察结果没有记录克隆路径时，使用克隆工具的约定位置：[work_dir]/[owner]/[repo_name]
+            if not project_data.get('clone_path'):
+                from gitseek.tools.GitArchiveFetcher import GitArchiveFetcher
+                project_data['clone_path'] = GitArchiveFetcher.checkout_path(inputs['work_dir'], repo_url)
             
             # 用户上下文选择
             print("\n🎯 请选择您的身份背景（这将帮助生成更相关的问题）:")
@@ -191,6 +203,64 @@ def run():
         raise e
 
 # 辅助函数（放在 run() 函数外面）
+def _build_inputs(repo_url: str, compare_refs: str = '') -> dict:
+    """各入口共用的任务输入；compare_refs 为空时填 '无'（任务描述据此跳过多版本对比）"""
+    return {
+        'repo_url': repo_url,
+        'analysis_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'work_dir': './cloned_repos',  # 仓库克隆目录
+        'compare_refs': compare_refs or '无'
+    }
+
+def _env_inputs() -> dict:
+    """非交互入口（train / replay / test）的输入：仓库和对比版本取自 GITSEEK_REPO_URL、GITSEEK_COMPARE_REFS"""
+    return _build_inputs(os.environ.get('GITSEEK_REPO_URL', 'https://github.com/crewAIInc/crewAI'),
+                         os.environ.get('GITSEEK_COMPARE_REFS', '').strip())
+
+def train():
+    """
+    训练团队：train <迭代次数> <结果文件名>
+    """
+    try:
+        GitSeek().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=_env_inputs())
+    except Exception as e:
+        raise Exception(f"An error occurred while training the crew: {e}")
+
+def replay():
+    """
+    从指定任务开始重放：replay <task_id>
+    """
+    try:
+        GitSeek().crew().replay(task_id=sys.argv[1], inputs=_env_inputs())
+    except Exception as e:
+        raise Exception(f"An error occurred while replaying the crew: {e}")
+
+def test():
+    """
+    测试团队并评估结果：test <迭代次数> <评估用模型>
+    """
+    try:
+        GitSeek().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=_env_inputs())
+    except Exception as e:
+        raise Exception(f"An error occurred while testing the crew: {e}")
+
+def run_with_trigger():
+    """
+    由外部触发运行：run_with_trigger '<JSON 负载>'，负载中需包含 repo_url，可选 compare_refs
+    """
+    if len(sys.argv) < 2:
+        raise Exception("No trigger payload provided. Please provide JSON payload as argument.")
+    try:
+        payload = json.loads(sys.argv[1])
+    except json.JSONDecodeError:
+        raise Exception("Invalid JSON payload provided as argument")
+    inputs = _build_inputs(payload['repo_url'], payload.get('compare_refs', ''))
+    inputs['crewai_trigger_payload'] = payload
+    try:
+        return GitSeek().crew().kickoff(inputs=inputs)
+    except Exception as e:
+        raise Exception(f"An error occurred while running the crew with trigger: {e}")
+
 def _get_category_name(category_key: str) -> str:
     """获取分类名称"""
     name_map = {
@@ -203,6 +273,113 @@ def _get_category_name(category_key: str) -> str:
     }
     return name_map.get(category_key, '📝 其他问题')
 
+def watch():
+    """
+    监听模式：监听本地工作副本的修改，增量更新文件清单、代码指标和依赖解析，
+    并重新生成报告（只重新渲染受影响的部分）
+    """
+    from gitseek.tools.RepoWatcher import RepoWatcher
+    from gitseek.tools.ReportGenerator import ReportGenerator, SectionCache
+
+    repo_path = sys.argv[1] if len(sys.argv) > 1 else input("\n📁 请输入要监听的本地仓库路径: ").strip()
+    if not os.path.isdir(repo_path):
+        print(f"❌ 目录不存在: {repo_path}")
+        return
+
+    generator = ReportGenerator()
+    output_path = 'output/project_analysis_report.md'
+
+    def regenerate(summary):
+        if not summary['sections']:
+            return
+        project_data = watcher.merge_into(generator._load_data_from_files())
+        result = generator._run(project_data=project_data, output_path=output_path, generate_qa=False)
+        if result.get('success'):
+            print(f"📝 #{summary['revision']} {summary['changed_count']} 个路径变化，"
+                  f"影响: {', '.join(summary['sections'])}；重新渲染 {len(result['sections_rendered'])} 部分，"
+                  f"复用 {len(result['sections_reused'])} 部分")
+        else:
+            print(f"❌ {result.get('error')}")
+
+    # 输出目录位于被监听的工作副本内时，报告和渲染缓存的写入不能再触发重新生成
+    watcher = RepoWatcher(repo_path, output_paths=[os.path.dirname(output_path), output_path,
+                                                   SectionCache.path_for(output_path)])
+    print(f"👀 监听 {os.path.abspath(repo_path)}（{watcher.backend_name}），按 Ctrl+C 退出")
+    regenerate(watcher.prime())
+    watcher.on_change = regenerate
+    try:
+        while True:
+            watcher.poll_once()
+    except KeyboardInterrupt:
+        print("\n👋 已停止监听")
+    finally:
+        watcher.backend.close()
+
+def batch():
+    """
+    批量模式：并发获取多个仓库（限制并发数、带宽和磁盘占用），每个仓库获取完成后立即开始分析，
+    不等待整批获取结束。仓库 URL 来自命令行参数，或一个每行一个 URL 的文件。
+
+    环境变量：GITSEEK_MAX_CONCURRENT（并发获取数，默认 4）、GITSEEK_MAX_BANDWIDTH_MBPS（归档下载的
+    总带宽上限，git clone 不受限）、GITSEEK_CLONE_BUDGET_MB（磁盘预算，与克隆目录的淘汰预算相同）。
+    """
+    import shutil
+    import threading
+    from gitseek.tools.RepoFetchScheduler import RepoFetchScheduler
+    from gitseek.tools.GitArchiveFetcher import GitArchiveFetcher
+
+    args = sys.argv[1:]
+    if len(args) == 1 and os.path.isfile(args[0]):
+        with open(args[0], 'r', encoding='utf-8') as f:
+            args = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    repo_urls = args or [url.strip() for url in input("\n🔗 请输入要分析的仓库URL（逗号分隔）: ").split(',')
+                         if url.strip()]
+    if not repo_urls:
+        print("❌ 没有需要分析的仓库")
+        return
+
+    work_dir = './cloned_repos'
+    # 各任务的输出文件路径固定（output/*.json），分析逐个进行，完成后把报告复制到 output/<owner>/<repo>/
+    crew_lock = threading.Lock()
+
+    def on_event(event):
+        details = {k: v for k, v in event.items() if k not in ('event', 'repo_url', 'time')}
+        print(f"  [{event['event']}] {event['repo_url']} {details if details else ''}")
+
+    def analyze(result):
+        inputs = _build_inputs(result['repo_url'])
+        with crew_lock:
+            GitSeek().crew().kickoff(inputs=inputs)
+            owner, repo = GitArchiveFetcher.parse_repo_url(result['repo_url'])
+            report_dir = os.path.join('output', owner, repo)
+            os.makedirs(report_dir, exist_ok=True)
+            for name in ('project_analysis_report.md', 'question_guide.json', 'scout_data.json',
+                         'architect_data.json', 'code_review_data.json', 'community_data.json'):
+                if os.path.exists(os.path.join('output', name)):
+                    shutil.copy2(os.path.join('output', name), os.path.join(report_dir, name))
+        return report_dir
+
+    scheduler = RepoFetchScheduler(
+        work_dir,
+        max_concurrent=int(os.environ.get('GITSEEK_MAX_CONCURRENT', '4')),
+        max_bandwidth_bps=int(float(os.environ.get('GITSEEK_MAX_BANDWIDTH_MBPS', '0')) * 1024 * 1024),
+        disk_budget_bytes=int(float(os.environ.get('GITSEEK_CLONE_BUDGET_MB', '0')) * 1024 * 1024),
+        on_event=on_event
+    )
+    print(f"🚀 批量分析 {len(repo_urls)} 个仓库")
+    results = list(scheduler.fetch_all(repo_urls, analyze=analyze))
+
+    print("\n" + "=" * 60)
+    for result in results:
+        if not result['success']:
+            print(f"❌ {result['repo_url']}: {result['message']}")
+            continue
+        try:
+            print(f"✅ {result['repo_url']}: 报告已保存到 {result['analysis'].result()}")
+        except Exception as e:
+            print(f"❌ {result['repo_url']}: 分析失败: {e}")
+    return results
+
 # CrewAI CLI 标准入口点
 if __name__ == "__main__":
     run()
\ No newline at end of file
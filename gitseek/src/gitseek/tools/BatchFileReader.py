@@ -0,0 +1,171 @@
+# BatchFileReader.py
+from crewai.tools import BaseTool
+from typing import Type, Dict, Any, List, Optional, Tuple, ClassVar
+from pydantic import BaseModel, Field
+from concurrent.futures import ThreadPoolExecutor
+import re
+import os
+
+from .FileContentReader import FileContentReader
+from .ContentCache import get_content_cache
+from .ContentSniffer import ContentSniffer
+from .FileIndex import get_file_index
+from .GitObjectReader import get_object_reader
+from .IgnoreRules import IgnoreRules
+
+
+class BatchFileReadInput(BaseModel):
+    """Input schema for BatchFileContentReader."""
+    paths: List[str] = Field(..., description="要读取的文件路径或 glob（如 'src/**/*.py'），可加 ':起始行-结束行' 只读取该行范围，如 'src/app.py:120-180'")
+    repo_path: str = Field(default="", description="仓库根目录：相对路径和 glob 相对于它解析；使用 git_ref 时为仓库路径（工作目录或裸镜像）")
+    git_ref: str = Field(default="", description="可选：从 git 对象中读取该 ref 下的文件")
+    max_lines: int = Field(default=100, description="未指定行范围时每个文件读取的最大行数")
+    max_total_chars: int = Field(default=60000, description="所有文件内容合计的字符数上限，超出时按文件均分并截断")
+    max_files: int = Field(default=20, description="最多读取的文件数，glob 匹配到的其余文件只列出路径")
+    parse_content: bool = Field(default=True, description="是否尝试解析结构化内容（配置文件、依赖清单）")
+
+
+class BatchFileContentReader(BaseTool):
+    name: str = "Batch File Content Reader"
+    description: str = """一次读取多个文件（路径或 glob，可为每个文件指定行范围），在线程池中并发读取，
+    按请求顺序返回合并结果，所有内容合计不超过字符预算。需要查看多个文件时优先使用，避免逐个调用 File Content Reader。"""
+    args_schema: Type[BaseModel] = BatchFileReadInput
+
+    MAX_WORKERS: ClassVar[int] = 8
+    # 预算不足时，分到的字符数少于该值的文件只返回元数据
+    MIN_FILE_CHARS: ClassVar[int] = 200
+    WINDOW_SUFFIX: ClassVar[re.Pattern] = re.compile(r'^(.+):(\d+)(?:-(\d+))?$')
+    GLOB_CHARS: ClassVar[re.Pattern] = re.compile(r'[*?\[]')
+
+    def _run(self, paths: List[str], repo_path: str = "", git_ref: str = "", max_lines: int = 100,
+             max_total_chars: int = 60000, max_files: int = 20, parse_content: bool = True) -> Dict[str, Any]:
+        try:
+            if git_ref and not repo_path:
+                return {"success": False, "error": "使用 git_ref 时需要提供 repo_path"}
+            if repo_path and not os.path.isdir(repo_path):
+                return {"success": False, "error": f"仓库目录不存在: {repo_path}"}
+
+            targets, unmatched, binary, duplicates = self._expand(paths, repo_path, git_ref)
+            selected, omitted = targets[:max(1, max_files)], targets[max(1, max_files):]
+
+            reader = FileContentReader()
+
+            def read(target: Tuple[str, int, int]) -> Dict[str, Any]:
+                path, start_line, end_line = target
+                file_path = path if git_ref or not repo_path or os.path.isabs(path) else os.path.join(repo_path, path)
+                result = reader._run(file_path, max_lines=max_lines, parse_content=parse_content, git_ref=git_ref,
+                                     repo_path=repo_path, start_line=start_line, end_line=end_line)
+                return {"path": path, **result}
+
+            # map 按提交顺序返回，与线程完成的先后无关，结果顺序确定
+            with ThreadPoolExecutor(max_workers=max(1, min(self.MAX_WORKERS, len(selected)))) as pool:
+                files = list(pool.map(read, selected))
+
+            total_chars = self._apply_budget(files, max(0, max_total_chars))
+            return {
+                "success": True,
+                "files": files,
+                "files_read": sum(1 for f in files if "error" not in f),
+                "total_chars": total_chars,
+                "budget_chars": max_total_chars,
+                "truncated_by_budget": [f["path"] for f in files if f.get("truncated_by_budget")],
+                "omitted_files": [path for path, _, _ in omitted],
+                "binary_files": binary,
+                "unmatched": unmatched,
+                "duplicates": duplicates,
+                "cache_stats": get_content_cache().stats()
+            }
+        except Exception as e:
+            return {"success": False, "error": f"批量读取失败: {str(e)}"}
+
+    def _expand(self, specs: List[str], repo_path: str,
+                git_ref: str) -> Tuple[List[Tuple[str, int, int]], List[str], List[str], List[str]]:
+        """把路径 / glob 展开为 (路径, 起始行, 结束行) 列表：glob 匹配结果按路径排序。
+
+        同一文件的不同行范围分别读取；完全相同的 (路径, 行范围) 只保留第一次出现，
+        被丢弃的以 'path' 或 'path:起始行-结束行' 的形式返回。
+        工作目录中 glob 匹配到的二进制文件按索引中缓存的编码识别结果直接排除，不读取内容。
+        """
+        targets: List[Tuple[str, int, int]] = []
+        seen, unmatched, binary, duplicates = set(), [], [], []
+        candidates: Optional[List[str]] = None
+        for spec in specs:
+            spec = spec.strip()
+            path, start_line, end_line = self._split_window(spec, repo_path, git_ref)
+            if self.GLOB_CHARS.search(path):
+                if candidates is None:
+                    candidates = self._list_files(repo_path, git_ref)
+                pattern = re.compile(IgnoreRules._glob_to_regex(path.removeprefix('./').lstrip('/')) + r'\Z')
+                matches = [p for p in candidates if pattern.match(p)]
+                if not git_ref and matches:
+                    encodings = get_file_index(repo_path or ".").sniff_files(matches)
+                    binary.extend(p for p in matches if ContentSniffer.is_binary(encodings.get(p, "")))
+                    matches = [p for p in matches if not ContentSniffer.is_binary(encodings.get(p, ""))]
+            else:
+                matches = [path]
+            if not matches:
+                unmatched.append(spec)
+            for match in matches:
+                target = (match, start_line, end_line)
+                if target in seen:
+                    duplicates.append(f"{match}:{start_line}-{end_line}" if start_line else match)
+                    continue
+                seen.add(target)
+                targets.append(target)
+        return targets, unmatched, binary, duplicates
+
+    def _split_window(self, spec: str, repo_path: str, git_ref: str) -> Tuple[str, int, int]:
+        """拆出 'path:起始行-结束行' 中的行范围；文件名本身带冒号且存在时按原样使用"""
+        match = self.WINDOW_SUFFIX.match(spec)
+        if match is None or (not git_ref and os.path.exists(os.path.join(repo_path, spec))):
+            return spec, 0, 0
+        start_line = int(match.group(2))
+        end_line = int(match.group(3)) if match.group(3) else start_line
+        return match.group(1), start_line, max(start_line, end_line)
+
+    def _list_files(self, repo_path: str, git_ref: str) -> List[str]:
+        """glob 的候选文件（相对路径，已排序）：git ref 取提交的目录树，工作目录取持久化索引（遵循 .gitignore）"""
+        if git_ref:
+            return [entry["path"] for entry in get_object_reader(repo_path, git_ref).list_tree()]
+        index = get_file_index(repo_path or ".")
+        index.refresh()
+        return [entry["path"] for entry in index.find()]
+
+    def _apply_budget(self, files: List[Dict[str, Any]], budget: int) -> int:
+        """按字符预算截断内容：先满足内容较短的文件，剩余预算在其余文件间均分；
+        截断处落在行边界，并给出 next_start_line 以便继续读取。返回最终的总字符数。"""
+        readable = [f for f in files if "content" in f]
+        allowance: Dict[int, int] = {}
+        remaining, pending = budget, sorted(range(len(readable)), key=lambda i: (len(readable[i]["content"]), i))
+        while pending:
+            share = remaining // len(pending)
+            smallest = pending[0]
+            size = len(readable[smallest]["content"])
+            if size > share:
+                allowance.update((i, share) for i in pending)
+                break
+            allowance[smallest] = size
+            remaining -= size
+            pending.pop(0)
+
+        total = 0
+        for i, entry in enumerate(readable):
+            content, limit = entry["content"], allowance[i]
+            if len(content) <= limit:
+                total += len(content)
+                continue
+            entry["truncated_by_budget"] = True
+            entry["has_more"] = True
+            if limit < self.MIN_FILE_CHARS or "start_line" not in entry:
+                entry["content"] = ""
+                entry.pop("parsed", None)
+                entry.pop("end_line", None)
+                entry.pop("end_byte", None)
+                continue
+            cut = content.rfind('\n', 0, limit)
+            kept = content[:cut] if cut > 0 else content[:limit]
+            entry["content"] = kept
+            entry["end_line"] = entry["start_line"] + kept.count('\n')
+            entry["next_start_line"] = entry["end_line"] + 1
+            total += len(kept)
+        return total
@@ -0,0 +1,60 @@
+# BlobCache.py
+from typing import Dict, Any, Optional
+import subprocess
+import hashlib
+import json
+import os
+
+
+# 按 blob SHA（或内容哈希）缓存的计算结果：复杂度（HotspotAnalyzer）和代码行统计（LanguageStats）。
+# 缓存文件放在仓库的公共 git 目录中，worktree 与镜像共享；多个 ref、多个工具共用同一份缓存，
+# 因此保存时不按当前树裁剪，而是按最近使用保留 MAX_ENTRIES 条：读取时用 `lookup` 把命中的条目移到末尾，
+# 保存时丢弃最前面（最久未使用）的条目。设置 GITSEEK_BLOB_CACHE_DIR 时改放到该目录（按仓库区分文件名）。
+MAX_ENTRIES = 200_000
+
+
+def blob_cache_path(repo_path: str, file_name: str) -> str:
+    """缓存文件路径：<公共 git 目录>/<file_name>，或 $GITSEEK_BLOB_CACHE_DIR/<目录摘要>-<file_name>"""
+    result = subprocess.run(['git', '-C', repo_path, 'rev-parse', '--git-common-dir'],
+                            capture_output=True, text=True)
+    git_dir = result.stdout.strip() if result.returncode == 0 else '.git'
+    if not os.path.isabs(git_dir):
+        git_dir = os.path.join(repo_path, git_dir)
+    cache_dir = os.environ.get('GITSEEK_BLOB_CACHE_DIR')
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        digest = hashlib.sha1(os.path.abspath(git_dir).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(cache_dir, f"{digest}-{file_name}")
+    return os.path.join(git_dir, file_name)
+
+
+def load_blob_cache(cache_path: str) -> Dict[str, Any]:
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_blob_cache(cache_path: str, cache: Dict[str, Any]) -> None:
+    """保存缓存；超过 MAX_ENTRIES 时丢弃最早插入（最久未使用）的条目"""
+    if len(cache) > MAX_ENTRIES:
+        keys = list(cache)[len(cache) - MAX_ENTRIES:]
+        cache = {key: cache[key] for key in keys}
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+
+def lookup(cache: Dict[str, Any], key: Optional[str]) -> Any:
+    """读取条目并标记为最近使用（移到末尾）；不存在时返回 None"""
+    if key is None:
+        return None
+    value = cache.pop(key, None)
+    if value is not None:
+        cache[key] = value
+    return value
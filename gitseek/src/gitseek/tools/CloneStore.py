@@ -0,0 +1,296 @@
+# CloneStore.py
+from crewai.tools import BaseTool
+from typing import Type, Dict, Any, List, Optional, Iterator, ClassVar
+from pydantic import BaseModel, Field
+from contextlib import contextmanager
+import shutil
+import time
+import json
+import uuid
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，退化为进程内无锁
+    fcntl = None
+
+from .RepoMirrorCache import RepoMirrorCache
+from .GitArchiveFetcher import GitArchiveFetcher
+
+
+class CloneStore:
+    """带磁盘预算的克隆目录管理（`./cloned_repos`）。
+
+    记录每个检出目录（及其镜像）占用的字节数和最近使用时间，超出预算时按 LRU 淘汰；
+    关注列表中的仓库可以固定（pin），永不淘汰。记录以 owner/repo 为键（不同所有者的同名仓库互不覆盖）。
+    获取和分析期间通过 `using()` 在 `.locks/<owner>/<repo>/` 下登记引用文件，淘汰时跳过仍被引用的仓库。
+    所有状态修改都在 `.gitseek-store.lock` 文件锁内完成，多个进程可以安全共用一个目录。
+    """
+
+    STATE_FILE: ClassVar[str] = ".gitseek-store.json"
+    LOCK_FILE: ClassVar[str] = ".gitseek-store.lock"
+    REFS_DIR: ClassVar[str] = ".locks"
+
+    def __init__(self, root: str, budget_bytes: Optional[int] = None):
+        self.root = root
+        if budget_bytes is None:
+            budget_bytes = int(float(os.environ.get('GITSEEK_CLONE_BUDGET_MB', '0')) * 1024 * 1024)
+        self.budget_bytes = budget_bytes
+        self.env_pinned = {name.strip() for name in os.environ.get('GITSEEK_PINNED_REPOS', '').split(',')
+                           if name.strip()}
+
+    # === 记录与统计 ===
+
+    def record_fetch(self, repo_url: str, path: str, mirror: str = "", hit: bool = False) -> List[str]:
+        """登记一次获取（命中表示检出目录或镜像已存在），随后按预算淘汰，返回被淘汰的仓库（owner/repo）"""
+        name = self.entry_key(repo_url)
+        with self._locked() as state:
+            entry = state["entries"].setdefault(name, {"pinned": False, "hits": 0, "misses": 0})
+            entry.update({
+                "repo_url": repo_url,
+                "path": os.path.abspath(path),
+                "mirror": os.path.abspath(mirror) if mirror else entry.get("mirror", ""),
+                "last_used": time.time()
+            })
+            entry["size_bytes"] = self._entry_size(entry)
+            entry["hits" if hit else "misses"] += 1
+            state["hits" if hit else "misses"] += 1
+            return self._evict_locked(state, exclude={name})
+
+    def touch(self, path: str, repo_url: str = "") -> None:
+        """更新最近分析时间"""
+        with self._locked() as state:
+            name = self._resolve_key(state, path, repo_url)
+            if name in state["entries"]:
+                state["entries"][name]["last_used"] = time.time()
+
+    def usage(self) -> Dict[str, Any]:
+        """当前占用、命中率和各仓库状态"""
+        with self._locked() as state:
+            entries = state["entries"]
+            for entry in entries.values():
+                entry["size_bytes"] = self._entry_size(entry)
+            lookups = state["hits"] + state["misses"]
+            return {
+                "root": os.path.abspath(self.root),
+                "budget_bytes": self.budget_bytes,
+                "used_bytes": sum(e["size_bytes"] for e in entries.values()),
+                "repos": len(entries),
+                "hits": state["hits"],
+                "misses": state["misses"],
+                "hit_rate": round(state["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": [
+                    {
+                        "name": name,
+                        "repo_url": e.get("repo_url", ""),
+                        "size_bytes": e["size_bytes"],
+                        "last_used": e.get("last_used", 0),
+                        "pinned": self._is_pinned(name, e),
+                        "in_use": self._active_refs(name) > 0
+                    }
+                    for name, e in sorted(entries.items(), key=lambda item: item[1].get("last_used", 0), reverse=True)
+                ]
+            }
+
+    # === 固定与淘汰 ===
+
+    def pin(self, name: str, pinned: bool = True) -> bool:
+        with self._locked() as state:
+            entry = state["entries"].get(name)
+            if entry is None:
+                return False
+            entry["pinned"] = pinned
+            return True
+
+    def evict(self, target_bytes: Optional[int] = None) -> List[str]:
+        """按最近使用时间淘汰，直到占用不超过 target_bytes（默认为预算）"""
+        with self._locked() as state:
+            return self._evict_locked(state, target_bytes=target_bytes)
+
+    def _evict_locked(self, state: Dict[str, Any], exclude=(), target_bytes: Optional[int] = None) -> List[str]:
+        limit = self.budget_bytes if target_bytes is None else target_bytes
+        if not limit:
+            return []
+        entries = state["entries"]
+        used = sum(e.get("size_bytes", 0) for e in entries.values())
+        evicted = []
+        for name, entry in sorted(entries.items(), key=lambda item: item[1].get("last_used", 0)):
+            if used <= limit:
+                break
+            if name in exclude or self._is_pinned(name, entry) or self._active_refs(name):
+                continue
+            self._remove(entry)
+            used -= entry.get("size_bytes", 0)
+            evicted.append(name)
+        for name in evicted:
+            del entries[name]
+        return evicted
+
+    def _remove(self, entry: Dict[str, Any]) -> None:
+        shutil.rmtree(entry.get("path", ""), ignore_errors=True)
+        if self._owned_mirror(entry):
+            shutil.rmtree(entry["mirror"], ignore_errors=True)
+        # 检出目录位于 <root>/<owner>/<repo>，所有者目录为空时一并删除
+        owner_dir = os.path.dirname(os.path.abspath(entry.get("path", "")))
+        if owner_dir.startswith(os.path.abspath(self.root) + os.sep):
+            try:
+                os.rmdir(owner_dir)
+            except OSError:
+                pass
+
+    # === 引用计数 ===
+
+    def acquire(self, path: str, repo_url: str = "") -> Optional[str]:
+        """登记一个读取引用，返回引用文件路径；仓库已被淘汰（或尚未获取）时返回 None"""
+        with self._locked() as state:
+            if not os.path.isdir(path):
+                return None
+            refs_dir = self._refs_dir(self._resolve_key(state, path, repo_url))
+            os.makedirs(refs_dir, exist_ok=True)
+            ref_file = os.path.join(refs_dir, f"{os.getpid()}-{uuid.uuid4().hex}")
+            open(ref_file, 'w').close()
+            return ref_file
+
+    def release(self, ref_file: Optional[str]) -> None:
+        if ref_file:
+            try:
+                os.remove(ref_file)
+            except OSError:
+                pass
+
+    @contextmanager
+    def using(self, path: str, repo_url: str = "") -> Iterator[Optional[str]]:
+        """分析期间持有引用，防止仓库被淘汰；产出的引用文件为 None 表示仓库已不存在"""
+        ref_file = self.acquire(path, repo_url)
+        try:
+            yield ref_file
+        finally:
+            self.release(ref_file)
+            if ref_file:
+                self.touch(path, repo_url)
+
+    def _refs_dir(self, name: str) -> str:
+        return os.path.join(self.root, self.REFS_DIR, *name.split('/'))
+
+    def _active_refs(self, name: str) -> int:
+        """统计仍存活进程持有的引用，顺带清理崩溃进程遗留的引用文件"""
+        refs_dir = self._refs_dir(name)
+        if not os.path.isdir(refs_dir):
+            return 0
+        active = 0
+        for ref in os.listdir(refs_dir):
+            pid = ref.split('-', 1)[0]
+            if pid.isdigit() and self._pid_alive(int(pid)):
+                active += 1
+            else:
+                self.release(os.path.join(refs_dir, ref))
+        return active
+
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
+    # === 辅助方法 ===
+
+    @staticmethod
+    def entry_key(repo_url: str) -> str:
+        """记录的键：owner/repo（归档地址取 ref 之前的两段）"""
+        owner, repo = GitArchiveFetcher.parse_repo_url(repo_url)
+        return f"{owner}/{repo}"
+
+    def _resolve_key(self, state: Dict[str, Any], path: str, repo_url: str) -> str:
+        """按仓库 URL 或已登记的检出路径确定键；都没有时（尚未登记）退化为目录名"""
+        if repo_url:
+            return self.entry_key(repo_url)
+        path = os.path.abspath(path)
+        for name, entry in state["entries"].items():
+            if entry.get("path") == path:
+                return name
+        return os.path.basename(os.path.normpath(path))
+
+    def _is_pinned(self, name: str, entry: Dict[str, Any]) -> bool:
+        return entry.get("pinned", False) or name in self.env_pinned or entry.get("repo_url") in self.env_pinned
+
+    def _owned_mirror(self, entry: Dict[str, Any]) -> bool:
+        """只有位于本目录下的镜像计入占用并随检出一起淘汰（$GITSEEK_MIRROR_CACHE 等共享镜像不动）"""
+        mirror = entry.get("mirror")
+        return bool(mirror) and os.path.abspath(mirror).startswith(os.path.abspath(self.root) + os.sep)
+
+    def _entry_size(self, entry: Dict[str, Any]) -> int:
+        size = RepoMirrorCache._dir_size(entry.get("path", ""))
+        if self._owned_mirror(entry):
+            size += RepoMirrorCache._dir_size(entry["mirror"])
+        return size
+
+    @contextmanager
+    def _locked(self) -> Iterator[Dict[str, Any]]:
+        """在文件锁内读取状态，退出时写回"""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, self.LOCK_FILE), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = self._load_state()
+                yield state
+                self._save_state(state)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load_state(self) -> Dict[str, Any]:
+        path = os.path.join(self.root, self.STATE_FILE)
+        state = {"entries": {}, "hits": 0, "misses": 0}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    state.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+        # 旧版本以目录名为键，按记录中的仓库 URL 改为 owner/repo
+        for name in [n for n, e in state["entries"].items() if '/' not in n and e.get("repo_url")]:
+            state["entries"].setdefault(self.entry_key(state["entries"][name]["repo_url"]),
+                                        state["entries"].pop(name))
+        return state
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        path = os.path.join(self.root, self.STATE_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+
+
+class CloneStoreInput(BaseModel):
+    """Input schema for CloneStoreManager."""
+    action: str = Field(default="usage", description="操作：usage（占用和命中率）/pin/unpin/evict")
+    target_dir: str = Field(default="./cloned_repos", description="克隆目录")
+    repo_name: str = Field(default="", description="pin/unpin 的仓库（owner/repo）")
+    budget_mb: int = Field(default=0, description="evict 的目标占用（MB），0 表示使用 $GITSEEK_CLONE_BUDGET_MB")
+
+
+class CloneStoreManager(BaseTool):
+    name: str = "Clone Store Manager"
+    description: str = "查看克隆目录的磁盘占用和缓存命中率，固定/取消固定关注的仓库，或按 LRU 淘汰旧的检出"
+    args_schema: Type[BaseModel] = CloneStoreInput
+
+    def _run(self, action: str = "usage", target_dir: str = "./cloned_repos", repo_name: str = "",
+             budget_mb: int = 0) -> Dict[str, Any]:
+        try:
+            store = CloneStore(target_dir, budget_bytes=budget_mb * 1024 * 1024 if budget_mb else None)
+            action = action.lower()
+            if action in ('pin', 'unpin'):
+                if not store.pin(repo_name, pinned=action == 'pin'):
+                    return {"success": False, "error": f"未登记的仓库: {repo_name}"}
+                return {"success": True, "action": action, "repo_name": repo_name}
+            if action == 'evict':
+                return {"success": True, "evicted": store.evict(), **store.usage()}
+            if action == 'usage':
+                return {"success": True, **store.usage()}
+            return {"success": False, "error": f"未知操作: {action}（可选 usage/pin/unpin/evict）"}
+        except Exception as e:
+            return {"success": False, "error": f"克隆目录管理失败: {str(e)}"}
@@ -0,0 +1,307 @@
+# CompactTree.py
+from typing import Dict, Any, List, Optional, Tuple, ClassVar, FrozenSet, Callable
+from array import array
+import fnmatch
+import heapq
+import math
+
+from .RepoInventory import RepoInventory
+
+
+class CompactTree:
+    """紧凑的目录树表示，以及按 token 预算生成的目录概要。
+
+    节点按广度优先顺序编号，每个目录的子节点编号连续（first_child 起、child_count 个），
+    所有字段保存在按节点编号索引的 array 中；节点名通过 `names` 表去重，
+    路径由父节点链拼出，不为每个节点保存完整路径字符串。
+    目录节点的 size/files/source_files 是整棵子树的汇总，language 为子树中字节数最多的语言。
+    """
+
+    ROLES: ClassVar[List[str]] = ['directory', 'source', 'test', 'config', 'doc', 'other']
+    # 概要中优先展开的目录名（与 FileSystemBrowser.CORE_PATTERNS 一致）和优先折叠的目录名
+    CORE_NAMES: ClassVar[FrozenSet[str]] = frozenset(['src', 'lib', 'app', 'components', 'core', 'main', 'bin',
+                                                      'scripts', 'pkg', 'cmd', 'internal', 'packages'])
+    LOW_INTEREST_NAMES: ClassVar[FrozenSet[str]] = frozenset([
+        'vendor', 'third_party', 'thirdparty', 'external', 'deps', 'examples', 'example', 'samples',
+        'fixtures', 'testdata', 'assets', 'static', 'public', 'migrations', 'locale', 'locales', 'i18n'
+    ])
+    LEGEND: ClassVar[str] = "# 目录行: 名称/ (文件数, 总大小, 主要语言)；以 … 结尾的目录已折叠"
+
+    def __init__(self, root_name: str):
+        self.root_name = root_name
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self.languages: List[str] = ['']
+        self._language_ids: Dict[str, int] = {'': 0}
+        self.name_id = array('I')
+        self.parent = array('i')
+        self.first_child = array('I')
+        self.child_count = array('I')
+        self.is_dir = bytearray()
+        self.role = bytearray()
+        self.language = array('H')
+        self.size = array('Q')
+        self.files = array('I')
+        self.source_files = array('I')
+        self.depth = array('H')
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    # === 构建 ===
+
+    @classmethod
+    def from_inventory(cls, inventory: RepoInventory, root_name: str = "",
+                       file_patterns: List[str] = None,
+                       exclude: Callable[[str, bool], bool] = None) -> 'CompactTree':
+        """由 RepoInventory 构建；file_patterns 只保留匹配的文件，exclude(path, is_dir) 为真的条目
+        （目录连同子树）不加入（汇总也只统计保留的文件）"""
+        entries = inventory.entries
+
+        def info(path: str) -> Tuple[str, bool, int, str, str]:
+            entry = entries[path]
+            return entry.name, entry.is_dir, entry.size, entry.language, entry.role
+
+        tree = cls(root_name or inventory.root.rstrip('/').rsplit('/', 1)[-1])
+        tree._build(inventory.children, info, file_patterns or [], exclude)
+        return tree
+
+    @classmethod
+    def from_entries(cls, root_name: str, entries: List[Dict[str, Any]],
+                     file_patterns: List[str] = None) -> 'CompactTree':
+        """由 git 树条目（path/size，只含文件）构建"""
+        children: Dict[str, List[str]] = {"": []}
+        files: Dict[str, Tuple[str, bool, int, str, str]] = {}
+        for entry in entries:
+            parts = entry["path"].split('/')
+            for depth in range(1, len(parts)):
+                dir_path = '/'.join(parts[:depth])
+                if dir_path not in children:
+                    children[dir_path] = []
+                    children['/'.join(parts[:depth - 1])].append(dir_path)
+            name = parts[-1]
+            dot = name.rfind('.')
+            ext = name[dot:].lower() if dot > 0 else ''
+            language = RepoInventory.LANGUAGE_EXTENSIONS.get(ext, '')
+            lowered = [p.lower() for p in parts[:-1]]
+            role = RepoInventory.classify(name, ext, language,
+                                          any(p in RepoInventory.TEST_DIRS for p in lowered),
+                                          any(p in RepoInventory.DOC_DIRS for p in lowered))
+            files[entry["path"]] = (name, False, entry.get("size", 0), language, role)
+            children['/'.join(parts[:-1])].append(entry["path"])
+        for names in children.values():
+            names.sort()
+
+        def info(path: str) -> Tuple[str, bool, int, str, str]:
+            return files.get(path) or (path.rsplit('/', 1)[-1], True, 0, '', 'directory')
+
+        tree = cls(root_name)
+        tree._build(children, info, file_patterns or [])
+        return tree
+
+    def _build(self, children: Dict[str, List[str]], info: Callable[[str], Tuple[str, bool, int, str, str]],
+               file_patterns: List[str], exclude: Callable[[str, bool], bool] = None) -> None:
+        role_ids = {role: index for index, role in enumerate(self.ROLES)}
+        # 广度优先编号：队列中的位置就是节点编号，子节点在入队时连续分配
+        queue: List[str] = [""]
+        self._append(self.root_name, -1, True, 0, '', 0, 0)
+        head = 0
+        while head < len(queue):
+            path = queue[head]
+            node = head
+            head += 1
+            if not self.is_dir[node]:
+                continue
+            self.first_child[node] = len(queue)
+            count = 0
+            for child in children.get(path, ()):
+                name, is_dir, size, language, role = info(child)
+                if not is_dir and file_patterns and not any(fnmatch.fnmatch(name, p) for p in file_patterns):
+                    continue
+                if exclude is not None and exclude(child, is_dir):
+                    continue
+                queue.append(child)
+                self._append(name, node, is_dir, size, language, role_ids.get(role, 5), self.depth[node] + 1)
+                count += 1
+            self.child_count[node] = count
+        self._aggregate()
+
+    def _append(self, name: str, parent: int, is_dir: bool, size: int, language: str, role: int, depth: int) -> None:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        language_id = self._language_ids.get(language)
+        if language_id is None:
+            language_id = self._language_ids[language] = len(self.languages)
+            self.languages.append(language)
+        self.name_id.append(name_id)
+        self.parent.append(parent)
+        self.first_child.append(0)
+        self.child_count.append(0)
+        self.is_dir.append(1 if is_dir else 0)
+        self.role.append(0 if is_dir else role)
+        self.language.append(language_id)
+        self.size.append(0 if is_dir else size)
+        self.files.append(0 if is_dir else 1)
+        self.source_files.append(1 if role == 1 and not is_dir else 0)
+        self.depth.append(depth)
+
+    def _aggregate(self) -> None:
+        """自底向上汇总目录的文件数、字节数和主要语言（子节点编号总是大于父节点）"""
+        language_bytes: Dict[int, Dict[int, int]] = {}
+        for node in range(len(self) - 1, 0, -1):
+            parent = self.parent[node]
+            self.size[parent] += self.size[node]
+            self.files[parent] += self.files[node]
+            self.source_files[parent] += self.source_files[node]
+            counts = language_bytes.setdefault(parent, {})
+            if self.is_dir[node]:
+                # 编号更大的后代已全部处理完，此时该目录的语言统计已经完整
+                for language, nbytes in self._settle_language(node, language_bytes.pop(node, {})).items():
+                    counts[language] = counts.get(language, 0) + nbytes
+            elif self.language[node]:
+                counts[self.language[node]] = counts.get(self.language[node], 0) + self.size[node] + 1
+        if len(self):
+            self._settle_language(0, language_bytes.pop(0, {}))
+
+    def _settle_language(self, node: int, counts: Dict[int, int]) -> Dict[int, int]:
+        if counts:
+            self.language[node] = max(counts.items(), key=lambda item: item[1])[0]
+        return counts
+
+    # === 查询 ===
+
+    def name(self, node: int) -> str:
+        return self.names[self.name_id[node]]
+
+    def path(self, node: int) -> str:
+        """由父节点链拼出相对路径（根节点为空串）"""
+        parts = []
+        while node > 0:
+            parts.append(self.names[self.name_id[node]])
+            node = self.parent[node]
+        return '/'.join(reversed(parts))
+
+    def children(self, node: int) -> range:
+        start = self.first_child[node]
+        return range(start, start + self.child_count[node])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "nodes": len(self),
+            "files": self.files[0] if len(self) else 0,
+            "directories": sum(self.is_dir),
+            "total_bytes": self.size[0] if len(self) else 0,
+            "distinct_names": len(self.names)
+        }
+
+    # === 概要 ===
+
+    def summarize(self, token_budget: int = 2000, max_depth: Optional[int] = None,
+                  max_files_per_dir: int = 20) -> Dict[str, Any]:
+        """在 token 预算内生成缩进文本形式的目录概要。
+
+        从根目录开始按兴趣度依次展开目录：核心目录、源码文件多、层级浅的目录优先，
+        vendor/examples/测试/文档等目录靠后；展开后超出预算的目录保持折叠，只显示汇总行。
+        每个目录最多列出 max_files_per_dir 个最大的文件，其余合并为一行。
+        """
+        used = self._tokens(self.LEGEND) + self._tokens(self._dir_line(0, 0, collapsed=False))
+        expanded = set()
+        heap = [(-self._interest(0), 0)]
+        while heap:
+            _, node = heapq.heappop(heap)
+            if max_depth is not None and self.depth[node] >= max_depth and node != 0:
+                continue
+            cost = self._expansion_cost(node, max_files_per_dir)
+            if used + cost > token_budget:
+                if node == 0:
+                    break
+                continue
+            used += cost
+            expanded.add(node)
+            for child in self.children(node):
+                if self.is_dir[child] and self.child_count[child]:
+                    heapq.heappush(heap, (-self._interest(child), child))
+
+        lines = [self.LEGEND]
+        self._render(0, 0, expanded, max_files_per_dir, lines)
+        text = '\n'.join(lines)
+        directories = sum(self.is_dir)
+        return {
+            "text": text,
+            "estimated_tokens": self._tokens(text),
+            "token_budget": token_budget,
+            "directories_expanded": len(expanded),
+            "directories_collapsed": directories - len(expanded),
+            **self.stats()
+        }
+
+    def _interest(self, node: int) -> float:
+        name = self.name(node).lower()
+        weight = 1.0
+        if node == 0 or name in self.CORE_NAMES:
+            weight = 2.0
+        elif name in self.LOW_INTEREST_NAMES or name.startswith('.'):
+            weight = 0.2
+        elif name in RepoInventory.TEST_DIRS or name in RepoInventory.DOC_DIRS:
+            weight = 0.3
+        return weight * math.sqrt(1 + self.source_files[node] + 0.25 * self.files[node]) / (1 + self.depth[node])
+
+    def _shown_files(self, node: int, max_files: int) -> Tuple[List[int], List[int]]:
+        """目录下直接列出的文件（最大的 max_files 个，保持名称顺序）及被合并的文件"""
+        files = [child for child in self.children(node) if not self.is_dir[child]]
+        if len(files) <= max_files:
+            return files, []
+        keep = set(sorted(files, key=lambda child: self.size[child], reverse=True)[:max_files])
+        return [f for f in files if f in keep], [f for f in files if f not in keep]
+
+    def _expansion_cost(self, node: int, max_files: int) -> int:
+        depth = self.depth[node] + 1
+        cost = sum(self._tokens(self._dir_line(child, depth, collapsed=True))
+                   for child in self.children(node) if self.is_dir[child])
+        shown, hidden = self._shown_files(node, max_files)
+        cost += sum(self._tokens(self._file_line(child, depth)) for child in shown)
+        if hidden:
+            cost += self._tokens(self._more_line(hidden, depth))
+        return cost
+
+    def _render(self, node: int, depth: int, expanded: set, max_files: int, lines: List[str]) -> None:
+        lines.append(self._dir_line(node, depth, collapsed=node not in expanded))
+        if node not in expanded:
+            return
+        shown, hidden = self._shown_files(node, max_files)
+        for child in self.children(node):
+            if self.is_dir[child]:
+                self._render(child, depth + 1, expanded, max_files, lines)
+        for child in shown:
+            lines.append(self._file_line(child, depth + 1))
+        if hidden:
+            lines.append(self._more_line(hidden, depth + 1))
+
+    def _dir_line(self, node: int, depth: int, collapsed: bool) -> str:
+        language = self.languages[self.language[node]]
+        details = f"{self.files[node]}, {self.format_size(self.size[node])}" + (f", {language}" if language else "")
+        suffix = " …" if collapsed and self.child_count[node] else ""
+        return f"{'  ' * depth}{self.name(node)}/ ({details}){suffix}"
+
+    def _file_line(self, node: int, depth: int) -> str:
+        return f"{'  ' * depth}{self.name(node)} {self.format_size(self.size[node])}"
+
+    def _more_line(self, hidden: List[int], depth: int) -> str:
+        return f"{'  ' * depth}… 另有 {len(hidden)} 个文件 ({self.format_size(sum(self.size[f] for f in hidden))})"
+
+    @staticmethod
+    def format_size(size: int) -> str:
+        if size < 1024:
+            return f"{size}B"
+        for unit in ('K', 'M', 'G'):
+            size /= 1024
+            if size < 1024 or unit == 'G':
+                return f"{size:.1f}{unit}"
+
+    @staticmethod
+    def _tokens(text: str) -> int:
+        """粗略估算 token 数：ASCII 约 4 字符一个 token，非 ASCII 字符各算一个（含换行）"""
+        non_ascii = sum(1 for c in text if ord(c) > 127)
+        return (len(text) - non_ascii) // 4 + non_ascii + 1
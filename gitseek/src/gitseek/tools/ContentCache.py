@@ -0,0 +1,189 @@
+# ContentCache.py
+from typing import Dict, Any, Optional, Tuple, Union, Callable
+from collections import OrderedDict
+import threading
+import sys
+import os
+
+from .LineIndex import LineIndex, PreadBuffer
+from .ContentSniffer import ContentSniffer
+
+
+class CachedContent:
+    """一份文件内容：原始字节（大文件为按需 pread 的 PreadBuffer）、识别出的编码、行索引，以及按需解码的文本。
+
+    二进制文件只保留判断结果（buffer 为空，size 为文件实际大小），不读取其余内容。
+    """
+
+    def __init__(self, buffer: Union[bytes, PreadBuffer], encoding: str, mapped: bool = False, size: int = -1):
+        self.buffer = buffer
+        self.encoding = encoding
+        self.size = len(buffer) if size < 0 else size
+        self.mapped = mapped
+        self.index = LineIndex(buffer)
+        self._text: Optional[str] = None
+        self._lock = threading.Lock()
+        # 由 ContentCache 设置：文本解码后追加占用的字节数
+        self._on_grow: Optional[Callable[[int], None]] = None
+
+    @property
+    def binary(self) -> bool:
+        return ContentSniffer.is_binary(self.encoding)
+
+    @property
+    def text(self) -> str:
+        """完整解码后的文本（首次访问时解码并缓存）"""
+        if self._text is None:
+            with self._lock:
+                if self._text is None:
+                    self._text = '' if self.binary else ContentSniffer.decode(self.buffer, self.encoding)
+                    if self._on_grow is not None:
+                        self._on_grow(sys.getsizeof(self._text))
+        return self._text
+
+    @property
+    def cost(self) -> int:
+        """计入缓存预算的字节数：按需读取（mapped）的内容由页缓存承担，只计解码后的文本"""
+        raw = 0 if self.mapped else len(self.buffer)
+        return raw + (sys.getsizeof(self._text) if self._text is not None else 0)
+
+
+class ContentCache:
+    """进程内共享的文件内容缓存，按字节预算做 LRU 淘汰。
+
+    工作区文件以 (绝对路径, size, mtime_ns) 为键，文件被修改后自动失效；git 对象以 blob SHA 为键，
+    同一内容在不同 ref、不同工具之间共享。小文件整体读入内存，超过 MAX_ENTRY_BYTES 的文件通过 PreadBuffer
+    按需读取（不计入预算，只计解码后的文本；不用 mmap，文件被截断时不会因 SIGBUS 崩溃）。
+    FileContentReader、LLMCodeSummarizer 等读取工具都经由这里读取。
+
+    读取前先用 ContentSniffer 检查文件开头：二进制文件只缓存判断结果，不再读取全文。
+    """
+
+    DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024
+    # 超过该大小的工作区文件改为按需 pread，不整体读入
+    MAX_ENTRY_BYTES = 8 * 1024 * 1024
+    # 条目数上限（按需读取的条目不计预算，避免无限增长；同时限制打开的文件描述符数）
+    MAX_ENTRIES = 1024
+    # 超过该大小的 blob 先只流式读取开头判断是否为二进制
+    SNIFF_STREAM_BYTES = 1024 * 1024
+
+    def __init__(self, budget_bytes: int = 0):
+        self.budget_bytes = budget_bytes or self.DEFAULT_BUDGET_BYTES
+        self._entries: "OrderedDict[Tuple, CachedContent]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_file(self, path: str, encoding: str = "") -> CachedContent:
+        """读取工作区文件；encoding 为已知的识别结果（如 FileIndex 中缓存的），省去再次检查文件开头"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = ('file', path, stat.st_size, stat.st_mtime_ns)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        if ContentSniffer.is_binary(encoding):
+            return self._store(key, CachedContent(b'', encoding, size=stat.st_size))
+        with open(path, 'rb') as f:
+            head = f.read(ContentSniffer.HEAD_BYTES)
+            encoding = encoding or ContentSniffer.sniff(head)
+            if ContentSniffer.is_binary(encoding):
+                content = CachedContent(b'', encoding, size=stat.st_size)
+            elif stat.st_size > self.MAX_ENTRY_BYTES:
+                content = CachedContent(PreadBuffer(path), encoding, mapped=True)
+            else:
+                content = CachedContent(head + f.read(), encoding)
+        return self._store(key, content)
+
+    def get_blob(self, reader, sha: str, size: int = 0) -> CachedContent:
+        """读取 git blob（reader 为 GitObjectReader）；size 较大时先只读开头判断，二进制 blob 不整体读入"""
+        key = ('blob', sha)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        if size > self.SNIFF_STREAM_BYTES:
+            chunks = reader.iter_blob(sha, ContentSniffer.HEAD_BYTES)
+            try:
+                encoding = ContentSniffer.sniff(next(chunks, b''))
+            finally:
+                chunks.close()
+            if ContentSniffer.is_binary(encoding):
+                return self._store(key, CachedContent(b'', encoding, size=size))
+        data = reader.read_blob(sha)
+        return self._store(key, CachedContent(data, ContentSniffer.sniff(data)))
+
+    def _lookup(self, key: Tuple) -> Optional[CachedContent]:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return content
+
+    def _store(self, key: Tuple, content: CachedContent) -> CachedContent:
+        with self._lock:
+            # 并发读取同一文件时以先写入的为准
+            existing = self._entries.get(key)
+            if existing is not None:
+                return existing
+            if key[0] == 'file':
+                # 同一路径的旧版本（文件已被修改）直接移除
+                for stale in [k for k in self._entries if k[0] == 'file' and k[1] == key[1]]:
+                    self._bytes -= self._entries.pop(stale).cost
+            content._on_grow = lambda nbytes, key=key: self._grow(key, nbytes)
+            self._entries[key] = content
+            self._bytes += content.cost
+            self._evict()
+        return content
+
+    def _grow(self, key: Tuple, nbytes: int) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._bytes += nbytes
+                self._evict()
+
+    def _evict(self) -> None:
+        """淘汰最久未使用的条目直到满足预算；最新的条目即使超出预算也保留（调用方正在使用）"""
+        while len(self._entries) > 1 and (self._bytes > self.budget_bytes or len(self._entries) > self.MAX_ENTRIES):
+            _, content = self._entries.popitem(last=False)
+            content._on_grow = None
+            self._bytes -= content.cost
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for content in self._entries.values():
+                content._on_grow = None
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+_CACHE: Optional[ContentCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_content_cache() -> ContentCache:
+    """进程内共享的内容缓存；预算可用环境变量 GITSEEK_CONTENT_CACHE_MB 调整"""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            budget_mb = os.environ.get('GITSEEK_CONTENT_CACHE_MB', '')
+            _CACHE = ContentCache(int(budget_mb) * 1024 * 1024 if budget_mb.isdigit() else 0)
+        return _CACHE
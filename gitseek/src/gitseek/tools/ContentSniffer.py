@@ -0,0 +1,105 @@
+# ContentSniffer.py
+from typing import Union
+import codecs
+import mmap
+import re
+
+
+class ContentSniffer:
+    """只根据文件开头几 KB 判断二进制 / 文本并识别编码，不读取整个文件。
+
+    判断顺序：BOM（UTF-8 / UTF-16 / UTF-32）→ 常见二进制格式的魔数 → NUL 字节（无 BOM 的 UTF-16 除外）
+    → 控制字符比例 → UTF-8 有效比例 → GB18030（高位字节成对出现）→ cp1252 / latin-1。
+    结果是可直接传给 bytes.decode 的编码名，二进制文件为 BINARY。
+    """
+
+    BINARY = "binary"
+    HEAD_BYTES = 8192
+    # 带 BOM 的编码使用会自动去掉 BOM 的编解码器；UTF-32 LE 的 BOM 以 UTF-16 LE 的 BOM 开头，需先判断
+    BOMS = (
+        (codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'),
+        (codecs.BOM_UTF8, 'utf-8-sig'),
+        (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'),
+    )
+    MAGIC_NUMBERS = (
+        b'\x89PNG', b'GIF8', b'\xff\xd8\xff', b'%PDF-', b'PK\x03\x04', b'\x7fELF', b'\x1f\x8b',
+        b'\xca\xfe\xba\xbe', b'\xcf\xfa\xed\xfe', b'MZ\x90\x00', b'\x00asm', b'SQLite format 3\x00'
+    )
+    # 除 \t \n \f \r 和 ESC 之外的 C0 控制字符
+    CONTROL_BYTES = bytes(b for b in range(32) if b not in (9, 10, 12, 13, 27))
+    CONTROL_MAX_RATIO = 0.1
+    # 高位字节中属于合法 UTF-8 序列的比例达到该值即按 UTF-8（少量坏字节以替换字符显示）
+    UTF8_MIN_VALID_RATIO = 0.98
+    # 高位字节连续段长度为偶数的比例达到该值才考虑 GB18030（西文单个重音字母通常是长度为 1 的段）
+    GB_MIN_PAIRED_RATIO = 0.9
+    HIGH_RUN = re.compile(rb'[\x80-\xff]+')
+    # 以多字节为单位编码的文本不能按 b'\n' 切分行
+    WIDE_ENCODINGS = frozenset({'utf-16', 'utf-16-le', 'utf-16-be', 'utf-32'})
+
+    @classmethod
+    def sniff(cls, head: Union[bytes, mmap.mmap]) -> str:
+        """根据文件开头的字节返回编码名或 BINARY"""
+        head = bytes(head[:cls.HEAD_BYTES])
+        if not head:
+            return 'utf-8'
+        for bom, encoding in cls.BOMS:
+            if head.startswith(bom):
+                return encoding
+        if head.startswith(cls.MAGIC_NUMBERS):
+            return cls.BINARY
+        if b'\0' in head:
+            return cls._sniff_utf16(head)
+
+        controls = len(head) - len(head.translate(None, cls.CONTROL_BYTES))
+        if controls / len(head) > cls.CONTROL_MAX_RATIO:
+            return cls.BINARY
+
+        high = sum(len(run) for run in cls.HIGH_RUN.findall(head))
+        if not high:
+            return 'utf-8'
+        # 增量解码，文件开头截断处不完整的多字节序列不计为错误
+        decoded = codecs.getincrementaldecoder('utf-8')('replace').decode(head, final=False)
+        if 1 - decoded.count('\ufffd') / high >= cls.UTF8_MIN_VALID_RATIO:
+            return 'utf-8'
+        return cls._sniff_legacy(head)
+
+    @classmethod
+    def _sniff_utf16(cls, head: bytes) -> str:
+        """无 BOM 的 UTF-16：ASCII 字符的 NUL 字节集中在奇数（LE）或偶数（BE）位置；否则视为二进制"""
+        even, odd = head[0::2], head[1::2]
+        even_nul = even.count(0) / max(1, len(even))
+        odd_nul = odd.count(0) / max(1, len(odd))
+        if odd_nul > 0.7 and even_nul < 0.1:
+            return 'utf-16-le'
+        if even_nul > 0.7 and odd_nul < 0.1:
+            return 'utf-16-be'
+        return cls.BINARY
+
+    @classmethod
+    def _sniff_legacy(cls, head: bytes) -> str:
+        """非 UTF-8 的单/双字节编码：中文 GB 编码的高位字节成对出现，其余按 cp1252（失败时 latin-1）"""
+        runs = [len(run) for run in cls.HIGH_RUN.findall(head)]
+        paired = sum(1 for length in runs if length % 2 == 0) / len(runs)
+        for encoding, fits in (('gb18030', paired >= cls.GB_MIN_PAIRED_RATIO), ('cp1252', True)):
+            if not fits:
+                continue
+            try:
+                codecs.getincrementaldecoder(encoding)('strict').decode(head, final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        return 'latin-1'
+
+    @classmethod
+    def sniff_file(cls, path: str) -> str:
+        with open(path, 'rb') as f:
+            return cls.sniff(f.read(cls.HEAD_BYTES))
+
+    @classmethod
+    def is_binary(cls, encoding: str) -> bool:
+        return encoding == cls.BINARY
+
+    @classmethod
+    def decode(cls, data: Union[bytes, mmap.mmap], encoding: str) -> str:
+        """按识别出的编码解码（个别坏字节以替换字符显示）"""
+        return data[:].decode(encoding or 'utf-8', errors='replace')
@@ -0,0 +1,158 @@
+# ContributorAnalyzer.py
+from crewai.tools import BaseTool
+from typing import Type, Dict, Any, List, ClassVar
+from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+from itertools import accumulate
+import bisect
+import os
+import re
+
+from .GitHistoryAnalyzer import GitHistoryAnalyzer, HistoryStats, get_history
+
+
+class ContributorAnalysisInput(BaseModel):
+    """Input schema for ContributorAnalyzer."""
+    repo_path: str = Field(..., description="本地仓库路径（克隆目录、worktree 或裸镜像）")
+    ref: str = Field(default="HEAD", description="要分析的分支/标签/提交")
+    top_n: int = Field(default=10, description="返回的主要贡献者数量")
+
+
+class ContributorAnalyzer(BaseTool):
+    name: str = "Local Contributor Analyzer"
+    description: str = """基于本地提交历史统计贡献者（替代 GitHub contributors API，不受 100 人和速率限制）。
+    支持 .mailmap 和同邮箱（或同名且邮箱域名相同）身份合并，输出每位作者的提交数和代码行数、基尼系数、巴士因子及各时间窗口的活跃贡献者数。"""
+    args_schema: Type[BaseModel] = ContributorAnalysisInput
+
+    # 活跃贡献者统计窗口（天）
+    ACTIVE_WINDOWS: ClassVar[List[int]] = [30, 90, 365]
+
+    def _run(self, repo_path: str, ref: str = "HEAD", top_n: int = 10) -> Dict[str, Any]:
+        try:
+            if not os.path.isdir(repo_path):
+                return {"success": False, "error": f"仓库目录不存在: {repo_path}"}
+
+            stats = get_history(repo_path, ref)
+            if stats.total_commits == 0:
+                return {"success": False, "error": f"未找到提交记录: {repo_path} ({ref})"}
+            return self.compute(stats, top_n)
+
+        except Exception as e:
+            return {"success": False, "error": f"贡献者分析失败: {str(e)}"}
+
+    def compute(self, stats: HistoryStats, top_n: int = 10) -> Dict[str, Any]:
+        """基于已解析的提交历史计算贡献者指标"""
+        authors = self._merge_identities(stats.authors)
+
+        # 按提交数降序（sorted 是稳定排序，提交数相同时保持原顺序）
+        ranked = sorted(authors, key=lambda a: -a["commits"])
+        commits = [a["commits"] for a in ranked]
+        total_commits = sum(commits)
+        gini = self._gini(commits)
+        now = datetime.now(timezone.utc).timestamp()
+
+        core_count = max(int(len(ranked) * 0.2), min(5, len(ranked)))
+        return {
+            "success": True,
+            "source": "local_git",
+            "total_contributors": len(authors),
+            "total_contributions": total_commits,
+            "total_lines_changed": sum(a["lines_added"] + a["lines_deleted"] for a in authors),
+            "gini_coefficient": round(gini, 4),
+            "contributor_diversity": self._describe_gini(gini),
+            "bus_factor": self._bus_factor(commits, total_commits),
+            "active_contributors": {
+                f"{days}d": sum(1 for a in authors if a["last_commit"] >= now - days * 86400)
+                for days in self.ACTIVE_WINDOWS
+            },
+            "core_contributors": [
+                self._format_author(a, total_commits) for a in ranked[:core_count]
+            ],
+            "top_10_contributors": [
+                {"rank": idx + 1, **self._format_author(a, total_commits)} for idx, a in enumerate(ranked[:top_n])
+            ]
+        }
+
+    def _merge_identities(self, raw_authors: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+        """合并同一个人的多个身份（.mailmap 已由 git log 应用）：邮箱相同，或规范化后的姓名相同且
+        邮箱域名相同即视为同一人；只有姓名相同的不合并，避免把同名的不同贡献者算成一个人"""
+        parent = list(range(len(raw_authors)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        records = list(raw_authors.values())
+        seen: Dict[str, int] = {}
+        for idx, record in enumerate(records):
+            email = record[6].lower()
+            keys = [f"email:{email}"] if email else []
+            name = re.sub(r'\s+', ' ', record[5]).strip().lower()
+            domain = email.rpartition('@')[2]
+            if name and domain and name not in ('unknown', 'root', 'github', 'dependabot[bot]'):
+                keys.append(f"name:{name}@{domain}")
+            for key in keys:
+                if key in seen:
+                    parent[find(idx)] = find(seen[key])
+                else:
+                    seen[key] = idx
+
+        merged: Dict[int, Dict[str, Any]] = {}
+        for idx, record in enumerate(records):
+            root = find(idx)
+            author = merged.setdefault(root, {
+                "name": record[5], "emails": [], "commits": 0, "lines_added": 0, "lines_deleted": 0,
+                "first_commit": record[3], "last_commit": record[4]
+            })
+            # 以提交最多的身份作为显示名称
+            if record[0] > author.get("_name_commits", 0):
+                author["name"], author["_name_commits"] = record[5], record[0]
+            if record[6] and record[6] not in author["emails"]:
+                author["emails"].append(record[6])
+            author["commits"] += record[0]
+            author["lines_added"] += record[1]
+            author["lines_deleted"] += record[2]
+            author["first_commit"] = min(author["first_commit"], record[3])
+            author["last_commit"] = max(author["last_commit"], record[4])
+        return list(merged.values())
+
+    @staticmethod
+    def _gini(values: List[int]) -> float:
+        """基尼系数：0 表示贡献完全均匀，接近 1 表示集中在少数人"""
+        total = sum(values)
+        if not values or total == 0:
+            return 0.0
+        n = len(values)
+        weighted = sum(index * value for index, value in enumerate(sorted(values), 1))
+        return 2 * weighted / (n * total) - (n + 1) / n
+
+    @staticmethod
+    def _bus_factor(sorted_commits: List[int], total: int) -> int:
+        """覆盖超过 50% 提交所需的最少贡献者数（sorted_commits 按提交数降序）"""
+        if total == 0:
+            return 0
+        return bisect.bisect_right(list(accumulate(sorted_commits)), total * 0.5) + 1
+
+    @staticmethod
+    def _describe_gini(gini: float) -> str:
+        if gini > 0.8:
+            return "高度集中（少数核心贡献者）"
+        elif gini > 0.5:
+            return "中等集中"
+        else:
+            return "分散（贡献者多样）"
+
+    @staticmethod
+    def _format_author(author: Dict[str, Any], total_commits: int) -> Dict[str, Any]:
+        return {
+            "login": author["name"],
+            "emails": author["emails"],
+            "contributions": author["commits"],
+            "contribution_percentage": round(author["commits"] / max(total_commits, 1) * 100, 2),
+            "lines_added": author["lines_added"],
+            "lines_deleted": author["lines_deleted"],
+            "first_commit": datetime.fromtimestamp(author["first_commit"], tz=timezone.utc).isoformat(),
+            "last_commit": datetime.fromtimestamp(author["last_commit"], tz=timezone.utc).isoformat()
+        }
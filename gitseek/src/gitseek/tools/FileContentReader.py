@@ -1,24 +1,47 @@
 #FileContentReader.py
 from crewai.tools import BaseTool
-from typing import Type, Dict, Any
+from typing import Type, Dict, Any, ClassVar
 from pydantic import BaseModel, Field
 import os
-import json
-import tomllib
+
+from .GitObjectReader import get_object_reader
+from .ContentCache import CachedContent, get_content_cache
+from .ContentSniffer import ContentSniffer
+from .ManifestParser import ManifestParser
 
 class FileContentReadInput(BaseModel):
     """Input schema for FileContentReader."""
     file_path: str = Field(..., description="要读取的文件路径")
     max_lines: int = Field(default=100, description="最大读取行数（防止大文件）")
     parse_content: bool = Field(default=True, description="是否尝试解析结构化内容")
+    git_ref: str = Field(default="", description="可选：从 git 对象中读取该 ref 下的文件，此时 file_path 为仓库内相对路径")
+    repo_path: str = Field(default="", description="使用 git_ref 时的仓库路径（工作目录或裸镜像）")
+    start_line: int = Field(default=0, description="可选：从第几行开始读取（从 1 开始），用于读取大文件中间的片段")
+    end_line: int = Field(default=0, description="可选：读到第几行（含），0 表示从 start_line 起读取 max_lines 行")
+    start_byte: int = Field(default=-1, description="可选：按字节范围读取的起始偏移（优先于行范围），-1 表示不使用")
+    end_byte: int = Field(default=-1, description="可选：按字节范围读取的结束偏移（不含），-1 表示读取 MAX_WINDOW_BYTES 字节")
 
 class FileContentReader(BaseTool):
     name: str = "File Content Reader"
-    description: str = "读取和解析文件内容，特别支持配置文件和依赖解析"
+    description: str = "读取和解析文件内容，特别支持配置文件和依赖解析；可用 start_line/end_line 或 start_byte/end_byte 读取大文件中的任意片段"
     args_schema: Type[BaseModel] = FileContentReadInput
 
-    def _run(self, file_path: str, max_lines: int = 100, parse_content: bool = True) -> Dict[str, Any]:
+    # 工作区大文件经 ContentCache 用 pread 按需读取窗口，不整体读入，上限只用于防止异常文件
+    MAX_FILE_BYTES: ClassVar[int] = 2 * 1024 * 1024 * 1024
+    # git 对象需要整体读入内存
+    MAX_BLOB_BYTES: ClassVar[int] = 64 * 1024 * 1024
+    # 单次返回的窗口上限（行范围 / 字节范围）
+    MAX_WINDOW_LINES: ClassVar[int] = 2000
+    MAX_WINDOW_BYTES: ClassVar[int] = 256 * 1024
+
+    def _run(self, file_path: str, max_lines: int = 100, parse_content: bool = True,
+             git_ref: str = "", repo_path: str = "", start_line: int = 0, end_line: int = 0,
+             start_byte: int = -1, end_byte: int = -1) -> Dict[str, Any]:
         try:
+            window = (start_line, end_line, start_byte, end_byte)
+            if git_ref:
+                return self._run_git(file_path, repo_path, git_ref, max_lines, parse_content, window)
+
             if not os.path.exists(file_path):
                 return {"error": f"文件不存在: {file_path}"}
             
@@ -26,18 +49,23 @@ class FileContentReader(BaseTool):
                 return {"error": f"路径不是文件: {file_path}"}
 
             file_size = os.path.getsize(file_path)
-            if file_size > 10 * 1024 * 1024:  # 10MB限制
+            if file_size > self.MAX_FILE_BYTES:
                 return {"error": f"文件过大 ({file_size} bytes)，跳过读取"}
 
+            content = get_content_cache().get_file(file_path)
+            if content.binary:
+                return self._binary(file_path, content.size)
             result = {
                 "file_path": file_path,
                 "file_name": os.path.basename(file_path),
-                "file_size": file_size,
-                "content": self._read_file_content(file_path, max_lines)
+                "file_size": content.size,
+                "encoding": content.encoding,
+                **self._read_window(content, max_lines, *window)
             }
-            
-            if parse_content:
-                parsed_data = self._parse_file_content(file_path, result["content"])
+
+            # 从文件开头读取时附带结构化解析；解析的是完整文件，不受预览行数限制
+            if parse_content and result.get("start_line") == 1:
+                parsed_data = ManifestParser.parse_buffer(file_path, content.buffer)
                 if parsed_data:
                     result["parsed"] = parsed_data
             
@@ -46,163 +74,91 @@ class FileContentReader(BaseTool):
         except Exception as e:
             return {"error": f"文件读取失败: {str(e)}"}
 
-    def _read_file_content(self, file_path: str, max_lines: int) -> str:
-        """读取文件内容"""
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = []
-                for i, line in enumerate(f):
-                    if i >= max_lines:
-                        lines.append(f"... (文件超过{max_lines}行，已截断)")
-                        break
-                    lines.append(line.rstrip())
-                return "\n".join(lines)
-        except UnicodeDecodeError:
-            # 尝试其他编码
-            try:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    lines = []
-                    for i, line in enumerate(f):
-                        if i >= max_lines:
-                            lines.append(f"... (文件超过{max_lines}行，已截断)")
-                            break
-                        lines.append(line.rstrip())
-                    return "\n".join(lines)
-            except Exception:
-                return "无法读取文件内容（编码问题）"
+    def _run_git(self, file_path: str, repo_path: str, git_ref: str, max_lines: int,
+                 parse_content: bool, window: tuple = (0, 0, -1, -1)) -> Dict[str, Any]:
+        """通过 cat-file --batch 直接读取 git 对象中的文件"""
+        reader = get_object_reader(repo_path or ".", git_ref)
+        entry = reader.get_entry(file_path)
+        if entry is None:
+            return {"error": f"文件不存在于 {git_ref}: {file_path}"}
 
-    def _parse_file_content(self, file_path: str, content: str) -> Dict[str, Any]:
-        """解析文件内容，特别处理配置文件"""
-        filename = os.path.basename(file_path).lower()
-        
-        try:
-            if filename == 'package.json':
-                return self._parse_package_json(content)
-            elif filename == 'requirements.txt':
-                return self._parse_requirements_txt(content)
-            elif filename == 'pyproject.toml':
-                return self._parse_pyproject_toml(content)
-            elif filename == 'pom.xml':
-                return self._parse_pom_xml(content)
-            elif filename in ['dockerfile', 'docker-compose.yml']:
-                return self._parse_docker_file(content, filename)
-            elif filename == 'go.mod':
-                return self._parse_go_mod(content)
-            elif filename == 'cargo.toml':
-                return self._parse_cargo_toml(content)
-                
-        except Exception as e:
-            return {"parse_error": str(e)}
-        
-        return None
-
-    def _parse_package_json(self, content: str) -> Dict[str, Any]:
-        """解析 package.json"""
-        data = json.loads(content)
-        return {
-            "type": "nodejs_package",
-            "name": data.get("name"),
-            "version": data.get("version"),
-            "description": data.get("description"),
-            "dependencies": data.get("dependencies", {}),
-            "devDependencies": data.get("devDependencies", {}),
-            "scripts": data.get("scripts", {})
-        }
+        if entry["size"] > self.MAX_BLOB_BYTES:
+            return {"error": f"文件过大 ({entry['size']} bytes)，跳过读取"}
 
-    def _parse_requirements_txt(self, content: str) -> Dict[str, Any]:
-        """解析 requirements.txt"""
-        dependencies = []
-        for line in content.split('\n'):
-            line = line.strip()
-            if line and not line.startswith('#'):
-                # 简单的依赖解析
-                dep = line.split('==')[0].split('>=')[0].split('<=')[0].strip()
-                if dep:
-                    dependencies.append(dep)
-        
-        return {
-            "type": "python_requirements",
-            "dependencies": dependencies,
-            "total_dependencies": len(dependencies)
+        content = get_content_cache().get_blob(reader, entry["sha"], entry["size"])
+        if content.binary:
+            return self._binary(file_path, entry["size"])
+        result = {
+            "file_path": file_path,
+            "file_name": os.path.basename(file_path),
+            "file_size": entry["size"],
+            "git_ref": git_ref,
+            "blob_sha": entry["sha"],
+            "encoding": content.encoding,
+            **self._read_window(content, max_lines, *window)
         }
 
-    def _parse_pyproject_toml(self, content: str) -> Dict[str, Any]:
-        """解析 pyproject.toml"""
-        try:
-            data = tomllib.loads(content)
-            result = {"type": "python_pyproject"}
-            
-            if 'project' in data:
-                result.update({
-                    "name": data['project'].get('name'),
-                    "version": data['project'].get('version'),
-                    "dependencies": data['project'].get('dependencies', [])
-                })
-            
-            if 'tool' in data and 'poetry' in data['tool']:
-                poetry = data['tool']['poetry']
-                result.update({
-                    "name": poetry.get('name'),
-                    "version": poetry.get('version'),
-                    "dependencies": poetry.get('dependencies', {})
-                })
-                
-            return result
-        except Exception:
-            return {"type": "python_pyproject", "parse_error": "解析失败"}
-
-    def _parse_pom_xml(self, content: str) -> Dict[str, Any]:
-        """解析 pom.xml (简化版本)"""
-        # 简单的XML解析，实际项目中可能需要更复杂的解析
-        import re
-        group_id = re.search(r'<groupId>(.*?)</groupId>', content)
-        artifact_id = re.search(r'<artifactId>(.*?)</artifactId>', content)
-        version = re.search(r'<version>(.*?)</version>', content)
-        
-        return {
-            "type": "java_maven",
-            "group_id": group_id.group(1) if group_id else None,
-            "artifact_id": artifact_id.group(1) if artifact_id else None,
-            "version": version.group(1) if version else None
-        }
+        if parse_content and result.get("start_line") == 1:
+            parsed_data = ManifestParser.parse_buffer(file_path, content.buffer)
+            if parsed_data:
+                result["parsed"] = parsed_data
 
-    def _parse_docker_file(self, content: str, filename: str) -> Dict[str, Any]:
-        """解析 Dockerfile"""
-        base_images = []
-        for line in content.split('\n'):
-            if line.strip().upper().startswith('FROM'):
-                image = line.strip()[4:].strip().split(' ')[0]
-                if image and image != 'scratch':
-                    base_images.append(image)
-        
-        return {
-            "type": "docker",
-            "file_type": filename,
-            "base_images": base_images
-        }
+        return result
 
-    def _parse_go_mod(self, content: str) -> Dict[str, Any]:
-        """解析 go.mod"""
-        import re
-        module_name = re.search(r'module\s+(\S+)', content)
-        go_version = re.search(r'go\s+(\S+)', content)
-        requires = re.findall(r'require\s+(\S+)\s+(\S+)', content)
-        
-        return {
-            "type": "go_module",
-            "module_name": module_name.group(1) if module_name else None,
-            "go_version": go_version.group(1) if go_version else None,
-            "dependencies": [{"module": req[0], "version": req[1]} for req in requires]
-        }
+    def _read_window(self, content: CachedContent, max_lines: int, start_line: int = 0,
+                     end_line: int = 0, start_byte: int = -1, end_byte: int = -1) -> Dict[str, Any]:
+        """按行号或字节范围读取窗口：通过行索引定位字节偏移，只按识别出的编码解码窗口内的内容。
 
-    def _parse_cargo_toml(self, content: str) -> Dict[str, Any]:
-        """解析 Cargo.toml"""
-        try:
-            data = tomllib.loads(content)
+        未指定范围时读取前 max_lines 行（与原有预览一致，超出部分以截断提示代替）。
+        UTF-16 / UTF-32 文本的换行不是单个换行字节，按解码后的全文分行。
+        """
+        buffer, size = content.buffer, content.size
+        if start_byte >= 0:
+            end = end_byte if end_byte >= 0 else start_byte + self.MAX_WINDOW_BYTES
+            end = min(end, start_byte + self.MAX_WINDOW_BYTES, size)
+            start = min(start_byte, size)
             return {
-                "type": "rust_cargo",
-                "package": data.get('package', {}),
-                "dependencies": data.get('dependencies', {})
+                "content": ContentSniffer.decode(buffer[start:max(start, end)], content.encoding),
+                "start_byte": start,
+                "end_byte": max(start, end),
+                "has_more": end < size
             }
-        except Exception:
-            return {"type": "rust_cargo", "parse_error": "解析失败"}
\ No newline at end of file
+
+        first = max(1, start_line or 1)
+        last = end_line if end_line >= first else first + max(1, max_lines) - 1
+        last = min(last, first + self.MAX_WINDOW_LINES - 1)
+        if content.encoding in ContentSniffer.WIDE_ENCODINGS:
+            all_lines = content.text.split('\n')
+            if all_lines[-1] == '':
+                all_lines.pop()
+            raw_lines = all_lines[first - 1:last]
+            has_more = last < len(all_lines)
+            total = len(all_lines)
+        else:
+            begin, finish = content.index.span(first - 1, last)
+            # 只按 \n 分行，与行索引一致（splitlines 还会在 \x0b、\u2028 等字符处断行）
+            raw_lines = ContentSniffer.decode(buffer[begin:finish], content.encoding).split('\n')
+            if raw_lines[-1] == '':
+                raw_lines.pop()
+            has_more = finish < size
+            total = content.index.known_line_count()
+        lines = [line.rstrip() for line in raw_lines]
+        if has_more and not (start_line or end_line):
+            lines.append(f"... (文件超过{last - first + 1}行，已截断)")
+        result: Dict[str, Any] = {
+            "content": "\n".join(lines),
+            "start_line": first,
+            "end_line": first + len(raw_lines) - 1,
+            "has_more": has_more
+        }
+        if total is not None:
+            result["total_lines"] = total
+        return result
+
+    @staticmethod
+    def _binary(file_path: str, file_size: int) -> Dict[str, Any]:
+        return {"error": f"二进制文件，跳过读取: {file_path}", "binary": True, "file_size": file_size}
+
+    def _parse_file_content(self, file_path: str, content: str) -> Dict[str, Any]:
+        """解析完整的文件内容，特别处理配置文件和锁文件（见 ManifestParser）"""
+        return ManifestParser.parse_text(file_path, content)
@@ -0,0 +1,471 @@
+# FileIndex.py
+from typing import Dict, Any, List, Optional, Tuple, Iterable, ClassVar
+import threading
+import hashlib
+import time
+import sqlite3
+import json
+import os
+
+from .IgnoreRules import IgnoreRules
+from .RepoInventory import RepoInventory, InventoryEntry
+from .ContentSniffer import ContentSniffer
+
+
+class FileIndex:
+    """每个仓库一份的持久化文件索引（SQLite）：路径、stat 数据（size/mtime_ns/inode）和内容哈希。
+
+    重新扫描时目录的 mtime 和 inode 未变化说明其子项列表没有增删，直接沿用索引中的子项列表，不再 scandir；
+    文件仍逐个 stat（原地改写文件不会改变目录 mtime），stat 变化的文件清除旧哈希和编码。
+    stat 的开销远小于计算哈希，跳过的只是列目录。
+
+    索引只按默认排除和 .gitignore 扫描（遵循与不遵循 .gitignore 各一份数据库）；调用方的额外排除模式
+    不参与扫描，在 `to_inventory` 时过滤，因此不同 exclude_patterns 的工具共用同一份索引而不会互相清空。
+    额外模式中的 '!' 只能取消其他额外模式，不能重新包含默认排除或 .gitignore 忽略的路径。
+
+    内容哈希与 git blob SHA 相同（sha1("blob <size>\\0" + 内容)），可直接与 git 对象和
+    HotspotAnalyzer 的复杂度缓存对应；默认按需计算并持久保存。文件编码（或 "binary"）同样按需由
+    ContentSniffer 识别后保存，stat 变化时与哈希一起清除。
+    """
+
+    SCHEMA_VERSION: ClassVar[int] = 2
+    MAX_HASH_BYTES: ClassVar[int] = 10 * 1024 * 1024
+    # 索引目录中最多保留的数据库数，以及未使用多久后删除（按数据库文件的 mtime，每次打开时更新）
+    MAX_INDEX_FILES: ClassVar[int] = 64
+    MAX_INDEX_AGE_SECONDS: ClassVar[int] = 30 * 24 * 3600
+
+    def __init__(self, root: str, index_dir: str = "", respect_gitignore: bool = True):
+        self.root = os.path.abspath(root)
+        self.respect_gitignore = respect_gitignore
+        index_dir = index_dir or os.environ.get('GITSEEK_INDEX_DIR') \
+            or os.path.join(os.path.expanduser('~'), '.cache', 'gitseek', 'index')
+        os.makedirs(index_dir, exist_ok=True)
+        digest = hashlib.sha1(self.root.encode('utf-8')).hexdigest()[:16]
+        suffix = "" if respect_gitignore else "-all"
+        self.db_path = os.path.join(index_dir, f"{os.path.basename(self.root) or 'root'}-{digest}{suffix}.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        os.utime(self.db_path)
+        self.prune(index_dir, keep={self.db_path})
+
+    @classmethod
+    def prune(cls, index_dir: str, keep: Iterable[str] = ()) -> List[str]:
+        """删除超过 MAX_INDEX_AGE_SECONDS 未使用、或超出 MAX_INDEX_FILES 的最久未使用的索引，返回被删除的路径"""
+        keep = {os.path.abspath(path) for path in keep}
+        databases = []
+        for name in os.listdir(index_dir):
+            path = os.path.abspath(os.path.join(index_dir, name))
+            if name.endswith('.sqlite') and path not in keep:
+                try:
+                    databases.append((os.stat(path).st_mtime, path))
+                except OSError:
+                    continue
+        databases.sort(reverse=True)
+        cutoff = time.time() - cls.MAX_INDEX_AGE_SECONDS
+        limit = max(0, cls.MAX_INDEX_FILES - len(keep))
+        removed = [path for position, (mtime, path) in enumerate(databases) if position >= limit or mtime < cutoff]
+        for path in removed:
+            for suffix in ('', '-wal', '-shm'):
+                try:
+                    os.remove(path + suffix)
+                except OSError:
+                    pass
+        return removed
+
+    def _create_schema(self) -> None:
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            version = self._get_meta("schema_version")
+            if version is not None and int(version) != self.SCHEMA_VERSION:
+                # 列有变化，旧表直接丢弃重建
+                self._conn.execute("DROP TABLE IF EXISTS entries")
+                self._conn.execute("DELETE FROM meta WHERE key = 'ignore_signature'")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "path TEXT PRIMARY KEY, parent TEXT NOT NULL, name TEXT NOT NULL, is_dir INTEGER NOT NULL, "
+                "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL, "
+                "ext TEXT, language TEXT, role TEXT, depth INTEGER NOT NULL, content_hash TEXT, encoding TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent)")
+            self._set_meta("schema_version", str(self.SCHEMA_VERSION))
+
+    # === 扫描 ===
+
+    def refresh(self, ignore: Optional[IgnoreRules] = None, hash_contents: bool = False,
+                workers: int = 0) -> Dict[str, Any]:
+        """增量更新索引，返回本次扫描的统计（重新列出的目录数、stat 次数、变化的文件数等）。
+
+        索引为空（首次扫描或重建）且 workers > 1 时，用 RepoInventory 的并行遍历一次性构建。
+        ignore 中的额外排除模式不参与扫描（见类说明）。
+        """
+        ignore = (ignore or IgnoreRules(self.root, respect_gitignore=self.respect_gitignore)).without_extra_patterns()
+        if workers > 1 and self._needs_build(ignore):
+            return self._finish(self._build(ignore, workers), hash_contents)
+
+        with self._lock:
+            signature = self._ignore_signature(ignore)
+            if self._get_meta("ignore_signature") != signature:
+                # 忽略规则变化后已有记录不再可信，重建索引
+                with self._conn:
+                    self._conn.execute("DELETE FROM entries")
+
+            rows = {row[0]: row for row in self._conn.execute("SELECT * FROM entries WHERE is_dir = 1")}
+            child_dirs: Dict[str, List[str]] = {}
+            for path, row in rows.items():
+                if path:
+                    child_dirs.setdefault(row[1], []).append(path)
+            child_files: Dict[str, Dict[str, Tuple]] = {}
+            for row in self._conn.execute("SELECT * FROM entries WHERE is_dir = 0"):
+                child_files.setdefault(row[1], {})[row[0]] = row
+            # 未变化的目录不会重新列出，其中的 .gitignore 需要预先加载
+            for (parent,) in self._conn.execute("SELECT parent FROM entries WHERE name = ? AND parent != ''",
+                                                (IgnoreRules.GITIGNORE_FILE,)):
+                ignore.load_directory(parent)
+
+            stats = {"directories_listed": 0, "directories_reused": 0, "stats": 0,
+                     "files_changed": 0, "entries_removed": 0, "ignored": 0}
+            upserts: List[Tuple] = []
+            removed: List[str] = []
+
+            stack = [("", self.root, 0)]
+            while stack:
+                rel_dir, abs_dir, depth = stack.pop()
+                try:
+                    st = os.stat(abs_dir)
+                except OSError:
+                    removed.append(rel_dir)
+                    continue
+                stats["stats"] += 1
+                old = rows.get(rel_dir)
+                parent = rel_dir.rsplit('/', 1)[0] if '/' in rel_dir else ""
+                dir_row = (rel_dir, parent, os.path.basename(rel_dir), 1, 0, st.st_mtime_ns, st.st_ino,
+                           '', '', 'directory', depth, None, None)
+
+                if old is not None and old[5] == st.st_mtime_ns and old[6] == st.st_ino:
+                    # 目录未变化：沿用索引中的子项列表，文件仍逐个 stat
+                    stats["directories_reused"] += 1
+                    for child in child_dirs.get(rel_dir, []):
+                        stack.append((child, os.path.join(abs_dir, rows[child][2]), depth + 1))
+                    for row in child_files.get(rel_dir, {}).values():
+                        self._check_file(row, row[0], os.path.join(abs_dir, row[2]), None,
+                                         depth + 1, rel_dir, upserts, removed, stats)
+                    continue
+
+                stats["directories_listed"] += 1
+                upserts.append(dir_row)
+                try:
+                    with os.scandir(abs_dir) as it:
+                        dir_entries = list(it)
+                except OSError:
+                    continue
+                ignore.load_directory(rel_dir, frozenset(e.name for e in dir_entries))
+
+                known_files = child_files.get(rel_dir, {}) if old is not None else {}
+                present = set()
+                for dir_entry in dir_entries:
+                    rel_path = f"{rel_dir}/{dir_entry.name}" if rel_dir else dir_entry.name
+                    try:
+                        is_dir = dir_entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if ignore.is_ignored(rel_path, is_dir):
+                        stats["ignored"] += 1
+                        continue
+                    present.add(rel_path)
+                    if is_dir:
+                        if rel_path in known_files:
+                            removed.append(rel_path)  # 文件被替换为同名目录
+                        stack.append((rel_path, dir_entry.path, depth + 1))
+                    else:
+                        if rel_path in rows:
+                            removed.append(rel_path)  # 目录被替换为同名文件
+                        self._check_file(known_files.get(rel_path), rel_path, dir_entry.path, dir_entry,
+                                         depth + 1, rel_dir, upserts, removed, stats)
+                removed.extend(path for path in list(known_files) + child_dirs.get(rel_dir, [])
+                               if path not in present)
+
+            with self._conn:
+                for path in removed:
+                    if path:
+                        stats["entries_removed"] += self._conn.execute(
+                            "DELETE FROM entries WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                            (path, self._escape_like(path) + '/%')).rowcount
+                    else:
+                        stats["entries_removed"] += self._conn.execute("DELETE FROM entries").rowcount
+                self._conn.executemany("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", upserts)
+                self._set_meta("ignore_signature", signature)
+
+        # 子目录中的 .gitignore 有变化时，已索引条目的忽略结果可能不同，重建一次
+        if rows and (any(row[2] == IgnoreRules.GITIGNORE_FILE and row[1] for row in upserts)
+                     or any(path.endswith('/' + IgnoreRules.GITIGNORE_FILE) for path in removed)):
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM entries")
+            return self.refresh(ignore.reload(), hash_contents, workers)
+
+        return self._finish(stats, hash_contents)
+
+    def _finish(self, stats: Dict[str, Any], hash_contents: bool) -> Dict[str, Any]:
+        if hash_contents:
+            self.hash_files()
+        stats["total_entries"] = self.count()
+        return stats
+
+    def _needs_build(self, ignore: IgnoreRules) -> bool:
+        """索引为空或忽略规则已变化，需要完整构建"""
+        with self._lock:
+            if self._get_meta("ignore_signature") != self._ignore_signature(ignore):
+                return True
+            return self._conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone() is None
+
+    def _build(self, ignore: IgnoreRules, workers: int) -> Dict[str, Any]:
+        """并行遍历整棵树后批量写入，替换原有记录"""
+        st = os.stat(self.root)
+        inventory = RepoInventory.scan(self.root, ignore, workers)
+        rows = [("", "", os.path.basename(self.root), 1, 0, st.st_mtime_ns, st.st_ino,
+                 '', '', 'directory', 0, None, None)]
+        for entry in inventory.entries.values():
+            parent = entry.path.rsplit('/', 1)[0] if '/' in entry.path else ""
+            rows.append((entry.path, parent, entry.name, int(entry.is_dir), entry.size, entry.mtime_ns, entry.inode,
+                         entry.ext, entry.language, entry.role, entry.depth, None, None))
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.executemany("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+            self._set_meta("ignore_signature", self._ignore_signature(ignore))
+        files = sum(1 for entry in inventory.entries.values() if not entry.is_dir)
+        return {"directories_listed": len(inventory.children) - len(inventory.errors), "directories_reused": 0,
+                "stats": len(rows), "files_changed": files, "entries_removed": 0, "ignored": inventory.ignored}
+
+    def update_files(self, paths: Iterable[str], ignore: Optional[IgnoreRules] = None) -> int:
+        """按外部通知（如 inotify 事件）重新 stat 指定文件，返回变化的文件数。
+
+        原地改写文件不会改变目录 mtime，refresh 发现不了；新建、删除和重命名会改变目录 mtime，
+        仍由随后的 refresh 处理。
+        """
+        ignore = (ignore or IgnoreRules(self.root, respect_gitignore=self.respect_gitignore)).without_extra_patterns()
+        stats = {"stats": 0, "files_changed": 0}
+        upserts: List[Tuple] = []
+        removed: List[str] = []
+        with self._lock:
+            for path in sorted(set(p.strip('/') for p in paths)):
+                abs_path = os.path.join(self.root, *path.split('/'))
+                if not path or not os.path.isfile(abs_path) or os.path.islink(abs_path) \
+                        or ignore.is_path_ignored(path):
+                    continue
+                old = self._conn.execute("SELECT * FROM entries WHERE path = ?", (path,)).fetchone()
+                parent = path.rsplit('/', 1)[0] if '/' in path else ""
+                self._check_file(old, path, abs_path, None, path.count('/') + 1, parent, upserts, removed, stats)
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", upserts)
+        return stats["files_changed"]
+
+    def _check_file(self, old: Optional[Tuple], rel_path: str, abs_path: str, dir_entry: Optional[os.DirEntry],
+                    depth: int, parent: str, upserts: List[Tuple], removed: List[str], stats: Dict[str, int]) -> None:
+        """比较文件的 stat 数据（old 为索引中的记录），变化时写入新记录（清除旧哈希）"""
+        try:
+            st = dir_entry.stat(follow_symlinks=False) if dir_entry is not None else os.lstat(abs_path)
+        except OSError:
+            removed.append(rel_path)
+            return
+        stats["stats"] += 1
+        if old is not None and old[4] == st.st_size and old[5] == st.st_mtime_ns and old[6] == st.st_ino:
+            return
+        stats["files_changed"] += 1
+        name = rel_path.rsplit('/', 1)[-1]
+        dot = name.rfind('.')
+        ext = name[dot:].lower() if dot > 0 else ''
+        language = RepoInventory.LANGUAGE_EXTENSIONS.get(ext, '')
+        parts = parent.lower().split('/') if parent else []
+        role = RepoInventory.classify(name, ext, language,
+                                      any(p in RepoInventory.TEST_DIRS for p in parts),
+                                      any(p in RepoInventory.DOC_DIRS for p in parts))
+        upserts.append((rel_path, parent, name, 0, st.st_size, st.st_mtime_ns, st.st_ino,
+                        ext, language, role, depth, None, None))
+
+    # === 内容哈希 ===
+
+    def content_hash(self, path: str) -> Optional[str]:
+        """返回文件的 git blob SHA；尚未计算时现在计算并写入索引。
+
+        先 stat 文件与索引记录比较：上次 refresh 之后被改写的文件清除旧哈希后重新计算。
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash, is_dir, size, mtime_ns, inode FROM entries WHERE path = ?",
+                                     (path,)).fetchone()
+        if row is None or row[1]:
+            return None
+        try:
+            st = os.lstat(os.path.join(self.root, *path.split('/')))
+        except OSError:
+            return None
+        if (row[2], row[3], row[4]) != (st.st_size, st.st_mtime_ns, st.st_ino):
+            self.update_files([path])
+        elif row[0]:
+            return row[0]
+        return self.hash_files([path]).get(path)
+
+    def hash_files(self, paths: Iterable[str] = None) -> Dict[str, str]:
+        """为尚无哈希的文件计算 git blob SHA（跳过超过 MAX_HASH_BYTES 的文件）"""
+        with self._lock:
+            if paths is None:
+                rows = self._conn.execute(
+                    "SELECT path, size FROM entries WHERE is_dir = 0 AND content_hash IS NULL AND size <= ?",
+                    (self.MAX_HASH_BYTES,)).fetchall()
+            else:
+                rows = [self._conn.execute("SELECT path, size FROM entries WHERE path = ? AND is_dir = 0",
+                                           (p,)).fetchone() for p in paths]
+                rows = [r for r in rows if r is not None and r[1] <= self.MAX_HASH_BYTES]
+
+        hashes = {}
+        for path, size in rows:
+            try:
+                with open(os.path.join(self.root, *path.split('/')), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            hashes[path] = hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE entries SET content_hash = ? WHERE path = ?",
+                                   [(sha, path) for path, sha in hashes.items()])
+        return hashes
+
+    # === 文件编码 ===
+
+    def encoding(self, path: str) -> Optional[str]:
+        """返回文件的编码名或 "binary"；尚未识别时现在读取文件开头识别并写入索引"""
+        with self._lock:
+            row = self._conn.execute("SELECT encoding, is_dir FROM entries WHERE path = ?", (path,)).fetchone()
+        if row is None or row[1]:
+            return None
+        if row[0]:
+            return row[0]
+        return self.sniff_files([path]).get(path)
+
+    def sniff_files(self, paths: Iterable[str] = None) -> Dict[str, str]:
+        """为尚未识别编码的文件读取开头几 KB，判断二进制 / 文本及编码（paths 中已识别的直接返回索引中的结果）"""
+        with self._lock:
+            if paths is None:
+                rows = self._conn.execute(
+                    "SELECT path, encoding FROM entries WHERE is_dir = 0 AND encoding IS NULL").fetchall()
+            else:
+                rows = [self._conn.execute("SELECT path, encoding FROM entries WHERE path = ? AND is_dir = 0",
+                                           (p,)).fetchone() for p in paths]
+                rows = [r for r in rows if r is not None]
+
+        encodings, sniffed = {}, {}
+        for path, known in rows:
+            if known:
+                encodings[path] = known
+                continue
+            try:
+                sniffed[path] = ContentSniffer.sniff_file(os.path.join(self.root, *path.split('/')))
+            except OSError:
+                continue
+
+        if sniffed:
+            with self._lock, self._conn:
+                self._conn.executemany("UPDATE entries SET encoding = ? WHERE path = ?",
+                                       [(encoding, path) for path, encoding in sniffed.items()])
+        encodings.update(sniffed)
+        return encodings
+
+    # === 查询 ===
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM entries WHERE path = ?", (path,))
+            row = cursor.fetchone()
+            return self._row_to_dict(cursor, row) if row else None
+
+    def find(self, extension: str = "", role: str = "", language: str = "", prefix: str = "",
+             min_size: int = 0, order_by: str = "path", limit: int = 0) -> List[Dict[str, Any]]:
+        """按扩展名、角色、语言、目录前缀和大小查询文件"""
+        clauses, params = ["is_dir = 0"], []
+        for column, value in (("ext", extension.lower()), ("role", role), ("language", language)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if prefix:
+            clauses.append("path LIKE ? ESCAPE '\\'")
+            params.append(self._escape_like(prefix.strip('/')) + '/%')
+        if min_size:
+            clauses.append("size >= ?")
+            params.append(min_size)
+        order = {"path": "path", "size": "size DESC, path", "mtime": "mtime_ns DESC, path"}.get(order_by, "path")
+        sql = f"SELECT * FROM entries WHERE {' AND '.join(clauses)} ORDER BY {order}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries WHERE path != ''").fetchone()[0]
+
+    def to_inventory(self, ignore: Optional[IgnoreRules] = None) -> RepoInventory:
+        """由索引构建内存清单（与 RepoInventory.scan 的结果形状相同）；ignore 中的额外排除模式在这里过滤，
+        被排除的目录连同其子项一起去掉，计入 inventory.ignored"""
+        inventory = RepoInventory(self.root)
+        extra = ignore.extra_rules() if ignore is not None else None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, parent, name, is_dir, size, mtime_ns, inode, ext, language, role, depth "
+                "FROM entries WHERE path != '' ORDER BY depth").fetchall()
+        excluded = set()
+        for path, parent, name, is_dir, size, mtime_ns, inode, ext, language, role, depth in rows:
+            if extra is not None and (parent in excluded or extra.is_ignored(path, bool(is_dir))):
+                if is_dir:
+                    excluded.add(path)
+                # 与扫描时的剪枝一致：被排除目录中的条目不单独计数
+                if parent not in excluded:
+                    inventory.ignored += 1
+                continue
+            inventory.entries[path] = InventoryEntry(path, name, bool(is_dir), size, mtime_ns, inode,
+                                                     ext, language, role, depth)
+            inventory.children.setdefault(parent, []).append(path)
+        for names in inventory.children.values():
+            names.sort()
+        return inventory
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # === 辅助方法 ===
+
+    def _ignore_signature(self, ignore: IgnoreRules) -> str:
+        return hashlib.sha1(json.dumps(ignore.signature()).encode('utf-8')).hexdigest()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    @staticmethod
+    def _escape_like(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    @staticmethod
+    def _row_to_dict(cursor: sqlite3.Cursor, row: Tuple) -> Dict[str, Any]:
+        return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+# 进程内共享的索引连接，键为 (仓库根目录的绝对路径, 是否遵循 .gitignore)
+_INDEXES: Dict[Tuple[str, bool], FileIndex] = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def get_file_index(root: str, respect_gitignore: bool = True) -> FileIndex:
+    """获取仓库的持久化索引（同一进程内复用连接）"""
+    key = (os.path.abspath(root), respect_gitignore)
+    with _INDEX_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = FileIndex(key[0], respect_gitignore=respect_gitignore)
+        return index
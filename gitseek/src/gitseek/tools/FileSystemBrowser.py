@@ -1,34 +1,114 @@
 #FileSystemBrowser.py
 from crewai.tools import BaseTool
-from typing import Type, List, Dict, Any
+from typing import Type, List, Dict, Any, ClassVar, Optional, Tuple, Callable
 from pydantic import BaseModel, Field
+from collections import OrderedDict
+import subprocess
+import threading
+import hashlib
+import base64
+import bisect
+import json
 import os
 import glob
 
+from .GitObjectReader import get_object_reader
+from .RepoInventory import RepoInventory, get_inventory
+from .IgnoreRules import IgnoreRules
+from .CompactTree import CompactTree
+from .MonorepoAnalyzer import discover_packages
+from .GeneratedFileDetector import get_generated_detector, get_tree_detector
+from .GitHistoryAnalyzer import GitHistoryAnalyzer
+
 class FileSystemBrowseInput(BaseModel):
     """Input schema for FileSystemBrowser."""
     directory_path: str = Field(..., description="要浏览的目录路径")
     max_depth: int = Field(default=3, description="最大递归深度")
     file_patterns: List[str] = Field(default=[], description="要匹配的文件模式，如 ['*.py', '*.json']")
+    git_ref: str = Field(default="", description="可选：直接读取 git 对象中该 ref（分支/标签/提交）的目录树，无需检出")
+    exclude_patterns: List[str] = Field(default=[], description="额外排除的 gitignore 风格模式，如 ['*.min.js', 'docs/api/']")
+    respect_gitignore: bool = Field(default=True, description="是否遵循 .gitignore 和 .git/info/exclude（.git、node_modules 等默认始终排除）")
+    include_generated: bool = Field(default=False, description="tree/compact 格式：是否列出生成的、第三方（vendored）或压缩的文件（默认不列出）")
+    parallel_workers: int = Field(default=0, description="完整扫描时的并行线程数（大型 monorepo 或网络文件系统上使用），0 或 1 表示串行")
+    output_format: str = Field(default="tree", description="输出格式：tree（完整嵌套字典）、compact（按 token 预算折叠的缩进文本概要，适合大型仓库）或 page（按游标分页列出 subpath 下的条目）")
+    token_budget: int = Field(default=2000, description="compact 格式的 token 预算")
+    subpath: str = Field(default="", description="page 格式：要列出的子目录（相对 directory_path）")
+    recursive: bool = Field(default=False, description="page 格式：是否递归列出子目录中的所有文件（否则只列直接子项）")
+    extensions: List[str] = Field(default=[], description="page 格式：只列出这些扩展名的文件，如 ['.py', '.ts']")
+    roles: List[str] = Field(default=[], description="page 格式：只列出这些角色的文件（source/test/config/doc/other）")
+    min_size: int = Field(default=0, description="page 格式：文件最小字节数")
+    max_size: int = Field(default=0, description="page 格式：文件最大字节数，0 表示不限")
+    sort_by: str = Field(default="name", description="page 格式：排序方式 name（路径）/size（从大到小）/churn（提交次数从多到少，其次最近修改时间）")
+    page_size: int = Field(default=100, description="page 格式：每页条目数")
+    cursor: str = Field(default="", description="page 格式：上一页返回的 next_cursor，为空时从第一页开始")
 
 class FileSystemBrowser(BaseTool):
     name: str = "File System Browser"
-    description: str = "浏览和分析文件系统目录结构，识别核心目录和文件"
+    description: str = "浏览和分析文件系统目录结构，识别核心目录和文件；大型仓库建议先用 output_format='compact' 获取折叠的目录概要，再用 output_format='page' 按子目录分页查看"
     args_schema: Type[BaseModel] = FileSystemBrowseInput
 
-    def _run(self, directory_path: str, max_depth: int = 3, file_patterns: List[str] = None) -> Dict[str, Any]:
+    CORE_PATTERNS: ClassVar[List[str]] = ['src', 'lib', 'app', 'components', 'core', 'main', 'bin', 'scripts']
+
+    CONFIG_PATTERNS: ClassVar[List[str]] = [
+        'package.json', 'requirements.txt', 'pyproject.toml', 'setup.py',
+        'pom.xml', 'build.gradle', 'CMakeLists.txt', 'Dockerfile',
+        'docker-compose.yml', '.env', 'config.json', 'settings.py',
+        'webpack.config.js', 'tsconfig.json', 'go.mod', 'Cargo.toml',
+        'composer.json', 'Gemfile', 'Makefile',
+        'package-lock.json', 'poetry.lock', 'uv.lock', 'Cargo.lock', 'go.sum'
+    ]
+
+    SORT_KEYS: ClassVar[List[str]] = ['name', 'size', 'churn']
+    MAX_PAGE_SIZE: ClassVar[int] = 1000
+    MAX_SUB_PROJECTS: ClassVar[int] = 50
+
+    def _run(self, directory_path: str, max_depth: int = 3, file_patterns: List[str] = None,
+             git_ref: str = "", exclude_patterns: List[str] = None, respect_gitignore: bool = True,
+             parallel_workers: int = 0, output_format: str = "tree", token_budget: int = 2000,
+             subpath: str = "", recursive: bool = False, extensions: List[str] = None, roles: List[str] = None,
+             min_size: int = 0, max_size: int = 0, sort_by: str = "name", page_size: int = 100,
+             cursor: str = "", include_generated: bool = False) -> Dict[str, Any]:
         try:
+            if output_format not in ("tree", "compact", "page"):
+                return {"error": f"未知的输出格式: {output_format}（可选 tree/compact/page）"}
+            compact = token_budget if output_format == "compact" else 0
+
+            if git_ref and output_format == "page":
+                return {"error": "page 格式只支持工作区目录，不支持 git_ref"}
+            if git_ref:
+                return self._run_git(directory_path, git_ref, max_depth, file_patterns or [], exclude_patterns or [],
+                                     compact, include_generated)
+
             if not os.path.exists(directory_path):
                 return {"error": f"目录不存在: {directory_path}"}
             
             if not os.path.isdir(directory_path):
                 return {"error": f"路径不是目录: {directory_path}"}
 
+            # 一次 scandir 遍历得到的清单，后续查询都在内存中完成
+            inventory = get_inventory(directory_path, exclude_patterns=exclude_patterns,
+                                      respect_gitignore=respect_gitignore, workers=parallel_workers)
+            if output_format == "page":
+                return self._list_page(inventory, directory_path, subpath, recursive, file_patterns or [],
+                                       extensions or [], roles or [], min_size, max_size, sort_by, page_size, cursor)
+            detector = get_generated_detector(directory_path)
+            # 目录结构默认不列出生成/第三方/压缩文件；核心目录、子项目和配置文件仍基于完整清单
+            skip = None if include_generated else self._generated_filter(inventory, detector)
+            if compact:
+                tree = CompactTree.from_inventory(inventory, os.path.basename(os.path.abspath(directory_path)),
+                                                  file_patterns, exclude=skip)
+                structure = self._compact_structure(tree, compact, max_depth)
+            else:
+                structure = {"structure": self._scan_directory(inventory, directory_path, max_depth,
+                                                               file_patterns or [], skip=skip)}
             result = {
                 "directory": directory_path,
-                "structure": self._scan_directory(directory_path, max_depth, file_patterns or []),
-                "core_directories": self._identify_core_directories(directory_path),
-                "config_files": self._find_config_files(directory_path)
+                **structure,
+                "core_directories": self._identify_core_directories(inventory),
+                **self._sub_projects(discover_packages(
+                    (e.path for e in inventory.entries.values() if not e.is_dir), detector)),
+                "config_files": self._find_config_files(inventory, directory_path),
+                "scan_stats": inventory.scan_stats
             }
             
             return result
@@ -36,8 +116,226 @@ class FileSystemBrowser(BaseTool):
         except Exception as e:
             return {"error": f"文件系统浏览失败: {str(e)}"}
 
-    def _scan_directory(self, path: str, max_depth: int, file_patterns: List[str], current_depth: int = 0) -> Dict[str, Any]:
-        """递归扫描目录结构"""
+    def _run_git(self, repo_path: str, git_ref: str, max_depth: int, file_patterns: List[str],
+                 exclude_patterns: List[str] = None, token_budget: int = 0,
+                 include_generated: bool = False) -> Dict[str, Any]:
+        """基于 git 对象库（ls-tree）浏览指定 ref 的目录结构，路径均相对仓库根目录"""
+        reader = get_object_reader(repo_path, git_ref)
+        # 树中只有已跟踪文件，.gitignore 不再适用；仍应用默认排除和用户模式（如提交进仓库的 node_modules）
+        ignore = IgnoreRules(repo_path, exclude_patterns, respect_gitignore=False)
+        entries = [e for e in reader.list_tree() if not ignore.is_path_ignored(e["path"])]
+        paths = [e["path"] for e in entries]
+
+        top_level_dirs = sorted({p.split('/', 1)[0] for p in paths if '/' in p})
+        root_name = os.path.basename(repo_path.rstrip('/'))
+        detector = get_tree_detector(reader)
+        tree_entries = entries if include_generated else \
+            [e for e in entries if not detector.classify_path(e["path"])]
+        if token_budget:
+            structure = self._compact_structure(CompactTree.from_entries(root_name, tree_entries, file_patterns),
+                                                token_budget, max_depth)
+        else:
+            structure = {"structure": self._build_tree_from_entries(root_name, tree_entries, max_depth,
+                                                                    file_patterns)}
+        return {
+            "directory": repo_path,
+            "git_ref": git_ref,
+            "commit_sha": reader.commit_sha,
+            **structure,
+            "core_directories": [d for d in top_level_dirs
+                                 if any(pattern in d.lower() for pattern in self.CORE_PATTERNS)],
+            **self._sub_projects(discover_packages(paths, detector)),
+            "config_files": [p for p in paths if p.rsplit('/', 1)[-1] in self.CONFIG_PATTERNS]
+        }
+
+    # === 分页列表 ===
+
+    def _list_page(self, inventory: RepoInventory, directory_path: str, subpath: str, recursive: bool,
+                   file_patterns: List[str], extensions: List[str], roles: List[str], min_size: int, max_size: int,
+                   sort_by: str, page_size: int, cursor: str) -> Dict[str, Any]:
+        """基于键集（keyset）游标的分页列表：游标记录上一页最后一项的排序键，
+        排好序的结果按查询条件缓存在进程内，翻页时二分定位，不重新过滤和排序。
+        """
+        if sort_by not in self.SORT_KEYS:
+            return {"error": f"未知的排序方式: {sort_by}（可选 {'/'.join(self.SORT_KEYS)}）"}
+        subpath = subpath.strip('/')
+        if subpath and not inventory.is_dir(subpath):
+            return {"error": f"子目录不存在: {subpath}"}
+        page_size = max(1, min(page_size, self.MAX_PAGE_SIZE))
+
+        query = {"root": inventory.root, "subpath": subpath, "recursive": recursive,
+                 "patterns": sorted(file_patterns), "extensions": sorted(extensions), "roles": sorted(roles),
+                 "min_size": min_size, "max_size": max_size, "sort_by": sort_by}
+        signature = hashlib.sha1(json.dumps(query, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+        after = None
+        if cursor:
+            decoded = self._decode_cursor(cursor)
+            if decoded is None or decoded.get("q") != signature:
+                return {"error": "游标无效或与当前查询条件不匹配，请去掉 cursor 从第一页重新开始"}
+            after = tuple(decoded["k"])
+
+        keys, entries, churn = self._sorted_listing(inventory, directory_path, signature, subpath, recursive,
+                                                    file_patterns, extensions, roles, min_size, max_size, sort_by)
+        start = bisect.bisect_right(keys, after) if after is not None else 0
+        page = entries[start:start + page_size]
+        end = start + len(page)
+
+        items = []
+        for entry in page:
+            item = {
+                "name": entry.name,
+                "path": entry.path,
+                "type": "directory" if entry.is_dir else "file",
+            }
+            if not entry.is_dir:
+                item.update({"size": entry.size, "role": entry.role, "language": entry.language})
+                if churn is not None:
+                    commits, last_touch = churn.get(entry.path, (0, 0))
+                    item.update({"commits": commits, "last_modified": last_touch or None})
+            items.append(item)
+
+        return {
+            "directory": directory_path,
+            "subpath": subpath,
+            "sort_by": sort_by,
+            "total_matches": len(entries),
+            "offset": start,
+            "items": items,
+            "next_cursor": self._encode_cursor(signature, keys[end - 1]) if page and end < len(entries) else None
+        }
+
+    def _sorted_listing(self, inventory: RepoInventory, directory_path: str, signature: str, subpath: str,
+                        recursive: bool, file_patterns: List[str], extensions: List[str], roles: List[str],
+                        min_size: int, max_size: int, sort_by: str):
+        """返回 (排序键列表, 条目列表, 变更统计)；同一份清单上的相同查询直接复用"""
+        with _LISTING_LOCK:
+            cached = _LISTINGS.get(signature)
+            if cached is not None and cached[0] is inventory:
+                _LISTINGS.move_to_end(signature)
+                return cached[1:]
+
+        entries = [entry for entry in inventory.select(subpath, recursive, roles, extensions, min_size, max_size)
+                   if entry.is_dir or self._matches_patterns(entry.name, file_patterns)]
+        churn = self._file_churn(directory_path) if sort_by == "churn" else None
+        if sort_by == "size":
+            key = lambda entry: (-entry.size, entry.path)
+        elif sort_by == "churn":
+            key = lambda entry: (-churn.get(entry.path, (0, 0))[0], -churn.get(entry.path, (0, 0))[1], entry.path)
+        else:
+            key = lambda entry: (entry.path,)
+        decorated = sorted((key(entry), entry) for entry in entries)
+        listing = ([k for k, _ in decorated], [entry for _, entry in decorated], churn)
+
+        with _LISTING_LOCK:
+            _LISTINGS[signature] = (inventory,) + listing
+            while len(_LISTINGS) > _MAX_LISTINGS:
+                _LISTINGS.popitem(last=False)
+        return listing
+
+    @staticmethod
+    def _file_churn(directory_path: str) -> Dict[str, Tuple[int, int]]:
+        """各文件的 (提交次数, 最近修改时间)，路径相对 directory_path；按 HEAD 提交缓存"""
+        def git(*args: str) -> str:
+            return subprocess.run(['git', '-C', directory_path, *args], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+
+        try:
+            head = git('rev-parse', 'HEAD')
+            prefix = git('rev-parse', '--show-prefix')
+        except (subprocess.CalledProcessError, OSError):
+            raise RuntimeError(f"按 churn 排序需要 git 仓库: {directory_path}")
+
+        key = (os.path.abspath(directory_path), head)
+        with _LISTING_LOCK:
+            if key in _CHURN:
+                return _CHURN[key]
+        stats = GitHistoryAnalyzer().analyze(directory_path, 'HEAD', line_stats=False)
+        churn = {path[len(prefix):]: (record[0], record[4]) for path, record in stats.files.items()
+                 if path.startswith(prefix)}
+        with _LISTING_LOCK:
+            _CHURN.clear()
+            _CHURN[key] = churn
+        return churn
+
+    @staticmethod
+    def _encode_cursor(signature: str, key: Tuple) -> str:
+        payload = json.dumps({"q": signature, "k": list(key)}, separators=(',', ':'), ensure_ascii=False)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Optional[Dict[str, Any]]:
+        try:
+            decoded = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except (ValueError, UnicodeError):
+            return None
+        return decoded if isinstance(decoded, dict) and isinstance(decoded.get("k"), list) else None
+
+    @staticmethod
+    def _compact_structure(tree: CompactTree, token_budget: int, max_depth: int) -> Dict[str, Any]:
+        """compact 格式：structure 为折叠后的文本概要，structure_stats 为展开/折叠统计"""
+        summary = tree.summarize(token_budget, max_depth=max_depth)
+        return {"structure": summary.pop("text"), "structure_stats": summary}
+
+    def _build_tree_from_entries(self, root_name: str, entries: List[Dict[str, Any]], max_depth: int,
+                                 file_patterns: List[str]) -> Dict[str, Any]:
+        """由排序后的文件条目（path/size）构建与 _scan_directory 相同形状的目录树"""
+        root = {"name": root_name, "type": "directory", "path": "", "items": []}
+        directories = {"": root}
+
+        for entry in entries:
+            parts = entry["path"].split('/')
+            node = root
+            for depth, part in enumerate(parts[:-1], 1):
+                dir_path = '/'.join(parts[:depth])
+                if dir_path not in directories:
+                    if depth > max_depth:
+                        node["items"].append({"name": part, "type": "directory", "truncated": True})
+                        directories[dir_path] = None
+                    else:
+                        child = {"name": part, "type": "directory", "path": dir_path, "items": []}
+                        node["items"].append(child)
+                        directories[dir_path] = child
+                node = directories[dir_path]
+                if node is None:
+                    break
+
+            if node is not None and self._matches_patterns(parts[-1], file_patterns):
+                node["items"].append({
+                    "name": parts[-1],
+                    "type": "file",
+                    "path": entry["path"],
+                    "size": entry.get("size", 0)
+                })
+
+        return root
+
+    @staticmethod
+    def _generated_filter(inventory: RepoInventory, detector) -> Callable[[str, bool], bool]:
+        """(相对路径, 是否目录) -> 是否不列出。文件只看路径规则（不读取内容）；目录在其中的文件全部
+        被跳过时整棵不列出（如 vendor/），.gitattributes 取消标记而保留的文件所在目录仍然列出，空目录照常列出"""
+        skipped_files = set()
+        kept_dirs, skipped_dirs = set(), set()
+        for entry in inventory.entries.values():
+            if entry.is_dir:
+                continue
+            parts = entry.path.split('/')
+            ancestors = ('/'.join(parts[:depth]) for depth in range(1, len(parts)))
+            if detector.classify_path(entry.path):
+                skipped_files.add(entry.path)
+                skipped_dirs.update(ancestors)
+            else:
+                kept_dirs.update(ancestors)
+        skipped_dirs -= kept_dirs
+
+        def skip(rel_path: str, is_dir: bool) -> bool:
+            return rel_path in (skipped_dirs if is_dir else skipped_files)
+        return skip
+
+    def _scan_directory(self, inventory: RepoInventory, path: str, max_depth: int, file_patterns: List[str],
+                        rel_path: str = "", current_depth: int = 0,
+                        skip: Callable[[str, bool], bool] = None) -> Dict[str, Any]:
+        """基于清单递归构建目录结构；skip(相对路径, 是否目录) 为真的条目不列出"""
         if current_depth > max_depth:
             return {"name": os.path.basename(path), "type": "directory", "truncated": True}
         
@@ -48,28 +346,26 @@ class FileSystemBrowser(BaseTool):
             "items": []
         }
         
-        try:
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                
-                if os.path.isdir(item_path):
-                    # 递归扫描子目录
-                    sub_structure = self._scan_directory(item_path, max_depth, file_patterns, current_depth + 1)
-                    structure["items"].append(sub_structure)
-                else:
-                    # 检查文件是否匹配模式
-                    if self._matches_patterns(item, file_patterns):
-                        structure["items"].append({
-                            "name": item,
-                            "type": "file",
-                            "path": item_path,
-                            "size": os.path.getsize(item_path) if os.path.exists(item_path) else 0
-                        })
-                        
-        except PermissionError:
-            structure["items"].append({"name": "权限不足", "type": "error"})
-        except Exception as e:
-            structure["items"].append({"name": f"扫描错误: {str(e)}", "type": "error"})
+        for entry in inventory.list_dir(rel_path):
+            item_path = os.path.join(path, entry.name)
+            if skip is not None and skip(entry.path, entry.is_dir):
+                continue
+
+            if entry.is_dir:
+                # 递归构建子目录
+                sub_structure = self._scan_directory(inventory, item_path, max_depth, file_patterns,
+                                                     entry.path, current_depth + 1, skip)
+                structure["items"].append(sub_structure)
+            elif self._matches_patterns(entry.name, file_patterns):
+                structure["items"].append({
+                    "name": entry.name,
+                    "type": "file",
+                    "path": item_path,
+                    "size": entry.size
+                })
+
+        if rel_path in inventory.errors:
+            structure["items"].append({"name": inventory.errors[rel_path], "type": "error"})
             
         return structure
 
@@ -83,34 +379,28 @@ class FileSystemBrowser(BaseTool):
                 return True
         return False
 
-    def _identify_core_directories(self, base_path: str) -> List[str]:
+    def _identify_core_directories(self, inventory: RepoInventory) -> List[str]:
         """识别核心目录"""
-        core_patterns = ['src', 'lib', 'app', 'components', 'core', 'main', 'bin', 'scripts']
-        core_directories = []
-        
-        for item in os.listdir(base_path):
-            item_path = os.path.join(base_path, item)
-            if os.path.isdir(item_path):
-                if any(pattern in item.lower() for pattern in core_patterns):
-                    core_directories.append(item)
-                    
-        return core_directories
-
-    def _find_config_files(self, base_path: str) -> List[str]:
+        return [name for name in inventory.top_level_dirs()
+                if any(pattern in name.lower() for pattern in self.CORE_PATTERNS)]
+
+    def _sub_projects(self, packages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """按清单文件位置发现的子项目（monorepo），详细分析使用 Monorepo Analyzer"""
+        return {
+            "sub_projects": [{"path": p["path"] or ".", "manifests": p["manifests"]}
+                             for p in packages[:self.MAX_SUB_PROJECTS]],
+            "sub_project_count": len(packages)
+        }
+
+    def _find_config_files(self, inventory: RepoInventory, base_path: str) -> List[str]:
         """查找配置文件"""
-        config_patterns = [
-            'package.json', 'requirements.txt', 'pyproject.toml', 'setup.py',
-            'pom.xml', 'build.gradle', 'CMakeLists.txt', 'Dockerfile',
-            'docker-compose.yml', '.env', 'config.json', 'settings.py',
-            'webpack.config.js', 'tsconfig.json', 'go.mod', 'Cargo.toml',
-            'composer.json', 'Gemfile', 'Makefile'
-        ]
-        
-        found_configs = []
-        
-        for root, dirs, files in os.walk(base_path):
-            for file in files:
-                if file in config_patterns:
-                    found_configs.append(os.path.join(root, file))
-                    
-        return found_configs
\ No newline at end of file
+        return [os.path.join(base_path, *entry.path.split('/'))
+                for entry in inventory.find_by_name(self.CONFIG_PATTERNS) if not entry.is_dir]
+
+
+# 分页列表的排序结果缓存（查询签名 -> (清单, 排序键, 条目, 变更统计)），按最近使用淘汰
+_LISTINGS: "OrderedDict[str, Tuple]" = OrderedDict()
+_MAX_LISTINGS = 16
+# 最近一次计算的文件变更统计，键为 (目录, HEAD 提交)
+_CHURN: Dict[Tuple[str, str], Dict[str, Tuple[int, int]]] = {}
+_LISTING_LOCK = threading.Lock()
@@ -0,0 +1,286 @@
+# GeneratedFileDetector.py
+from typing import Dict, Any, List, Optional, Tuple, ClassVar
+from collections import Counter, OrderedDict
+import threading
+import math
+import re
+import os
+
+from .IgnoreRules import IgnoreRules
+
+
+class GeneratedFileDetector:
+    """识别生成的、第三方（vendored）和压缩（minified）文件，分析工具默认跳过它们。
+
+    判断顺序（越靠前越优先）：
+    1. .gitattributes 中的 linguist-generated / linguist-vendored 标记（显式设为 false 时强制保留）；
+    2. 路径规则（vendor/、third_party/、*_pb2.py、*.pb.go、*.min.js 等），不需要读取文件；
+    3. 文件开头的内容：生成器标记行、平均/最大行长度和字节熵（只看前 HEAD_BYTES 字节）。
+
+    返回值为原因（"vendored" / "generated" / "minified"）或 None。
+    """
+
+    HEAD_BYTES: ClassVar[int] = 8192
+    # 生成器标记只在文件开头若干行内查找，避免误判引用这些字符串的普通代码
+    MARKER_LINES: ClassVar[int] = 12
+
+    # 常见前端库的发行文件名：库名后必须带版本号（jquery-3.6.0.js）或发行形式后缀（vue.global.prod.js、
+    # jquery.min.js），否则只在 lib/static 这类存放第三方脚本的目录中才算；vue.config.js、bootstrap.js
+    # （Laravel 入口）、moment-utils.js 这类项目自己的文件不受影响
+    _LIBRARY: ClassVar[str] = r'(?:jquery|bootstrap|angular|react(?:-dom)?|vue|d3|lodash|moment)'
+    _LIBRARY_DIST: ClassVar[str] = (r'(?:[-.]v?\d+(?:\.\d+)*(?:[-.][\w-]+)*'
+                                    r'|(?:\.(?:min|slim|umd|esm|cjs|production|development|global|prod|runtime|bundle))+)')
+    VENDORED_PATTERNS: ClassVar[List[str]] = [
+        r'(?:^|/)(?:node_modules|bower_components|jspm_packages|vendor|vendors|third[-_]?party|'
+        r'Pods|Carthage|Godeps/_workspace|site-packages|\.yarn)/',
+        rf'(?:^|/){_LIBRARY}{_LIBRARY_DIST}\.js$',
+        rf'(?:^|/)(?:libs?|static(?:/js|/libs?)?)/{_LIBRARY}\.js$',
+    ]
+    GENERATED_PATTERNS: ClassVar[List[str]] = [
+        r'_pb2(?:_grpc)?\.pyi?$', r'\.pb(?:\.gw|\.validate)?\.go$', r'_grpc\.pb\.go$', r'\.pb\.(?:cc|h|swift)$',
+        r'_pb\.(?:js|d\.ts)$', r'_grpc_pb\.(?:js|d\.ts)$', r'(?:^|/)zz_generated[^/]*\.go$', r'_generated\.go$',
+        r'\.(?:g|freezed|gr|mocks)\.dart$', r'\.designer\.cs$', r'\.generated\.[^/]+$', r'(?:^|/)__generated__/',
+        r'\.(?:js|css)\.map$', r'(?:^|/)(?:bundle|vendor)(?:\.[\w-]+)?\.js$', r'\.bundle\.js$', r'\.chunk\.js$',
+    ]
+    MINIFIED_PATTERNS: ClassVar[List[str]] = [r'[.-]min\.(?:js|css|mjs)$']
+
+    HEADER_MARKERS: ClassVar[List[bytes]] = [
+        b'do not edit', b'@generated', b'code generated by', b'autogenerated', b'auto-generated',
+        b'automatically generated', b'generated by the protocol buffer compiler', b'this file is generated',
+        b'generated by the thrift compiler', b'<auto-generated'
+    ]
+    # 行长统计（压缩文件判断）不适用的文本类语言：段落可能整行书写
+    PROSE_LANGUAGES: ClassVar[frozenset] = frozenset({'Markdown', 'reStructuredText', 'Text'})
+    MINIFIED_AVG_LINE: ClassVar[int] = 110
+    MINIFIED_MAX_LINE: ClassVar[int] = 500
+    # base64、内嵌数据等高熵内容（bit/字节）；普通源码一般在 4.5~5.2 之间
+    ENCODED_ENTROPY: ClassVar[float] = 5.8
+
+    ATTRIBUTES_FILE: ClassVar[str] = ".gitattributes"
+    LINGUIST_ATTRIBUTES: ClassVar[Dict[str, str]] = {
+        'linguist-generated': 'generated', 'linguist-vendored': 'vendored'
+    }
+
+    _vendored = re.compile('|'.join(VENDORED_PATTERNS))
+    _generated = re.compile('|'.join(GENERATED_PATTERNS))
+    _minified = re.compile('|'.join(MINIFIED_PATTERNS))
+
+    def __init__(self, attributes: Dict[str, str] = None):
+        """attributes：{目录相对路径: 该目录下 .gitattributes 的内容}，根目录为 ""（.git/info/attributes 也归入根目录）"""
+        self._rules: List[Tuple[str, 're.Pattern', str, bool]] = []
+        for base in sorted(attributes or {}, key=lambda b: (b.count('/') + bool(b), b)):
+            self._rules.extend(self._parse_attributes(base, attributes[base]))
+        self._file_cache: Dict[Tuple[str, int, int], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    # === 构造 ===
+
+    @classmethod
+    def for_directory(cls, root: str) -> 'GeneratedFileDetector':
+        """工作目录：读取清单中所有 .gitattributes 以及 .git/info/attributes"""
+        from .RepoInventory import get_inventory
+        root = os.path.abspath(root)
+        attributes = {}
+        for entry in get_inventory(root).entries.values():
+            if entry.name == cls.ATTRIBUTES_FILE and not entry.is_dir:
+                base = entry.path.rsplit('/', 1)[0] if '/' in entry.path else ""
+                attributes[base] = cls._read_text(os.path.join(root, *entry.path.split('/')))
+        info = os.path.join(os.path.dirname(IgnoreRules(root)._info_exclude_path()), 'attributes')
+        if os.path.isfile(info):
+            attributes[""] = attributes.get("", "") + "\n" + cls._read_text(info)
+        return cls(attributes)
+
+    @classmethod
+    def for_tree(cls, reader) -> 'GeneratedFileDetector':
+        """git 对象：读取该提交中的所有 .gitattributes"""
+        attributes = {}
+        for entry in reader.list_tree():
+            path = entry["path"]
+            if path.rsplit('/', 1)[-1] == cls.ATTRIBUTES_FILE:
+                base = path.rsplit('/', 1)[0] if '/' in path else ""
+                attributes[base] = reader.read_blob(entry["sha"]).decode('utf-8', errors='ignore')
+        return cls(attributes)
+
+    @staticmethod
+    def _read_text(path: str) -> str:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    @classmethod
+    def _parse_attributes(cls, base: str, text: str) -> List[Tuple[str, 're.Pattern', str, bool]]:
+        """解析 linguist 相关属性，返回 (目录, 模式正则, 原因, 是否设置) 列表"""
+        rules = []
+        for line in text.splitlines():
+            parts = line.split()
+            if not parts or parts[0].startswith('#') or len(parts) < 2:
+                continue
+            parsed = IgnoreRules.parse_pattern(parts[0])
+            # gitattributes 不允许取反模式；以 '/' 结尾的目录模式不匹配任何文件（目录内容需写作 dir/**）
+            if parsed is None or parsed[1] or parsed[2]:
+                continue
+            regex = re.compile(parsed[0])
+            for attribute in parts[1:]:
+                name, _, value = attribute.partition('=')
+                enabled = True
+                if name.startswith(('-', '!')):
+                    name, enabled = name[1:], False
+                elif value:
+                    enabled = value.lower() not in ('false', '0', 'no')
+                if name in cls.LINGUIST_ATTRIBUTES:
+                    rules.append((base, regex, cls.LINGUIST_ATTRIBUTES[name], enabled))
+        return rules
+
+    # === 判断 ===
+
+    def attributes(self, path: str) -> Dict[str, bool]:
+        """.gitattributes 对该路径的设置：{"generated"/"vendored": 是否标记}，未出现的属性不在结果中"""
+        state: Dict[str, bool] = {}
+        for base, regex, reason, enabled in self._rules:
+            if base and not path.startswith(base + '/'):
+                continue
+            relative = path[len(base) + 1:] if base else path
+            # 与 git 一致：模式只与完整路径匹配，匹配到目录不会作用于目录中的文件
+            if regex.fullmatch(relative):
+                state[reason] = enabled
+        return state
+
+    def classify_path(self, path: str) -> Optional[str]:
+        """只看路径（不读取文件）；path 为仓库内相对路径"""
+        reason, _ = self._classify_path(path.strip('/'))
+        return reason
+
+    def _classify_path(self, path: str) -> Tuple[Optional[str], bool]:
+        """返回 (原因, 是否还需要检查内容)；.gitattributes 显式取消 generated 时不再做内容判断"""
+        state = self.attributes(path) if self._rules else {}
+        for reason in ("generated", "vendored"):
+            if state.get(reason):
+                return reason, False
+        if state.get("vendored") is not False and self._vendored.search(path):
+            return "vendored", False
+        if state.get("generated") is False:
+            return None, False
+        if self._generated.search(path):
+            return "generated", False
+        if self._minified.search(path):
+            return "minified", False
+        return None, True
+
+    def classify(self, path: str, head: Optional[bytes] = None, language: str = "") -> Optional[str]:
+        """路径规则 + 文件开头内容（head 为空时只看路径）"""
+        reason, check_content = self._classify_path(path.strip('/'))
+        if not check_content or head is None:
+            return reason
+        return self.classify_content(head, language)
+
+    def resolve(self, path: str, content_reason: Optional[str]) -> Optional[str]:
+        """结合路径规则和已缓存的内容判断结果（例如按 blob SHA 缓存的 classify_content 结论）"""
+        reason, check_content = self._classify_path(path.strip('/'))
+        return content_reason if check_content else reason
+
+    def classify_file(self, path: str, abs_path: str, language: str = "") -> Optional[str]:
+        """工作目录中的文件：按 (路径, 大小, mtime) 缓存结论，内容只读取开头 HEAD_BYTES 字节"""
+        path = path.strip('/')
+        reason, check_content = self._classify_path(path)
+        if not check_content:
+            return reason
+        try:
+            stat = os.stat(abs_path)
+        except OSError:
+            return None
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key in self._file_cache:
+                return self._file_cache[key]
+        try:
+            with open(abs_path, 'rb') as f:
+                head = f.read(self.HEAD_BYTES)
+        except OSError:
+            return None
+        reason = self.classify_content(head, language)
+        with self._lock:
+            self._file_cache[key] = reason
+        return reason
+
+    @classmethod
+    def classify_content(cls, head: bytes, language: str = "") -> Optional[str]:
+        """根据文件开头的字节判断：生成器标记行、超长行（压缩代码）或高熵内容（编码数据）"""
+        if not head or b'\0' in head:
+            return None
+        lines = head.split(b'\n')
+        top = b'\n'.join(lines[:cls.MARKER_LINES]).lower()
+        if any(marker in top for marker in cls.HEADER_MARKERS):
+            return "generated"
+        if language in cls.PROSE_LANGUAGES:
+            return None
+
+        # 读满 HEAD_BYTES 时最后一行被截断，不参与统计
+        complete = lines[:-1] if len(head) >= cls.HEAD_BYTES and len(lines) > 1 else lines
+        lengths = [len(line) for line in complete if line.strip()]
+        if not lengths:
+            lengths = [len(head)]
+        average = sum(lengths) / len(lengths)
+        longest = max(lengths)
+        if average > cls.MINIFIED_AVG_LINE and longest > cls.MINIFIED_MAX_LINE:
+            return "minified"
+        if longest > cls.MINIFIED_MAX_LINE and cls.entropy(head) >= cls.ENCODED_ENTROPY:
+            return "generated"
+        return None
+
+    @staticmethod
+    def entropy(data: bytes) -> float:
+        """字节的香农熵（bit/字节）"""
+        if not data:
+            return 0.0
+        total = len(data)
+        return -sum(count / total * math.log2(count / total) for count in Counter(data).values())
+
+
+# === 共享实例（按工作目录或提交缓存，与 GitObjectReader 的读取器一样按最近使用保留 MAX_DETECTORS 个） ===
+
+_DETECTORS: "OrderedDict[Tuple[str, Tuple], GeneratedFileDetector]" = OrderedDict()
+_TREE_DETECTORS: "OrderedDict[Tuple[str, str], GeneratedFileDetector]" = OrderedDict()
+_DETECTORS_LOCK = threading.Lock()
+MAX_DETECTORS = 16
+
+
+def get_generated_detector(root: str) -> GeneratedFileDetector:
+    """工作目录的共享检测器；.gitattributes 变化（大小/mtime）后重新构建"""
+    from .RepoInventory import get_inventory
+    root = os.path.abspath(root)
+    signature = tuple(sorted(
+        (entry.path, entry.size, entry.mtime_ns) for entry in get_inventory(root).entries.values()
+        if entry.name == GeneratedFileDetector.ATTRIBUTES_FILE
+    ))
+    key = (root, signature)
+    with _DETECTORS_LOCK:
+        detector = _DETECTORS.get(key)
+        if detector is not None:
+            _DETECTORS.move_to_end(key)
+    if detector is None:
+        detector = GeneratedFileDetector.for_directory(root)
+        with _DETECTORS_LOCK:
+            for stale in [k for k in _DETECTORS if k[0] == root]:
+                del _DETECTORS[stale]
+            _DETECTORS[key] = detector
+            while len(_DETECTORS) > MAX_DETECTORS:
+                _DETECTORS.popitem(last=False)
+    return detector
+
+
+def get_tree_detector(reader) -> GeneratedFileDetector:
+    """某个提交的共享检测器（提交内容不可变，按提交 SHA 缓存）"""
+    key = (reader.repo_path, reader.commit_sha)
+    with _DETECTORS_LOCK:
+        detector = _TREE_DETECTORS.get(key)
+        if detector is not None:
+            _TREE_DETECTORS.move_to_end(key)
+    if detector is None:
+        detector = GeneratedFileDetector.for_tree(reader)
+        with _DETECTORS_LOCK:
+            _TREE_DETECTORS[key] = detector
+            while len(_TREE_DETECTORS) > MAX_DETECTORS:
+                _TREE_DETECTORS.popitem(last=False)
+    return detector
@@ -0,0 +1,212 @@
+# GitArchiveFetcher.py
+from crewai.tools import BaseTool
+from typing import Type, Dict, Any, List, Optional, Tuple, ClassVar
+from urllib.parse import urlparse
+from pydantic import BaseModel, Field
+from datetime import datetime
+import requests
+import tarfile
+import shutil
+import json
+import os
+
+from .RepoMirrorCache import RepoMirrorCache
+
+
+class ArchiveFetchInput(BaseModel):
+    """Input schema for GitArchiveFetcher."""
+    repo_url: str = Field(..., description="GitHub repository URL (or a direct .tar.gz archive URL)")
+    target_dir: str = Field(..., description="Local base directory to extract into (e.g., './cloned_repos')")
+    ref: str = Field(default="", description="Branch, tag or commit to download (defaults to the default branch)")
+    archive_base_url: str = Field(
+        default="",
+        description="Archive server base URL; defaults to $GITSEEK_ARCHIVE_BASE_URL or https://codeload.github.com"
+    )
+    skip_vendored: bool = Field(default=True, description="Skip vendored directories and binary files while extracting")
+    timeout: int = Field(default=600, description="Download timeout in seconds")
+
+
+class _CountingReader:
+    """包装 HTTP 响应流，统计已下载的字节数；传入限速器时按读取量扣减带宽配额"""
+
+    def __init__(self, raw, limiter=None):
+        self.raw = raw
+        self.limiter = limiter
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        if self.limiter is not None:
+            self.limiter.consume(len(data))
+        return data
+
+
+class GitArchiveFetcher(BaseTool):
+    name: str = "Repository Archive Fetcher"
+    description: str = (
+        "Downloads a repository's tarball archive and extracts it while it streams in, "
+        "skipping vendored directories and binary files. Much faster than git clone when history is not needed"
+    )
+    args_schema: Type[BaseModel] = ArchiveFetchInput
+
+    DEFAULT_ARCHIVE_BASE_URL: ClassVar[str] = "https://codeload.github.com"
+    ARCHIVE_SUFFIXES: ClassVar[Tuple[str, ...]] = ('.tar.gz', '.tgz')
+    # 归档地址中紧跟 owner/repo 的路径段（第 3 段）：codeload（/owner/repo/tar.gz/ref）、
+    # github.com（/owner/repo/archive/...、/owner/repo/tarball/ref）；API 地址前面多一段 /repos
+    ARCHIVE_PATH_SEGMENTS: ClassVar[Tuple[str, ...]] = ('tar.gz', 'legacy.tar.gz', 'archive', 'tarball')
+    MARKER_FILE: ClassVar[str] = ".gitseek-archive.json"
+
+    VENDORED_DIRS: ClassVar[List[str]] = [
+        'node_modules', 'vendor', 'vendors', 'third_party', 'thirdparty', '3rdparty',
+        'bower_components', 'Pods', 'Carthage', '.git', '.venv', 'venv', 'site-packages'
+    ]
+
+    BINARY_EXTENSIONS: ClassVar[List[str]] = [
+        '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.tiff', '.psd',
+        '.mp3', '.mp4', '.wav', '.avi', '.mov', '.flac', '.ogg', '.webm',
+        '.zip', '.tar', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jar', '.war',
+        '.exe', '.dll', '.so', '.dylib', '.a', '.o', '.obj', '.class', '.pyc', '.whl',
+        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+        '.ttf', '.otf', '.woff', '.woff2', '.eot', '.bin', '.dat', '.db', '.sqlite',
+        '.npy', '.npz', '.pkl', '.pt', '.pth', '.onnx', '.h5', '.ckpt', '.safetensors'
+    ]
+
+    def _run(self, repo_url: str, target_dir: str, ref: str = "", archive_base_url: str = "",
+             skip_vendored: bool = True, timeout: int = 600) -> str:
+        return self.fetch(repo_url, target_dir, ref, archive_base_url, skip_vendored, timeout)
+
+    def fetch(self, repo_url: str, target_dir: str, ref: str = "", archive_base_url: str = "",
+              skip_vendored: bool = True, timeout: int = 600, limiter=None) -> str:
+        """下载并解压归档；limiter 为多个下载共享的带宽限速器（见 RepoFetchScheduler）"""
+        try:
+            final_path = self.checkout_path(target_dir, repo_url)
+
+            # 已有 git 克隆的目录不覆盖；之前解压的归档可以直接替换
+            if os.path.isdir(final_path) and os.listdir(final_path) \
+                    and not os.path.exists(os.path.join(final_path, self.MARKER_FILE)):
+                return f"⚠️ Repository already present: {final_path} is not an extracted archive. Skipping download."
+
+            archive_url = self.build_archive_url(repo_url, ref, archive_base_url)
+            stats = self.fetch_and_extract(archive_url, final_path, skip_vendored, timeout, limiter)
+
+            return (
+                f"✅ Successfully downloaded and extracted {archive_url} to {final_path}\n"
+                f"   strategy: archive\n"
+                f"   files_extracted: {stats['files_extracted']}, files_skipped: {stats['files_skipped']}\n"
+                f"   fetched_bytes: {stats['fetched_bytes']} ({stats['fetched_bytes'] / 1024 / 1024:.1f} MB)"
+            )
+
+        except requests.exceptions.Timeout:
+            return f"❌ Archive download timed out after {timeout} seconds"
+        except Exception as e:
+            return f"❌ Archive fetch failed: {str(e)}"
+
+    @classmethod
+    def _archive_repo(cls, url: str) -> Optional[Tuple[str, str]]:
+        """按路径段解析 GitHub 风格的归档地址，返回 (owner, repo)；不是归档地址时返回 None。
+
+        只认 /owner/repo/<tar.gz|legacy.tar.gz|archive|tarball>/<ref...>（codeload 主机上的任何
+        /owner/repo/... 也算）和 API 的 /repos/owner/repo/tarball[/ref]，因此 owner 或 repo 恰好
+        叫 archive、tarball 的普通仓库地址（如 https://github.com/archive/foo）不会被误判。
+        """
+        parsed = urlparse(url)
+        if not parsed.scheme or not parsed.netloc:
+            return None
+        segments = [segment for segment in parsed.path.split('/') if segment]
+        if len(segments) >= 4 and segments[0] == 'repos' and segments[3] == 'tarball':
+            return segments[1], segments[2]
+        if len(segments) >= 4 and segments[2] in cls.ARCHIVE_PATH_SEGMENTS:
+            return segments[0], segments[1]
+        if parsed.hostname == 'codeload.github.com' and len(segments) >= 3:
+            return segments[0], segments[1]
+        return None
+
+    @classmethod
+    def is_archive_url(cls, url: str) -> bool:
+        """是否为直接的归档下载地址（.tar.gz 文件、codeload 或 GitHub archive/tarball 地址）"""
+        return urlparse(url).path.endswith(cls.ARCHIVE_SUFFIXES) or cls._archive_repo(url) is not None
+
+    @classmethod
+    def parse_repo_url(cls, url: str) -> Tuple[str, str]:
+        """仓库或归档地址中的 (owner, repo)：归档地址取 ref 之前的两段，其余 .tar.gz 地址取去掉后缀的文件名"""
+        archive_repo = cls._archive_repo(url)
+        if archive_repo is not None:
+            return archive_repo
+        owner, repo = RepoMirrorCache.parse_repo_url(url)
+        for suffix in cls.ARCHIVE_SUFFIXES + ('.tar',):
+            if repo.endswith(suffix):
+                return owner, repo[:-len(suffix)]
+        return owner, repo
+
+    @classmethod
+    def checkout_path(cls, target_dir: str, repo_url: str) -> str:
+        """检出目录：<target_dir>/<owner>/<repo>（不同所有者的同名仓库互不覆盖，与镜像 <owner>/<repo>.git 对应）"""
+        owner, repo = cls.parse_repo_url(repo_url)
+        return os.path.join(target_dir, owner, repo)
+
+    def build_archive_url(self, repo_url: str, ref: str = "", archive_base_url: str = "") -> str:
+        """构造归档下载地址；直接给出归档地址时原样使用"""
+        if self.is_archive_url(repo_url):
+            return repo_url
+        owner, repo = RepoMirrorCache.parse_repo_url(repo_url)
+        base_url = (archive_base_url or os.environ.get('GITSEEK_ARCHIVE_BASE_URL')
+                    or self.DEFAULT_ARCHIVE_BASE_URL).rstrip('/')
+        return f"{base_url}/{owner}/{repo}/tar.gz/{ref or 'HEAD'}"
+
+    def fetch_and_extract(self, archive_url: str, final_path: str, skip_vendored: bool = True,
+                          timeout: int = 600, limiter=None) -> Dict[str, Any]:
+        """边下载边解压（tarfile 流模式），先解压到临时目录，完成后再替换目标目录"""
+        partial_path = final_path + '.partial'
+        shutil.rmtree(partial_path, ignore_errors=True)
+        os.makedirs(partial_path)
+
+        files_extracted = 0
+        files_skipped = 0
+        with requests.get(archive_url, stream=True, timeout=timeout,
+                          headers={"User-Agent": "GitSeek-Analyzer"}) as response:
+            response.raise_for_status()
+            stream = _CountingReader(response.raw, limiter)
+            with tarfile.open(fileobj=stream, mode='r|gz') as archive:
+                for member in archive:
+                    # GitHub 归档的顶层目录为 <repo>-<sha>/，解压时去掉
+                    relative = member.name.split('/', 1)[1] if '/' in member.name else ''
+                    if not relative or not member.isfile():
+                        continue
+                    if not self._is_safe_path(relative) or (skip_vendored and self.should_skip(relative)):
+                        files_skipped += 1
+                        continue
+
+                    destination = os.path.join(partial_path, relative)
+                    os.makedirs(os.path.dirname(destination), exist_ok=True)
+                    source = archive.extractfile(member)
+                    with open(destination, 'wb') as f:
+                        shutil.copyfileobj(source, f)
+                    if member.mode & 0o111:
+                        os.chmod(destination, 0o755)
+                    files_extracted += 1
+
+        stats = {
+            "archive_url": archive_url,
+            "files_extracted": files_extracted,
+            "files_skipped": files_skipped,
+            "fetched_bytes": stream.bytes_read,
+            "fetched_at": datetime.now().isoformat()
+        }
+        with open(os.path.join(partial_path, self.MARKER_FILE), 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+
+        shutil.rmtree(final_path, ignore_errors=True)
+        os.replace(partial_path, final_path)
+        return stats
+
+    def should_skip(self, relative_path: str) -> bool:
+        """判断路径是否属于第三方依赖目录或二进制文件"""
+        parts = relative_path.split('/')
+        if any(part in self.VENDORED_DIRS for part in parts[:-1]):
+            return True
+        return os.path.splitext(parts[-1])[1].lower() in self.BINARY_EXTENSIONS
+
+    def _is_safe_path(self, relative_path: str) -> bool:
+        """拒绝绝对路径和包含 .. 的路径，防止写出目标目录"""
+        return not relative_path.startswith('/') and '..' not in relative_path.split('/')
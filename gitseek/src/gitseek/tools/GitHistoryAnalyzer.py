@@ -0,0 +1,275 @@
+# GitHistoryAnalyzer.py
+from crewai.tools import BaseTool
+from typing import Type, Dict, Any, List, Optional, ClassVar, Iterator, Tuple
+from pydantic import BaseModel, Field
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+import subprocess
+import threading
+import os
+
+
+class GitHistoryInput(BaseModel):
+    """Input schema for GitHistoryAnalyzer."""
+    repo_path: str = Field(..., description="本地仓库路径（克隆目录、worktree 或裸镜像）")
+    ref: str = Field(default="HEAD", description="要分析的分支/标签/提交")
+    top_n: int = Field(default=20, description="返回的高频变更文件数量")
+    weeks: int = Field(default=52, description="返回的周活跃度序列长度（最近 N 周）")
+
+
+class HistoryStats:
+    """单次流式解析 git log 得到的聚合结果。
+
+    只保留按文件、按作者、按周的聚合值，不保存逐提交数据，
+    内存随文件数和作者数增长，而不随历史长度增长。
+    """
+
+    def __init__(self):
+        self.total_commits = 0
+        self.first_commit: Optional[int] = None
+        self.last_commit: Optional[int] = None
+        self.longest_gap_seconds = 0
+        self.line_stats = True
+        # path -> [commits, added, deleted, first_touch, last_touch]
+        self.files: Dict[str, List[int]] = {}
+        # identity -> [commits, added, deleted, first, last, name, email]
+        self.authors: Dict[str, List[Any]] = {}
+        # 周一日期 -> [commits, added, deleted]
+        self.weekly: Dict[str, List[int]] = {}
+        self.current_week: List[int] = [0, 0, 0]
+        self._previous_timestamp: Optional[int] = None
+
+    def add_commit(self, timestamp: int, name: str, email: str) -> List[Any]:
+        """记录一个提交，返回该提交作者的聚合记录"""
+        self.total_commits += 1
+        if self.first_commit is None or timestamp < self.first_commit:
+            self.first_commit = timestamp
+        if self.last_commit is None or timestamp > self.last_commit:
+            self.last_commit = timestamp
+        if self._previous_timestamp is not None:
+            self.longest_gap_seconds = max(self.longest_gap_seconds, abs(self._previous_timestamp - timestamp))
+        self._previous_timestamp = timestamp
+
+        self.current_week = self.weekly.setdefault(self.week_start(timestamp), [0, 0, 0])
+        self.current_week[0] += 1
+
+        identity = email.lower() or name.lower()
+        author = self.authors.get(identity)
+        if author is None:
+            author = self.authors[identity] = [0, 0, 0, timestamp, timestamp, name, email]
+        author[0] += 1
+        author[3] = min(author[3], timestamp)
+        author[4] = max(author[4], timestamp)
+        return author
+
+    def add_file_change(self, path: str, added: int, deleted: int, timestamp: int, author: List[Any]) -> None:
+        """记录提交中的一个文件变更"""
+        record = self.files.get(path)
+        if record is None:
+            record = self.files[path] = [0, 0, 0, timestamp, timestamp]
+        record[0] += 1
+        record[1] += added
+        record[2] += deleted
+        record[3] = min(record[3], timestamp)
+        record[4] = max(record[4], timestamp)
+
+        author[1] += added
+        author[2] += deleted
+        self.current_week[1] += added
+        self.current_week[2] += deleted
+
+    @staticmethod
+    def week_start(timestamp: int) -> str:
+        day = datetime.fromtimestamp(timestamp, tz=timezone.utc).date()
+        return (day - timedelta(days=day.weekday())).isoformat()
+
+
+class GitHistoryAnalyzer(BaseTool):
+    name: str = "Git History Analyzer"
+    description: str = """基于本地仓库的完整提交历史进行活跃度分析（无需 GitHub API）。
+    单次流式解析 git log --numstat，计算文件变更热度、提交节奏、周活跃度序列、作者数量及首次/最近修改时间。"""
+    args_schema: Type[BaseModel] = GitHistoryInput
+
+    # 提交头使用不可见分隔符，避免与文件名冲突
+    COMMIT_MARKER: ClassVar[str] = "\x1e"
+    FIELD_SEPARATOR: ClassVar[str] = "\x1f"
+    READ_CHUNK: ClassVar[int] = 1 << 16
+
+    def _run(self, repo_path: str, ref: str = "HEAD", top_n: int = 20, weeks: int = 52) -> Dict[str, Any]:
+        try:
+            if not os.path.isdir(repo_path):
+                return {"success": False, "error": f"仓库目录不存在: {repo_path}"}
+
+            stats = get_history(repo_path, ref)
+            if stats.total_commits == 0:
+                return {"success": False, "error": f"未找到提交记录: {repo_path} ({ref})"}
+
+            return {"success": True, "repo_path": repo_path, "ref": ref, **self.summarize(stats, top_n, weeks)}
+
+        except Exception as e:
+            return {"success": False, "error": f"提交历史分析失败: {str(e)}"}
+
+    def analyze(self, repo_path: str, ref: str = "HEAD", line_stats: Optional[bool] = None) -> HistoryStats:
+        """执行一次 git log 并流式解析输出。
+
+        使用 -z 输出：路径不做 C 风格转义（非 ASCII、含空格或引号的文件名与 ls-tree 给出的路径一致），
+        每条记录以 NUL 结尾。
+        """
+        stats = HistoryStats()
+        # blobless 克隆下 --numstat 会逐个拉取缺失的 blob，此时只统计文件触达次数
+        stats.line_stats = (not self._is_partial_clone(repo_path)) if line_stats is None else line_stats
+
+        command = [
+            'git', '-C', repo_path, 'log', ref, '-z', '--use-mailmap', '--no-renames', '--date-order',
+            f'--format={self.COMMIT_MARKER}%at{self.FIELD_SEPARATOR}%aN{self.FIELD_SEPARATOR}%aE',
+            '--numstat' if stats.line_stats else '--name-only'
+        ]
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, encoding='utf-8', errors='replace', bufsize=1 << 16)
+        try:
+            self._consume(self._records(process.stdout), stats)
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read()
+            process.stderr.close()
+            process.wait()
+        if process.returncode not in (0, None) and stats.total_commits == 0:
+            raise RuntimeError(stderr.strip() or "git log 执行失败")
+        return stats
+
+    def _records(self, stream) -> Iterator[str]:
+        """按 NUL 切分 git log -z 的输出"""
+        pending = ''
+        while True:
+            chunk = stream.read(self.READ_CHUNK)
+            if not chunk:
+                break
+            records = (pending + chunk).split('\0')
+            pending = records.pop()
+            yield from records
+        if pending:
+            yield pending
+
+    def _consume(self, records, stats: HistoryStats) -> None:
+        """逐条解析 git log -z 输出：提交头之后的第一条文件记录前有一个换行"""
+        timestamp = 0
+        author = None
+        for line in records:
+            if line.startswith('\n'):
+                line = line[1:]
+            if not line:
+                continue
+            if line.startswith(self.COMMIT_MARKER):
+                fields = line[1:].split(self.FIELD_SEPARATOR)
+                if len(fields) < 3 or not fields[0].isdigit():
+                    continue
+                timestamp = int(fields[0])
+                author = stats.add_commit(timestamp, fields[1], fields[2])
+                continue
+            if author is None:
+                continue
+
+            if stats.line_stats:
+                parts = line.split('\t', 2)
+                if len(parts) != 3:
+                    continue
+                # 二进制文件的增删行数为 '-'
+                added = int(parts[0]) if parts[0].isdigit() else 0
+                deleted = int(parts[1]) if parts[1].isdigit() else 0
+                stats.add_file_change(parts[2], added, deleted, timestamp, author)
+            else:
+                stats.add_file_change(line, 0, 0, timestamp, author)
+
+    def summarize(self, stats: HistoryStats, top_n: int = 20, weeks: int = 52) -> Dict[str, Any]:
+        """将聚合结果整理为报告可用的结构"""
+        span_days = max((stats.last_commit - stats.first_commit) / 86400, 0)
+        span_weeks = max(span_days / 7, 1)
+
+        churn = sorted(stats.files.items(), key=lambda item: (item[1][1] + item[1][2], item[1][0]), reverse=True)
+        if not stats.line_stats:
+            churn = sorted(stats.files.items(), key=lambda item: item[1][0], reverse=True)
+
+        return {
+            "line_stats": stats.line_stats,
+            "total_commits": stats.total_commits,
+            "total_authors": len(stats.authors),
+            "files_touched": len(stats.files),
+            "first_commit": self._isoformat(stats.first_commit),
+            "last_commit": self._isoformat(stats.last_commit),
+            "commit_cadence": {
+                "history_days": round(span_days, 1),
+                "commits_per_week": round(stats.total_commits / span_weeks, 2),
+                "average_days_between_commits": round(span_days / max(stats.total_commits - 1, 1), 2),
+                "longest_gap_days": round(stats.longest_gap_seconds / 86400, 1),
+                "days_since_last_commit": round(
+                    (datetime.now(timezone.utc).timestamp() - stats.last_commit) / 86400, 1)
+            },
+            "top_churn_files": [
+                {
+                    "path": path,
+                    "commits": record[0],
+                    "lines_added": record[1],
+                    "lines_deleted": record[2],
+                    "churn": record[1] + record[2],
+                    "first_touch": self._isoformat(record[3]),
+                    "last_touch": self._isoformat(record[4])
+                }
+                for path, record in churn[:top_n]
+            ],
+            "weekly_activity": self._weekly_series(stats, weeks)
+        }
+
+    def _weekly_series(self, stats: HistoryStats, weeks: int) -> List[Dict[str, Any]]:
+        """以最后一次提交所在周为终点的连续周序列（无提交的周补 0）"""
+        end = datetime.fromisoformat(HistoryStats.week_start(stats.last_commit))
+        series = []
+        for offset in range(weeks - 1, -1, -1):
+            week = (end - timedelta(weeks=offset)).date().isoformat()
+            commits, added, deleted = stats.weekly.get(week, [0, 0, 0])
+            series.append({"week": week, "commits": commits, "lines_added": added, "lines_deleted": deleted})
+        return series
+
+    @staticmethod
+    def _is_partial_clone(repo_path: str) -> bool:
+        result = subprocess.run(['git', '-C', repo_path, 'config', '--get', 'remote.origin.promisor'],
+                                capture_output=True, text=True)
+        return result.stdout.strip() == 'true'
+
+    @staticmethod
+    def _isoformat(timestamp: Optional[int]) -> Optional[str]:
+        if timestamp is None:
+            return None
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+# 进程内共享的历史统计，键为 (仓库路径, 提交 SHA, 是否统计行数)：同一提交的历史不会变化，
+# 多个工具（以及同一工具的多次调用）只需执行一次 git log；按最近使用保留 MAX_HISTORIES 份
+_HISTORIES: "OrderedDict[Tuple[str, str, bool], HistoryStats]" = OrderedDict()
+_HISTORIES_LOCK = threading.Lock()
+MAX_HISTORIES = 8
+
+
+def get_history(repo_path: str, ref: str = "HEAD", line_stats: Optional[bool] = None) -> HistoryStats:
+    """获取（必要时解析）ref 所指提交的历史统计；返回的对象在调用方之间共享，不应修改"""
+    result = subprocess.run(['git', '-C', repo_path, 'rev-parse', '--verify', '--quiet', f'{ref}^{{commit}}'],
+                            capture_output=True, text=True)
+    commit_sha = result.stdout.strip()
+    if result.returncode != 0 or not commit_sha:
+        # ref 无法解析时不缓存，由 git log 给出错误
+        return GitHistoryAnalyzer().analyze(repo_path, ref, line_stats)
+
+    if line_stats is None:
+        line_stats = not GitHistoryAnalyzer._is_partial_clone(repo_path)
+    key = (os.path.abspath(repo_path), commit_sha, line_stats)
+    with _HISTORIES_LOCK:
+        stats = _HISTORIES.get(key)
+        if stats is not None:
+            _HISTORIES.move_to_end(key)
+            return stats
+
+    stats = GitHistoryAnalyzer().analyze(repo_path, commit_sha, line_stats)
+    with _HISTORIES_LOCK:
+        _HISTORIES[key] = stats
+        while len(_HISTORIES) > MAX_HISTORIES:
+            _HISTORIES.popitem(last=False)
+    return stats
@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import ClassVar
 
+from .ContributorAnalyzer import ContributorAnalyzer
+
 class GitHubRepoInput(BaseModel):
     """Input schema for basic repository metadata."""
     owner: str = Field(..., description="Repository owner username")
@@ -310,8 +312,8 @@ class GitHubAPIReader(BaseTool):
         except Exception as e:
             return {"success": False, "error": f"Failed to fetch contributors: {str(e)}"}
     
-    def get_community_health(self, owner: str, repo: str) -> Dict[str, Any]:
-        """综合社区健康度评估"""
+    def get_community_health(self, owner: str, repo: str, repo_path: str = None) -> Dict[str, Any]:
+        """综合社区健康度评估（提供本地仓库路径时，贡献者统计改为基于本地提交历史）"""
         try:
             # 获取基础元数据
             metadata = self._run(owner, repo)
@@ -324,8 +326,12 @@ class GitHubAPIReader(BaseTool):
             # 获取 PRs 分析
             prs = self.get_recent_prs(owner, repo, count=20)
             
-            # 获取贡献者分析
-            contributors = self.get_contributors(owner, repo, count=50)
+            # 获取贡献者分析：优先使用本地历史，省去一次受速率限制的 API 调用
+            contributors = {}
+            if repo_path:
+                contributors = ContributorAnalyzer()._run(repo_path)
+            if not contributors.get("success"):
+                contributors = self.get_contributors(owner, repo, count=50)
             
             # 计算健康度指标
             health_score = self._calculate_health_score(metadata, issues, prs, contributors)
@@ -339,6 +345,8 @@ class GitHubAPIReader(BaseTool):
                     "fork_count": metadata.get("forks", 0),
                     "open_issues": metadata.get("open_issues", 0),
                     "total_contributors": contributors.get("total_contributors", 0),
+                    "bus_factor": contributors.get("bus_factor"),
+                    "gini_coefficient": contributors.get("gini_coefficient"),
                     "issue_closure_rate": issues.get("closure_rate", 0),
                     "pr_merge_rate": prs.get("merge_rate", 0),
                 },
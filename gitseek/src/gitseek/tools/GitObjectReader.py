@@ -0,0 +1,209 @@
+# GitObjectReader.py
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+from collections import OrderedDict
+import subprocess
+import threading
+import atexit
+import os
+
+
+class GitObjectReader:
+    """直接从 git 对象库读取目录树和文件内容，无需检出工作目录。
+
+    目录树通过一次 `git ls-tree -r -l` 获取并缓存；文件内容通过一个常驻的
+    `git cat-file --batch` 进程按需流式读取。适用于普通仓库、worktree 和裸镜像，
+    可分析任意提交或标签。
+    """
+
+    def __init__(self, repo_path: str, ref: str = "HEAD", commit_sha: str = ""):
+        self.repo_path = os.path.abspath(repo_path)
+        self.ref = ref or "HEAD"
+        self.commit_sha = commit_sha or self._resolve_commit()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._directories: Optional[set] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _git_command(self, *args: str) -> List[str]:
+        return ['git', '-C', self.repo_path] + list(args)
+
+    def _resolve_commit(self) -> str:
+        return resolve_commit(self.repo_path, self.ref)
+
+    # === 目录树 ===
+
+    def list_tree(self, prefix: str = "") -> List[Dict[str, Any]]:
+        """列出提交中的所有文件（按路径排序），可按目录前缀过滤"""
+        prefix = prefix.strip('/')
+        if not prefix:
+            return list(self._tree().values())
+        return [e for path, e in self._tree().items() if path == prefix or path.startswith(prefix + '/')]
+
+    def _tree(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = self._load_tree()
+        return self._entries
+
+    def _load_tree(self) -> Dict[str, Dict[str, Any]]:
+        """执行一次 ls-tree -r -l，解析 NUL 分隔的输出"""
+        result = subprocess.run(
+            self._git_command('ls-tree', '-r', '-l', '-z', '--full-tree', self.commit_sha),
+            capture_output=True, timeout=300
+        )
+        if result.returncode != 0:
+            raise ValueError(f"git ls-tree 失败: {result.stderr.decode('utf-8', errors='ignore').strip()}")
+
+        entries = {}
+        for record in result.stdout.split(b'\0'):
+            if not record:
+                continue
+            meta, _, raw_path = record.partition(b'\t')
+            mode, obj_type, sha, size = meta.decode('ascii').split()
+            if obj_type != 'blob':
+                continue  # 跳过子模块（commit 对象）
+            path = raw_path.decode('utf-8', errors='replace')
+            entries[path] = {
+                "path": path,
+                "mode": mode,
+                "sha": sha,
+                "size": int(size) if size.isdigit() else 0
+            }
+        return dict(sorted(entries.items()))
+
+    def get_entry(self, path: str) -> Optional[Dict[str, Any]]:
+        """按路径查找文件条目"""
+        return self._tree().get(path.strip('/'))
+
+    def exists(self, path: str) -> bool:
+        return self.get_entry(path) is not None
+
+    def is_dir(self, path: str) -> bool:
+        path = path.strip('/')
+        if not path:
+            return True
+        if self._directories is None:
+            # 所有文件的各级父目录，首次调用时构建一次
+            directories = set()
+            for file_path in self._tree():
+                parts = file_path.split('/')[:-1]
+                for depth in range(1, len(parts) + 1):
+                    directories.add('/'.join(parts[:depth]))
+            self._directories = directories
+        return path in self._directories
+
+    # === 文件内容 ===
+
+    def read_blob(self, sha: str) -> bytes:
+        """通过常驻 cat-file --batch 进程读取 blob 内容"""
+        with self._lock:
+            process = self._ensure_process()
+            process.stdin.write(sha.encode('ascii') + b'\n')
+            process.stdin.flush()
+
+            header = process.stdout.readline().decode('utf-8', errors='replace').split()
+            if len(header) < 3 or header[-1] == 'missing':
+                raise FileNotFoundError(f"对象不存在: {sha}")
+            size = int(header[2])
+            data = process.stdout.read(size)
+            process.stdout.read(1)  # 每个对象内容后跟一个换行
+            return data
+
+    def iter_blob(self, sha: str, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+        """分块读取 blob，内存占用与文件大小无关；提前结束迭代时丢弃剩余内容，保持 cat-file 流同步"""
+        with self._lock:
+            process = self._ensure_process()
+            process.stdin.write(sha.encode('ascii') + b'\n')
+            process.stdin.flush()
+
+            header = process.stdout.readline().decode('utf-8', errors='replace').split()
+            if len(header) < 3 or header[-1] == 'missing':
+                raise FileNotFoundError(f"对象不存在: {sha}")
+            remaining = int(header[2])
+            try:
+                while remaining:
+                    data = process.stdout.read(min(chunk_size, remaining))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    yield data
+            finally:
+                while remaining:
+                    data = process.stdout.read(min(chunk_size, remaining))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                process.stdout.read(1)
+
+    def read_file(self, path: str) -> bytes:
+        """按路径读取文件内容"""
+        entry = self.get_entry(path)
+        if entry is None:
+            raise FileNotFoundError(f"文件不存在于 {self.ref}: {path}")
+        return self.read_blob(entry["sha"])
+
+    def read_text(self, path: str) -> str:
+        return self.read_file(path).decode('utf-8', errors='ignore')
+
+    def _ensure_process(self) -> subprocess.Popen:
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                self._git_command('cat-file', '--batch'),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        return self._process
+
+    def close(self) -> None:
+        """关闭 cat-file 进程"""
+        with self._lock:
+            if self._process is not None:
+                try:
+                    self._process.stdin.close()
+                    self._process.wait(timeout=5)
+                except Exception:
+                    self._process.kill()
+                self._process = None
+
+
+def resolve_commit(repo_path: str, ref: str = "HEAD") -> str:
+    """把 ref 解析为提交 SHA（每次执行 rev-parse：HEAD 和分支会随新提交移动）"""
+    result = subprocess.run(
+        ['git', '-C', repo_path, 'rev-parse', '--verify', f'{ref or "HEAD"}^{{commit}}'],
+        capture_output=True, text=True, timeout=60
+    )
+    if result.returncode != 0:
+        raise ValueError(f"无法解析 ref '{ref}': {result.stderr.strip()}")
+    return result.stdout.strip()
+
+
+# 进程内共享的读取器，按 (仓库路径, 提交 SHA) 复用 cat-file 进程和目录树，按最近使用保留 MAX_READERS 个，
+# 淘汰时关闭其 cat-file 进程，进程退出时全部关闭。ref 每次都重新解析，新提交后 HEAD / 分支指向新的读取器
+_READERS: "OrderedDict[Tuple[str, str], GitObjectReader]" = OrderedDict()
+_READERS_LOCK = threading.Lock()
+MAX_READERS = 16
+
+
+def get_object_reader(repo_path: str, ref: str = "HEAD") -> GitObjectReader:
+    """获取（或创建）共享的 GitObjectReader"""
+    repo_path, ref = os.path.abspath(repo_path), ref or "HEAD"
+    key = (repo_path, resolve_commit(repo_path, ref))
+    evicted: List[GitObjectReader] = []
+    with _READERS_LOCK:
+        reader = _READERS.get(key)
+        if reader is not None:
+            _READERS.move_to_end(key)
+            return reader
+        reader = _READERS[key] = GitObjectReader(repo_path, ref, commit_sha=key[1])
+        while len(_READERS) > MAX_READERS:
+            evicted.append(_READERS.popitem(last=False)[1])
+    for evicted_reader in evicted:
+        evicted_reader.close()
+    return reader
+
+
+@atexit.register
+def _close_readers() -> None:
+    with _READERS_LOCK:
+        readers = list(_READERS.values())
+        _READERS.clear()
+    for reader in readers:
+        reader.close()
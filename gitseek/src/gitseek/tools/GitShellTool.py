@@ -1,51 +1,281 @@
 # GitShellTool.py
 from crewai.tools import BaseTool
-from typing import Type
+from typing import Type, List, Optional, ClassVar
 from pydantic import BaseModel, Field
+from contextlib import ExitStack
 import subprocess
 import os
 
+from .RepoMirrorCache import RepoMirrorCache
+from .GitArchiveFetcher import GitArchiveFetcher
+from .CloneStore import CloneStore
+from .RepoInventory import invalidate_inventory
+
 
 class GitCloneInput(BaseModel):
     """Input schema for GitShellTool."""
     repo_url: str = Field(..., description="GitHub repository URL to clone")
     target_dir: str = Field(..., description="Local base directory path to clone into (e.g., './cloned_repos')")
+    clone_strategy: str = Field(
+        default="auto",
+        description="Clone strategy: auto/full/shallow/blobless/sparse. 'auto' picks one from the repository size"
+    )
+    depth: int = Field(default=1, description="History depth used by the 'shallow' strategy (--depth N)")
+    sparse_paths: List[str] = Field(
+        default=[],
+        description="Directories to check out with the 'sparse' strategy; defaults to the core directories scanned later"
+    )
+    repo_size_kb: int = Field(
+        default=0,
+        description="Repository size in KB as returned by the GitHub API 'size' field; 0 means look it up"
+    )
+    timeout: int = Field(default=600, description="Clone timeout in seconds")
+    use_cache: bool = Field(
+        default=True,
+        description="Check out from a cached bare mirror refreshed with an incremental git fetch"
+    )
+    ref: str = Field(default="", description="Branch, tag or commit to check out (defaults to the remote HEAD)")
+    cache_dir: str = Field(default="", description="Mirror cache directory (defaults to <target_dir>/.mirrors)")
+    fetch_backend: str = Field(
+        default="auto",
+        description="Fetch backend: auto/clone/archive. 'auto' downloads the tarball archive when history is not needed"
+    )
+    need_history: bool = Field(
+        default=True,
+        description="Whether later stages need the commit history (local history analytics do); False allows an archive download"
+    )
+    disk_budget_mb: int = Field(
+        default=0,
+        description="Byte budget for target_dir in MB; least recently analysed unpinned checkouts are evicted beyond it "
+                    "(0 uses $GITSEEK_CLONE_BUDGET_MB, unset means no limit)"
+    )
 
 
 class GitShellTool(BaseTool):
     name: str = "Git Repository Cloner"
-    description: str = "Clones GitHub repositories to local directory for analysis"
+    description: str = (
+        "Clones GitHub repositories to local directory for analysis. "
+        "Supports full, shallow (--depth N), blobless (--filter=blob:none) and sparse checkout strategies; "
+        "'auto' chooses one from the repository size and reports the strategy and bytes fetched. "
+        "By default checkouts come from a cached bare mirror, so re-analysing a repository costs one incremental fetch. "
+        "When history is not needed (or the URL is a tarball) it streams the archive instead of cloning. "
+        "target_dir is a managed store: usage and hit rate are tracked and old checkouts evicted beyond the disk budget"
+    )
     args_schema: Type[BaseModel] = GitCloneInput
 
-    def _run(self, repo_url: str, target_dir: str) -> str:
+    CLONE_STRATEGIES: ClassVar[List[str]] = ['full', 'shallow', 'blobless', 'sparse']
+
+    # 稀疏检出默认保留的目录，与 FileSystemBrowser 识别核心目录时使用的名称一致
+    DEFAULT_SPARSE_PATHS: ClassVar[List[str]] = [
+        'src', 'lib', 'app', 'components', 'core', 'main', 'bin', 'scripts'
+    ]
+
+    # 自动选择策略的阈值（单位 KB，与 GitHub API 的 size 字段一致）
+    FULL_CLONE_MAX_KB: ClassVar[int] = 50 * 1024
+    BLOBLESS_CLONE_MAX_KB: ClassVar[int] = 500 * 1024
+
+    def _run(self, repo_url: str, target_dir: str, clone_strategy: str = "auto", depth: int = 1,
+             sparse_paths: List[str] = None, repo_size_kb: int = 0, timeout: int = 600,
+             use_cache: bool = True, ref: str = "", cache_dir: str = "", fetch_backend: str = "auto",
+             need_history: bool = True, disk_budget_mb: int = 0) -> str:
+        # 计算最终克隆路径，以匹配后续分析工具的期望：[target_dir]/[owner]/[repo_name]
+        # 示例：https://github.com/moonlight142790/Smart_Health.git -> moonlight142790/Smart_Health
+        # 归档地址（如 codeload .../owner/repo/tar.gz/main）取 ref 之前的两段
+        final_path = GitArchiveFetcher.checkout_path(target_dir, repo_url)
+
+        backend = self.choose_backend(repo_url, fetch_backend, need_history)
+        mirror = ""
+        if backend == 'clone' and use_cache:
+            cache = RepoMirrorCache(
+                cache_dir or os.environ.get('GITSEEK_MIRROR_CACHE') or os.path.join(target_dir, '.mirrors')
+            )
+            mirror = cache.mirror_path(*cache.parse_repo_url(repo_url))
+        # 检出目录或镜像已存在即视为命中（只需增量更新）
+        hit = (os.path.isdir(final_path) and bool(os.listdir(final_path))) or os.path.isdir(mirror or final_path)
+
+        store = CloneStore(target_dir, disk_budget_mb * 1024 * 1024 if disk_budget_mb else None)
+        # 整个获取过程持有引用：更新已有检出时，其他进程登记获取触发的淘汰不会删除它；
+        # 新检出的目录在获取完成后立即登记引用，直到登记完毕
+        with ExitStack() as references:
+            try:
+                references.enter_context(store.using(final_path, repo_url))
+            except OSError:
+                pass
+            message = self._fetch(repo_url, target_dir, final_path, backend, mirror, clone_strategy, depth,
+                                  sparse_paths, repo_size_kb, timeout, ref)
+            if message.startswith(('✅', '⚠️')):
+                invalidate_inventory(final_path)
+                try:
+                    references.enter_context(store.using(final_path, repo_url))
+                    evicted = store.record_fetch(repo_url, final_path, mirror, hit=hit)
+                    if evicted:
+                        message += f"\n   evicted (disk budget): {', '.join(evicted)}"
+                except OSError as e:
+                    message += f"\n   ⚠️ clone store not updated: {str(e)}"
+        return message
+
+    def _fetch(self, repo_url: str, target_dir: str, final_path: str, backend: str, mirror: str,
+               clone_strategy: str, depth: int, sparse_paths: Optional[List[str]], repo_size_kb: int,
+               timeout: int, ref: str) -> str:
         try:
-            # 1. 计算最终克隆路径，以匹配后续分析工具的期望：[target_dir]/[repo_name]
-            # 示例：https://github.com/moonlight142790/Smart_Health.git -> Smart_Health
-            repo_name = repo_url.rstrip('/').split('/')[-1].replace('.git', '')
-            final_path = os.path.join(target_dir, repo_name)
+            # 0. 不需要历史时改用归档下载（边下载边解压）
+            if backend == 'archive':
+                return GitArchiveFetcher()._run(repo_url, target_dir, ref=ref, timeout=timeout)
+
+            # 1. 基于镜像缓存检出
+            if mirror:
+                cache = RepoMirrorCache(os.path.dirname(os.path.dirname(mirror)))
+                return self._run_cached(cache, repo_url, final_path, clone_strategy, depth,
+                                        sparse_paths, repo_size_kb, timeout, ref)
 
             # 2. 检查目标子目录是否已存在且非空
             if os.path.isdir(final_path) and os.listdir(final_path):
                 return f"⚠️ Repository already cloned: {repo_url} already exists in {final_path}. Skipping clone."
 
-            # 3. 确保目标基目录存在
+            # 3. 确定克隆策略
+            strategy, repo_size_kb = self._resolve_strategy(repo_url, clone_strategy, repo_size_kb)
+            if not strategy:
+                return f"❌ Unknown clone strategy: {clone_strategy} (expected auto/{'/'.join(self.CLONE_STRATEGIES)})"
+
+            # 4. 确保目标基目录存在
             os.makedirs(target_dir, exist_ok=True)
 
-            # 4. 执行 git clone 命令
+            # 5. 执行 git clone 命令（稀疏检出在克隆后再设置检出范围）
             result = subprocess.run(
-                ['git', 'clone', repo_url, final_path],  # 克隆到正确的目标子目录
+                self._build_clone_command(repo_url, final_path, strategy, depth),
                 capture_output=True,
                 text=True,
-                timeout=300  # 5分钟超时
+                timeout=timeout
             )
-
-            if result.returncode == 0:
-                return f"✅ Successfully cloned {repo_url} to {final_path}"
-            else:
+            if result.returncode != 0:
                 # 克隆失败时，返回完整的错误信息
-                return f"❌ Git clone failed: {result.stderr}"
+                return f"❌ Git clone failed ({strategy}): {result.stderr}"
+
+            if strategy == 'sparse':
+                paths = sparse_paths or self.DEFAULT_SPARSE_PATHS
+                result = self._apply_sparse_checkout(final_path, paths, timeout)
+                if result.returncode != 0:
+                    return f"❌ Sparse checkout failed: {result.stderr}"
+
+            fetched_bytes = RepoMirrorCache._dir_size(os.path.join(final_path, '.git'))
+            return (
+                f"✅ Successfully cloned {repo_url} to {final_path}\n"
+                f"   strategy: {strategy}"
+                f"{f' (depth={depth})' if strategy == 'shallow' else ''}"
+                f"{f' (repo size {repo_size_kb} KB)' if repo_size_kb else ''}\n"
+                f"   fetched_bytes: {fetched_bytes} ({fetched_bytes / 1024 / 1024:.1f} MB)"
+            )
 
         except subprocess.TimeoutExpired:
-            return "❌ Git clone timed out after 5 minutes"
+            return f"❌ Git clone timed out after {timeout} seconds"
         except Exception as e:
-            return f"❌ Unexpected error: {str(e)}"
\ No newline at end of file
+            return f"❌ Unexpected error: {str(e)}"
+
+    def _run_cached(self, cache: RepoMirrorCache, repo_url: str, final_path: str, clone_strategy: str,
+                    depth: int, sparse_paths: Optional[List[str]], repo_size_kb: int, timeout: int, ref: str) -> str:
+        """基于镜像缓存检出：首次 clone --mirror，之后只做增量 fetch 并更新 worktree"""
+        owner, repo = cache.parse_repo_url(repo_url)
+        mirror = cache.mirror_path(owner, repo)
+
+        # 已存在的独立克隆（非镜像 worktree）保持原有行为
+        if os.path.isdir(final_path) and os.listdir(final_path) and not cache.is_worktree_of(final_path, mirror):
+            return f"⚠️ Repository already cloned: {repo_url} already exists in {final_path}. Skipping clone."
+
+        # 镜像已存在时沿用首次克隆的策略，无需再查询仓库大小
+        strategy = cache.load_metadata(owner, repo).get("strategy")
+        if not strategy:
+            strategy, repo_size_kb = self._resolve_strategy(repo_url, clone_strategy, repo_size_kb)
+            if not strategy:
+                return f"❌ Unknown clone strategy: {clone_strategy} (expected auto/{'/'.join(self.CLONE_STRATEGIES)})"
+
+        mirror_result = cache.ensure_mirror(
+            repo_url,
+            blobless=strategy in ('blobless', 'sparse'),
+            depth=max(depth, 1) if strategy == 'shallow' else 0,
+            timeout=timeout
+        )
+        if not mirror_result.get("success"):
+            return f"❌ Git mirror {strategy} failed: {mirror_result.get('error')}"
+
+        worktree = cache.checkout_worktree(
+            repo_url, final_path, ref or "HEAD",
+            sparse_paths=(sparse_paths or self.DEFAULT_SPARSE_PATHS) if strategy == 'sparse' else None,
+            strategy=strategy,
+            timeout=timeout
+        )
+        if not worktree.get("success"):
+            return f"❌ Git worktree checkout failed: {worktree.get('error')}"
+
+        fetched_bytes = mirror_result["fetched_bytes"]
+        changed = "unchanged" if not worktree["changed"] else f"previous {worktree['previous_sha'] or 'none'}"
+        return (
+            f"✅ Successfully {mirror_result['action']} {repo_url} and checked out {worktree['ref']} to {final_path}\n"
+            f"   strategy: {strategy} (mirror: {mirror})\n"
+            f"   head_sha: {worktree['head_sha']} ({changed})\n"
+            f"   fetched_bytes: {fetched_bytes} ({fetched_bytes / 1024 / 1024:.1f} MB)"
+        )
+
+    def choose_backend(self, repo_url: str, fetch_backend: str = "auto", need_history: bool = True) -> str:
+        """在 git clone 与归档下载之间选择获取方式：默认需要提交历史（克隆），归档地址总是直接下载"""
+        backend = fetch_backend.lower()
+        if backend in ('clone', 'archive'):
+            return backend
+        if GitArchiveFetcher.is_archive_url(repo_url):
+            return 'archive'
+        # 本地路径或 file:// 仓库没有归档服务，只能克隆
+        if not repo_url.startswith(('http://', 'https://')):
+            return 'clone'
+        return 'clone' if need_history else 'archive'
+
+    def _resolve_strategy(self, repo_url: str, clone_strategy: str, repo_size_kb: int):
+        """解析克隆策略，返回 (strategy, repo_size_kb)；策略无效时 strategy 为 None"""
+        strategy = clone_strategy.lower()
+        if strategy == 'auto':
+            if not repo_size_kb:
+                repo_size_kb = self._lookup_repo_size(repo_url) or 0
+            return self.choose_strategy(repo_size_kb), repo_size_kb
+        if strategy not in self.CLONE_STRATEGIES:
+            return None, repo_size_kb
+        return strategy, repo_size_kb
+
+    def choose_strategy(self, repo_size_kb: int) -> str:
+        """根据仓库大小（KB）自动选择克隆策略"""
+        if not repo_size_kb:
+            # 大小未知时使用 blobless：保留完整提交历史，文件内容按需获取
+            return 'blobless'
+        if repo_size_kb <= self.FULL_CLONE_MAX_KB:
+            return 'full'
+        if repo_size_kb <= self.BLOBLESS_CLONE_MAX_KB:
+            return 'blobless'
+        return 'sparse'
+
+    def _build_clone_command(self, repo_url: str, final_path: str, strategy: str, depth: int) -> List[str]:
+        """构造对应策略的 git clone 命令"""
+        command = ['git', 'clone']
+        if strategy == 'shallow':
+            command += ['--depth', str(max(depth, 1)), '--single-branch']
+        elif strategy == 'blobless':
+            command += ['--filter=blob:none']
+        elif strategy == 'sparse':
+            command += ['--filter=blob:none', '--sparse']
+        return command + [repo_url, final_path]
+
+    def _apply_sparse_checkout(self, repo_path: str, paths: List[str], timeout: int) -> subprocess.CompletedProcess:
+        """设置稀疏检出范围（cone 模式，顶层文件始终保留）"""
+        return subprocess.run(
+            ['git', '-C', repo_path, 'sparse-checkout', 'set'] + list(paths),
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+
+    def _lookup_repo_size(self, repo_url: str) -> Optional[int]:
+        """通过 GitHubAPIReader 获取仓库大小（KB）"""
+        parts = repo_url.rstrip('/').replace('.git', '').split('/')
+        if len(parts) < 2 or 'github.com' not in repo_url:
+            return None
+        from .GitHubApiReader import GitHubAPIReader
+        metadata = GitHubAPIReader()._run(parts[-2], parts[-1])
+        if metadata.get("success"):
+            return metadata.get("size")
+        return None
@@ -0,0 +1,156 @@
+# HotspotAnalyzer.py
+from crewai.tools import BaseTool
+from typing import Type, Dict, Any, List, ClassVar
+from pydantic import BaseModel, Field
+import os
+
+from .BlobCache import blob_cache_path, load_blob_cache, save_blob_cache, lookup
+from .GitObjectReader import get_object_reader
+from .GitHistoryAnalyzer import get_history
+from .LLMCodeSummarizer import LLMCodeSummarizer
+from .GeneratedFileDetector import GeneratedFileDetector, get_tree_detector
+
+
+class HotspotInput(BaseModel):
+    """Input schema for HotspotAnalyzer."""
+    repo_path: str = Field(..., description="本地仓库路径（克隆目录、worktree 或裸镜像）")
+    ref: str = Field(default="HEAD", description="要分析的分支/标签/提交")
+    top_n: int = Field(default=20, description="返回的高风险文件数量")
+    include_generated: bool = Field(default=False, description="是否包含生成的、第三方（vendored）或压缩的文件（默认跳过）")
+
+
+class HotspotAnalyzer(BaseTool):
+    name: str = "Code Hotspot Analyzer"
+    description: str = """将每个源文件的复杂度与提交历史中的变更频率结合，找出变更频繁且复杂的高风险文件。
+    返回热点排行表和可直接用于树图（treemap）的层级 JSON。复杂度结果按 blob SHA 缓存，新提交后只重新计算变化的文件；
+    提交历史按提交 SHA 缓存，HEAD 未变化时不会重新执行 git log。"""
+    args_schema: Type[BaseModel] = HotspotInput
+
+    CACHE_FILE: ClassVar[str] = "gitseek-complexity-cache.json"
+    MAX_FILE_BYTES: ClassVar[int] = 1024 * 1024
+
+    def _run(self, repo_path: str, ref: str = "HEAD", top_n: int = 20,
+             include_generated: bool = False) -> Dict[str, Any]:
+        try:
+            if not os.path.isdir(repo_path):
+                return {"success": False, "error": f"仓库目录不存在: {repo_path}"}
+
+            complexity, computed = self.compute_complexity(repo_path, ref, include_generated=include_generated)
+            history = get_history(repo_path, ref)
+
+            hotspots = self.rank_hotspots(complexity, history.files)
+            return {
+                "success": True,
+                "repo_path": repo_path,
+                "ref": ref,
+                "source_files": len(complexity),
+                "complexity_computed": computed,
+                "complexity_cached": len(complexity) - computed,
+                "hotspots": hotspots[:top_n],
+                "treemap": self.build_treemap(os.path.basename(os.path.abspath(repo_path)), hotspots)
+            }
+
+        except Exception as e:
+            return {"success": False, "error": f"热点分析失败: {str(e)}"}
+
+    def compute_complexity(self, repo_path: str, ref: str = "HEAD", cache: Dict[str, Dict[str, Any]] = None,
+                           include_generated: bool = False):
+        """遍历一次目录树，计算每个源文件的复杂度；已缓存的 blob 直接复用。返回 (结果, 新计算的文件数)
+
+        传入 cache 时由调用方负责加载和保存（例如多个 ref 共用一份缓存）。
+        生成的、第三方和压缩的文件默认跳过：路径命中时不读取内容，内容判断结果随复杂度一起缓存。
+        """
+        reader = get_object_reader(repo_path, ref)
+        detector = get_tree_detector(reader)
+        summarizer = LLMCodeSummarizer()
+        extensions = tuple(summarizer.LANGUAGE_EXTENSIONS.keys())
+
+        own_cache = cache is None
+        if own_cache:
+            cache_path = blob_cache_path(repo_path, self.CACHE_FILE)
+            cache = load_blob_cache(cache_path)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        computed = 0
+        for entry in reader.list_tree():
+            path = entry["path"]
+            if not path.endswith(extensions) or entry["size"] > self.MAX_FILE_BYTES:
+                continue
+            if not include_generated and detector.classify_path(path):
+                continue
+            metrics = lookup(cache, entry["sha"])
+            # 旧版本缓存没有 generated 字段，需要重新计算一次
+            if metrics is None or "generated" not in metrics:
+                metrics = self.measure(path, reader.read_blob(entry["sha"]), summarizer)
+                cache[entry["sha"]] = metrics
+                computed += 1
+            if not include_generated and detector.resolve(path, metrics["generated"]):
+                continue
+            results[path] = {**metrics, "blob_sha": entry["sha"], "size": entry["size"]}
+
+        if computed and own_cache:
+            save_blob_cache(cache_path, cache)
+        return results, computed
+
+    @staticmethod
+    def measure(path: str, raw: bytes, summarizer: LLMCodeSummarizer = None) -> Dict[str, Any]:
+        """单个文件的复杂度指标（缓存中保存的格式），generated 为文件开头内容的生成/压缩判断"""
+        summarizer = summarizer or LLMCodeSummarizer()
+        code = raw.decode('utf-8', errors='ignore')
+        language = summarizer._detect_language(path)
+        complexity = summarizer._analyze_complexity(code, language)
+        return {
+            "language": language,
+            "lines": code.count('\n') + 1,
+            "cyclomatic_complexity": complexity["cyclomatic_complexity"],
+            "max_nesting_depth": complexity["max_nesting_depth"],
+            "function_count": complexity["function_count"],
+            "generated": GeneratedFileDetector.classify_content(raw[:GeneratedFileDetector.HEAD_BYTES])
+        }
+
+    def rank_hotspots(self, complexity: Dict[str, Dict[str, Any]],
+                      churn: Dict[str, List[int]]) -> List[Dict[str, Any]]:
+        """热点分数 = 归一化变更次数 × 归一化复杂度（0-100）"""
+        max_commits = max((churn.get(p, [0])[0] for p in complexity), default=0) or 1
+        max_complexity = max((m["cyclomatic_complexity"] for m in complexity.values()), default=0) or 1
+
+        hotspots = []
+        for path, metrics in complexity.items():
+            record = churn.get(path, [0, 0, 0, None, None])
+            score = (record[0] / max_commits) * (metrics["cyclomatic_complexity"] / max_complexity) * 100
+            hotspots.append({
+                "path": path,
+                "language": metrics["language"],
+                "lines": metrics["lines"],
+                "cyclomatic_complexity": metrics["cyclomatic_complexity"],
+                "max_nesting_depth": metrics["max_nesting_depth"],
+                "commits": record[0],
+                "churn": record[1] + record[2],
+                "hotspot_score": round(score, 2)
+            })
+        hotspots.sort(key=lambda h: (h["hotspot_score"], h["commits"], h["cyclomatic_complexity"]), reverse=True)
+        return hotspots
+
+    def build_treemap(self, root_name: str, hotspots: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """构建树图层级：目录为节点，文件为叶子（value=行数，score=热点分数）"""
+        root = {"name": root_name, "children": []}
+        directories = {"": root}
+        for hotspot in sorted(hotspots, key=lambda h: h["path"]):
+            parts = hotspot["path"].split('/')
+            node = root
+            for depth in range(1, len(parts)):
+                dir_path = '/'.join(parts[:depth])
+                if dir_path not in directories:
+                    child = {"name": parts[depth - 1], "children": []}
+                    node["children"].append(child)
+                    directories[dir_path] = child
+                node = directories[dir_path]
+            node["children"].append({
+                "name": parts[-1],
+                "path": hotspot["path"],
+                "value": hotspot["lines"],
+                "score": hotspot["hotspot_score"],
+                "commits": hotspot["commits"],
+                "complexity": hotspot["cyclomatic_complexity"]
+            })
+        return root
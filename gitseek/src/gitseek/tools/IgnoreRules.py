@@ -0,0 +1,238 @@
+# IgnoreRules.py
+from typing import Dict, Any, List, Optional, Tuple, ClassVar, FrozenSet
+import re
+import os
+
+
+class _CompiledRules:
+    """一个规则来源（某个目录下的 .gitignore，或根目录规则集）编译成的匹配器。
+
+    所有模式按“后出现者优先”的顺序合并成一个正则：倒序拼接为带命名分组的选择分支，
+    第一个命中的分支就是 gitignore 语义下最后一条匹配的规则，通过 lastgroup 判断是否为 '!' 取反规则。
+    文件和目录各编译一份（仅匹配目录的 'dir/' 模式不参与文件匹配）。
+    """
+
+    def __init__(self, base: str, patterns: List[str]):
+        self.base = base
+        rules = [rule for rule in (IgnoreRules.parse_pattern(p) for p in patterns) if rule is not None]
+        self.empty = not rules
+        self.negated: Dict[str, bool] = {}
+        self.dir_regex = self._compile(rules, include_dir_only=True)
+        self.file_regex = self._compile(rules, include_dir_only=False)
+
+    def _compile(self, rules: List[Tuple[str, bool, bool]], include_dir_only: bool) -> Optional['re.Pattern']:
+        branches = []
+        for index in range(len(rules) - 1, -1, -1):
+            regex, negated, dir_only = rules[index]
+            if dir_only and not include_dir_only:
+                continue
+            group = f"r{index}"
+            self.negated[group] = negated
+            branches.append(f"(?P<{group}>{regex})")
+        if not branches:
+            return None
+        return re.compile('|'.join(branches))
+
+    def decide(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """返回 True（忽略）/False（显式保留）/None（无规则命中）；rel_path 相对 base"""
+        regex = self.dir_regex if is_dir else self.file_regex
+        if regex is None:
+            return None
+        match = regex.fullmatch(rel_path)
+        if match is None:
+            return None
+        return not self.negated[match.lastgroup]
+
+
+class IgnoreRules:
+    """目录扫描用的忽略规则：内置默认排除 + .git/info/exclude + 各级 .gitignore + 用户指定的 glob。
+
+    规则来源按目录分层：越深的 .gitignore 优先，根目录规则集（默认排除、exclude 文件、
+    根 .gitignore、用户 glob）最后判断。扫描时对目录调用 `is_ignored`，命中即整棵子树剪枝，
+    因此 .git、node_modules 等目录不会被展开。
+    """
+
+    DEFAULT_EXCLUDES: ClassVar[List[str]] = [
+        '.git', 'node_modules/', 'venv/', '.venv/', 'dist/', 'build/', 'target/', '__pycache__/'
+    ]
+    GITIGNORE_FILE: ClassVar[str] = ".gitignore"
+
+    def __init__(self, root: str, extra_patterns: List[str] = None, respect_gitignore: bool = True,
+                 use_defaults: bool = True):
+        self.root = os.path.abspath(root)
+        self.extra_patterns = list(extra_patterns or [])
+        self.respect_gitignore = respect_gitignore
+        self.use_defaults = use_defaults
+        patterns = list(self.DEFAULT_EXCLUDES) if use_defaults else []
+        if respect_gitignore:
+            patterns += self._read_patterns(self._info_exclude_path())
+            patterns += self._read_patterns(os.path.join(self.root, self.GITIGNORE_FILE))
+        # 用户指定的模式放在最后，可以覆盖（或用 '!' 取消）前面的规则
+        patterns += list(extra_patterns or [])
+        self.patterns = patterns
+        self._sources: Dict[str, _CompiledRules] = {"": _CompiledRules("", patterns)}
+
+    def signature(self) -> Dict[str, Any]:
+        """根目录规则集的标识，持久化索引据此判断忽略规则是否变化"""
+        return {"patterns": self.patterns, "respect_gitignore": self.respect_gitignore}
+
+    def without_extra_patterns(self) -> 'IgnoreRules':
+        """去掉用户模式后的规则集（共享已加载的子目录 .gitignore）：持久化索引按它扫描，
+        同一仓库用不同 exclude_patterns 的调用方共用一份索引，用户模式在查询时再用 `extra_rules` 过滤"""
+        if not self.extra_patterns:
+            return self
+        rules = IgnoreRules(self.root, None, self.respect_gitignore, self.use_defaults)
+        rules._sources.update((rel_dir, source) for rel_dir, source in self._sources.items() if rel_dir)
+        return rules
+
+    def extra_rules(self) -> Optional['IgnoreRules']:
+        """只含用户模式的规则集（不含默认排除和 .gitignore）；没有用户模式时为 None"""
+        if not self.extra_patterns:
+            return None
+        return IgnoreRules(self.root, self.extra_patterns, respect_gitignore=False, use_defaults=False)
+
+    def reload(self) -> 'IgnoreRules':
+        """以相同参数重新读取规则（丢弃已加载的子目录 .gitignore）"""
+        return IgnoreRules(self.root, self.extra_patterns, self.respect_gitignore, self.use_defaults)
+
+    # === 规则加载 ===
+
+    def load_directory(self, rel_dir: str, names: FrozenSet[str] = None) -> None:
+        """扫描进入子目录时加载其中的 .gitignore（names 为该目录的文件名集合，避免额外 stat）"""
+        if not self.respect_gitignore or not rel_dir or rel_dir in self._sources:
+            return
+        if names is not None and self.GITIGNORE_FILE not in names:
+            return
+        path = os.path.join(self.root, *rel_dir.split('/'), self.GITIGNORE_FILE)
+        patterns = self._read_patterns(path)
+        if patterns:
+            self._sources[rel_dir] = _CompiledRules(rel_dir, patterns)
+
+    def _info_exclude_path(self) -> str:
+        """定位 .git/info/exclude；worktree 的 .git 是指向公共 git 目录的文件"""
+        git_path = os.path.join(self.root, '.git')
+        if os.path.isfile(git_path):
+            try:
+                with open(git_path, 'r', encoding='utf-8') as f:
+                    git_dir = f.read().strip().replace('gitdir:', '').strip()
+                git_dir = os.path.join(self.root, git_dir)
+                commondir = os.path.join(git_dir, 'commondir')
+                if os.path.isfile(commondir):
+                    with open(commondir, 'r', encoding='utf-8') as f:
+                        git_dir = os.path.join(git_dir, f.read().strip())
+                git_path = git_dir
+            except OSError:
+                return ""
+        return os.path.join(git_path, 'info', 'exclude')
+
+    @staticmethod
+    def _read_patterns(path: str) -> List[str]:
+        if not path or not os.path.isfile(path):
+            return []
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                return f.read().splitlines()
+        except OSError:
+            return []
+
+    # === 匹配 ===
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """判断单个条目（不检查父目录；扫描时父目录已被剪枝）"""
+        rel_path = rel_path.strip('/')
+        parent = rel_path.rsplit('/', 1)[0] if '/' in rel_path else ""
+        # 从最近的 .gitignore 向上查找，第一个给出结论的规则来源生效
+        while True:
+            source = self._sources.get(parent)
+            if source is not None and not source.empty:
+                relative = rel_path[len(parent) + 1:] if parent else rel_path
+                decision = source.decide(relative, is_dir)
+                if decision is not None:
+                    return decision
+            if not parent:
+                return False
+            parent = parent.rsplit('/', 1)[0] if '/' in parent else ""
+
+    def is_path_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """判断任意路径：任一父目录被忽略时，该路径也被忽略（用于 git 树条目等未经剪枝的列表）"""
+        parts = rel_path.strip('/').split('/')
+        for depth in range(1, len(parts)):
+            if self.is_ignored('/'.join(parts[:depth]), is_dir=True):
+                return True
+        return self.is_ignored('/'.join(parts), is_dir)
+
+    # === 模式解析 ===
+
+    @staticmethod
+    def parse_pattern(pattern: str) -> Optional[Tuple[str, bool, bool]]:
+        """将一行 gitignore 模式转换为 (正则, 是否取反, 是否仅匹配目录)；空行、注释和无法转换为
+        合法正则的模式（如 '[z-a]'）返回 None，与 git 一样跳过，不影响同一文件中的其他规则"""
+        line = pattern.rstrip('\n')
+        # 行尾未转义的空格会被忽略
+        while line.endswith(' ') and not line.endswith('\\ '):
+            line = line[:-1]
+        if not line or line.startswith('#'):
+            return None
+
+        negated = False
+        if line.startswith('!'):
+            negated, line = True, line[1:]
+        elif line.startswith(('\\!', '\\#')):
+            line = line[1:]
+
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            return None
+
+        # 含有中间斜杠的模式相对于 .gitignore 所在目录锚定，否则匹配任意层级
+        anchored = '/' in line
+        line = line.lstrip('/')
+        regex = IgnoreRules._glob_to_regex(line)
+        if not anchored:
+            regex = f"(?:.*/)?{regex}"
+        try:
+            re.compile(regex)
+        except re.error:
+            return None
+        return regex, negated, dir_only
+
+    @staticmethod
+    def _glob_to_regex(glob: str) -> str:
+        parts = []
+        i, n = 0, len(glob)
+        while i < n:
+            c = glob[i]
+            if glob.startswith('**/', i):
+                parts.append('(?:.*/)?')
+                i += 3
+            elif glob.startswith('/**', i) and i + 3 == n:
+                parts.append('/.*')
+                i += 3
+            elif glob.startswith('**', i):
+                parts.append('.*')
+                i += 2
+            elif c == '*':
+                parts.append('[^/]*')
+                i += 1
+            elif c == '?':
+                parts.append('[^/]')
+                i += 1
+            elif c == '[':
+                end = glob.find(']', i + 2 if glob.startswith(('[!', '[^'), i) else i + 1)
+                if end == -1:
+                    parts.append(re.escape(c))
+                    i += 1
+                    continue
+                body = glob[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append(f"[{body}]")
+                i = end + 1
+            elif c == '\\' and i + 1 < n:
+                parts.append(re.escape(glob[i + 1]))
+                i += 2
+            else:
+                parts.append(re.escape(c))
+                i += 1
+        return ''.join(parts)
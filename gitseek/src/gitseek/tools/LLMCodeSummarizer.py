@@ -5,6 +5,11 @@ from pydantic import BaseModel, Field
 import os
 import re
 
+from .GitObjectReader import get_object_reader
+from .ContentCache import get_content_cache
+from .RepoInventory import get_inventory
+from .GeneratedFileDetector import GeneratedFileDetector, get_generated_detector, get_tree_detector
+
 
 class CodeAnalysisInput(BaseModel):
     """Input schema for LLMCodeSummarizer."""
@@ -13,6 +18,9 @@ class CodeAnalysisInput(BaseModel):
         default="medium",
         description="分析深度: shallow/medium/deep"
     )
+    git_ref: str = Field(default="", description="可选：从 git 对象中读取该 ref 下的文件，此时 file_path 为仓库内相对路径")
+    repo_path: str = Field(default="", description="使用 git_ref 时的仓库路径（工作目录或裸镜像）")
+    include_generated: bool = Field(default=False, description="是否分析生成的、第三方（vendored）或压缩的文件（默认跳过）")
 
 
 class LLMCodeSummarizer(BaseTool):
@@ -25,23 +33,50 @@ class LLMCodeSummarizer(BaseTool):
     # 支持的语言扩展名映射
     LANGUAGE_EXTENSIONS: ClassVar[Dict[str, str]] = {'.py': 'Python', '.js': 'JavaScript', '.ts': 'TypeScript', '.jsx': 'React', '.tsx': 'React TypeScript', '.java': 'Java', '.cpp': 'C++', '.c': 'C', '.go': 'Go', '.rs': 'Rust', '.rb': 'Ruby', '.php': 'PHP', '.cs': 'C#', '.swift': 'Swift', '.kt': 'Kotlin'}
 
-    def _run(self, file_path: str, analysis_depth: str = "medium") -> Dict[str, Any]:
+    def _run(self, file_path: str, analysis_depth: str = "medium", git_ref: str = "",
+             repo_path: str = "", include_generated: bool = False) -> Dict[str, Any]:
         """执行代码分析"""
         try:
-            if not os.path.exists(file_path):
-                return {"error": f"文件不存在: {file_path}"}
+            if git_ref:
+                # 直接从 git 对象读取，无需工作目录
+                reader = get_object_reader(repo_path or ".", git_ref)
+                entry = reader.get_entry(file_path)
+                if entry is None:
+                    return {"error": f"文件不存在于 {git_ref}: {file_path}"}
+                file_size = entry["size"]
+                if file_size > 5 * 1024 * 1024:  # 5MB限制
+                    return {"error": f"文件过大 ({file_size} bytes)，建议分析较小的文件"}
+                content = get_content_cache().get_blob(reader, entry["sha"], file_size)
+                if content.binary:
+                    return {"error": f"二进制文件，跳过分析: {file_path}", "binary": True}
+                if not include_generated:
+                    reason = get_tree_detector(reader).classify(file_path, content.buffer[:GeneratedFileDetector.HEAD_BYTES])
+                    if reason:
+                        return self._skipped(file_path, reason)
+                code_content = content.text
+            else:
+                if not os.path.exists(file_path):
+                    return {"error": f"文件不存在: {file_path}"}
+
+                if not os.path.isfile(file_path):
+                    return {"error": f"路径不是文件: {file_path}"}
 
-            if not os.path.isfile(file_path):
-                return {"error": f"路径不是文件: {file_path}"}
+                # 检查文件大小
+                file_size = os.path.getsize(file_path)
+                if file_size > 5 * 1024 * 1024:  # 5MB限制
+                    return {"error": f"文件过大 ({file_size} bytes)，建议分析较小的文件"}
 
-            # 检查文件大小
-            file_size = os.path.getsize(file_path)
-            if file_size > 5 * 1024 * 1024:  # 5MB限制
-                return {"error": f"文件过大 ({file_size} bytes)，建议分析较小的文件"}
+                if not include_generated:
+                    root = self._find_repo_root(file_path)
+                    reason = get_generated_detector(root).classify_file(os.path.relpath(file_path, root), file_path)
+                    if reason:
+                        return self._skipped(file_path, reason)
 
-            # 读取文件内容
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                code_content = f.read()
+                # 读取文件内容（与 FileContentReader 共享缓存，按识别出的编码解码）
+                content = get_content_cache().get_file(file_path)
+                if content.binary:
+                    return {"error": f"二进制文件，跳过分析: {file_path}", "binary": True}
+                code_content = content.text
 
             # 识别编程语言
             language = self._detect_language(file_path)
@@ -78,6 +113,25 @@ class LLMCodeSummarizer(BaseTool):
         except Exception as e:
             return {"error": f"代码分析失败: {str(e)}"}
 
+    @staticmethod
+    def _skipped(file_path: str, reason: str) -> Dict[str, Any]:
+        labels = {"generated": "自动生成", "vendored": "第三方（vendored）", "minified": "压缩"}
+        return {"error": f"跳过{labels.get(reason, reason)}文件: {file_path}（如需分析请设置 include_generated=True）",
+                "skipped_reason": reason}
+
+    @staticmethod
+    def _find_repo_root(file_path: str) -> str:
+        """向上查找包含 .git 的目录作为仓库根目录（路径规则和 .gitattributes 都相对它判断）；找不到时用文件所在目录"""
+        directory = os.path.dirname(os.path.abspath(file_path))
+        current = directory
+        while True:
+            if os.path.exists(os.path.join(current, '.git')):
+                return current
+            parent = os.path.dirname(current)
+            if parent == current:
+                return directory
+            current = parent
+
     def _detect_language(self, file_path: str) -> str:
         """检测编程语言"""
         ext = os.path.splitext(file_path)[1].lower()
@@ -411,9 +465,16 @@ class LLMCodeSummarizer(BaseTool):
         
         return recommendations
 
-    def select_key_files(self, directory: str, core_directories: List[str] = None, max_files: int = 5) -> List[str]:
-        """从目录中智能选择关键文件进行分析"""
+    def select_key_files(self, directory: str, core_directories: List[str] = None, max_files: int = 5,
+                         include_generated: bool = False) -> List[str]:
+        """从目录中智能选择关键文件进行分析（默认跳过生成的、第三方和压缩的文件）"""
         key_files = []
+        detector = None if include_generated else get_generated_detector(directory)
+
+        def wanted(rel_path: str) -> bool:
+            if detector is None:
+                return True
+            return detector.classify_file(rel_path, os.path.join(directory, *rel_path.split('/'))) is None
         
         # 优先级1: 主入口文件
         entry_points = [
@@ -423,42 +484,39 @@ class LLMCodeSummarizer(BaseTool):
             'main.go', 'main.rs', 'main.cpp'
         ]
         
+        inventory = get_inventory(directory)
         for entry in entry_points:
-            path = os.path.join(directory, entry)
-            if os.path.exists(path):
-                key_files.append(path)
+            if inventory.get(entry) is not None and wanted(entry):
+                key_files.append(os.path.join(directory, entry))
                 if len(key_files) >= max_files:
                     return key_files
         
         # 优先级2: 从核心目录中选择
+        extensions = tuple(self.LANGUAGE_EXTENSIONS.keys())
         if core_directories:
             for core_dir in core_directories:
-                core_path = os.path.join(directory, core_dir)
-                if os.path.exists(core_path) and os.path.isdir(core_path):
-                    for file in os.listdir(core_path):
-                        if file.endswith(tuple(self.LANGUAGE_EXTENSIONS.keys())):
-                            key_files.append(os.path.join(core_path, file))
+                if inventory.is_dir(core_dir):
+                    for item in inventory.list_dir(core_dir):
+                        if not item.is_dir and item.name.endswith(extensions) and wanted(item.path):
+                            key_files.append(os.path.join(directory, core_dir, item.name))
                             if len(key_files) >= max_files:
                                 return key_files
         
-        # 优先级3: 选择最大的源文件
+        # 优先级3: 选择最大的源文件（跳过常见的非核心目录）
         if len(key_files) < max_files:
-            all_files = []
-            for root, dirs, files in os.walk(directory):
-                # 跳过常见的非核心目录
-                dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules', '__pycache__', 'venv', '.venv']]
-                
-                for file in files:
-                    if file.endswith(tuple(self.LANGUAGE_EXTENSIONS.keys())):
-                        file_path = os.path.join(root, file)
-                        try:
-                            file_size = os.path.getsize(file_path)
-                            all_files.append((file_path, file_size))
-                        except:
-                            continue
+            all_files = [
+                (os.path.join(directory, *item.path.split('/')), item.size, item.path)
+                for item in inventory.files(exclude_dirs=['.git', 'node_modules', '__pycache__', 'venv', '.venv'])
+                if item.name.endswith(extensions) and (detector is None or detector.classify_path(item.path) is None)
+            ]
+            all_files = [f for f in all_files if f[0] not in key_files]
             
-            # 按大小排序，选择最大的文件
+            # 按大小排序，选择最大的文件；内容检查（读取文件开头）只对候选文件按需进行
             all_files.sort(key=lambda x: x[1], reverse=True)
-            key_files.extend([f[0] for f in all_files[:max_files - len(key_files)]])
+            for abs_path, _, rel_path in all_files:
+                if len(key_files) >= max_files:
+                    break
+                if wanted(rel_path):
+                    key_files.append(abs_path)
         
         return key_files[:max_files]
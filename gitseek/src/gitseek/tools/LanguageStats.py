@@ -0,0 +1,336 @@
+# LanguageStats.py
+from crewai.tools import BaseTool
+from typing import Type, Dict, Any, List, Optional, Tuple, ClassVar, Iterable
+from pydantic import BaseModel, Field
+from concurrent.futures import ProcessPoolExecutor
+import re
+import os
+
+from .BlobCache import blob_cache_path, load_blob_cache, save_blob_cache, lookup
+from .GitObjectReader import GitObjectReader, get_object_reader
+from .RepoInventory import RepoInventory
+from .GeneratedFileDetector import GeneratedFileDetector, get_tree_detector
+
+
+# 语言 -> (单行注释前缀, [(块注释开始, 结束, 是否允许出现在行中)])
+# Python 的三引号只有出现在行首时才视为注释（文档字符串），行中的三引号是普通字符串
+_C_STYLE = ((b'//',), [(b'/*', b'*/', True)])
+_HASH = ((b'#',), [])
+_MARKUP = ((), [(b'<!--', b'-->', True)])
+COMMENT_SYNTAX: Dict[str, Tuple[Tuple[bytes, ...], List[Tuple[bytes, bytes, bool]]]] = {
+    'Python': ((b'#',), [(b'"""', b'"""', False), (b"'''", b"'''", False)]),
+    'JavaScript': _C_STYLE, 'TypeScript': _C_STYLE, 'React': _C_STYLE, 'React TypeScript': _C_STYLE,
+    'Java': _C_STYLE, 'C++': _C_STYLE, 'C': _C_STYLE, 'Go': _C_STYLE, 'Rust': _C_STYLE, 'C#': _C_STYLE,
+    'Swift': _C_STYLE, 'Kotlin': _C_STYLE, 'Scala': _C_STYLE, 'Objective-C': _C_STYLE, 'Dart': _C_STYLE,
+    'SCSS': _C_STYLE, 'CSS': ((), [(b'/*', b'*/', True)]),
+    'PHP': ((b'//', b'#'), [(b'/*', b'*/', True)]),
+    'SQL': ((b'--',), [(b'/*', b'*/', True)]),
+    'Lua': ((b'--',), [(b'--[[', b']]', True)]),
+    'Ruby': ((b'#',), [(b'=begin', b'=end', False)]),
+    'Julia': ((b'#',), [(b'#=', b'=#', True)]),
+    'PowerShell': ((b'#',), [(b'<#', b'#>', True)]),
+    'Shell': _HASH, 'R': _HASH, 'YAML': _HASH, 'TOML': _HASH, 'Makefile': _HASH, 'Dockerfile': _HASH,
+    'CMake': _HASH,
+    'HTML': _MARKUP, 'XML': _MARKUP, 'Vue': ((b'//',), [(b'<!--', b'-->', True), (b'/*', b'*/', True)]),
+    'Svelte': ((b'//',), [(b'<!--', b'-->', True), (b'/*', b'*/', True)]),
+    'Markdown': _MARKUP,
+}
+
+_BLANK_LINE = re.compile(rb'^[ \t\r\f\v]*$', re.M)
+
+
+class LineCounter:
+    """按块输入的 cloc 风格行分类器：空行 / 注释行 / 代码行。
+
+    输入是任意切分的字节块，跨块的半行保留到下一块；没有注释语法的语言直接在字节上
+    统计换行数和空行数。注释识别是逐行的词法近似：不解析字符串字面量，
+    行首为注释前缀或整行位于块注释内才计为注释行，同时含代码和注释的行计为代码行。
+    """
+
+    __slots__ = ('plain', 'line_markers', 'blocks', 'code', 'comment', 'blank', 'carry', 'block_end')
+
+    def __init__(self, language: str):
+        syntax = COMMENT_SYNTAX.get(language)
+        self.plain = syntax is None
+        self.line_markers, self.blocks = syntax or ((), [])
+        self.code = self.comment = self.blank = 0
+        self.carry = b''
+        self.block_end: Optional[bytes] = None
+
+    def feed(self, chunk: bytes) -> None:
+        data = self.carry + chunk if self.carry else chunk
+        cut = data.rfind(b'\n') + 1
+        self.carry = data[cut:]
+        if not cut:
+            return
+        if self.plain:
+            complete = data[:cut]
+            total = complete.count(b'\n')
+            # 末尾换行之后的空串也会被 ^$ 匹配到，减去这一次
+            blank = len(_BLANK_LINE.findall(complete)) - 1
+            self.blank += blank
+            self.code += total - blank
+            return
+        for line in data[:cut - 1].split(b'\n'):
+            self._classify(line.strip())
+
+    def finish(self) -> List[int]:
+        if self.carry:
+            if self.plain:
+                if self.carry.strip():
+                    self.code += 1
+                else:
+                    self.blank += 1
+            else:
+                self._classify(self.carry.strip())
+            self.carry = b''
+        return [self.code, self.comment, self.blank]
+
+    def _classify(self, line: bytes) -> None:
+        if not line:
+            self.blank += 1
+            return
+        if self.block_end is not None:
+            end = line.find(self.block_end)
+            if end == -1:
+                self.comment += 1
+                return
+            rest = line[end + len(self.block_end):].strip()
+            self.block_end = None
+            # 块注释结束后同一行还有内容时，按剩余部分分类
+            if rest:
+                self._classify(rest)
+            else:
+                self.comment += 1
+            return
+        for start, end, _ in self.blocks:
+            if line.startswith(start):
+                closing = line.find(end, len(start))
+                if closing == -1:
+                    self.block_end = end
+                    self.comment += 1
+                    return
+                rest = line[closing + len(end):].strip()
+                if rest:
+                    self._classify(rest)
+                else:
+                    self.comment += 1
+                return
+        if line.startswith(self.line_markers):
+            self.comment += 1
+            return
+        self.code += 1
+        for start, end, inline in self.blocks:
+            if not inline:
+                continue
+            position = line.find(start)
+            if position != -1 and line.find(end, position + len(start)) == -1:
+                self.block_end = end
+                return
+
+
+def count_blob(reader: GitObjectReader, sha: str, language: str) -> Optional[List[Any]]:
+    """分块读取一个 blob 并分类计数；含 NUL 字节的二进制文件返回 None。
+
+    返回 [代码, 注释, 空行]；文件开头像生成或压缩文件时追加第四项原因，是否跳过由调用方结合路径规则决定。
+    """
+    counter = LineCounter(language)
+    reason = None
+    chunks = reader.iter_blob(sha, LanguageStats.CHUNK_BYTES)
+    try:
+        for index, chunk in enumerate(chunks):
+            if index == 0:
+                if b'\0' in chunk[:8192]:
+                    return None
+                reason = GeneratedFileDetector.classify_content(chunk[:GeneratedFileDetector.HEAD_BYTES], language)
+            counter.feed(chunk)
+    finally:
+        chunks.close()
+    counts = counter.finish()
+    return counts + [reason] if reason else counts
+
+
+# === 进程池工作函数（模块级，可被 pickle） ===
+
+_WORKER_READER: Optional[GitObjectReader] = None
+
+
+def _init_worker(repo_path: str, commit_sha: str) -> None:
+    # fork 出的子进程会继承父进程的读取器注册表（共用 cat-file 管道），这里必须新建独立的读取器
+    global _WORKER_READER
+    _WORKER_READER = GitObjectReader(repo_path, commit_sha)
+
+
+def _count_batch(items: List[Tuple[str, str]]) -> Dict[str, Optional[List[Any]]]:
+    return {f"{sha}:{language}": count_blob(_WORKER_READER, sha, language) for sha, language in items}
+
+
+class LanguageStats:
+    """全仓库的语言与代码行统计（类似 cloc）：对某个 ref 中的每个已跟踪文件统计代码、注释和空行。
+
+    文件列表和内容都来自 git 对象库；按 (blob SHA, 语言) 缓存计数结果，
+    未缓存的 blob 按批分发到进程池，每个工作进程使用自己的 cat-file 进程分块读取。
+    """
+
+    # v2：计数结果带有内容判断的生成/压缩标记
+    CACHE_FILE: ClassVar[str] = "gitseek-loc-cache-v2.json"
+    CHUNK_BYTES: ClassVar[int] = 1 << 20
+    BATCH_FILES: ClassVar[int] = 256
+    BATCH_BYTES: ClassVar[int] = 16 * 1024 * 1024
+    # 未缓存的文件少于该数量时直接在当前进程统计，避免进程池的启动开销
+    INLINE_THRESHOLD: ClassVar[int] = 200
+
+    EXTRA_EXTENSIONS: ClassVar[Dict[str, str]] = {
+        '.json': 'JSON', '.yaml': 'YAML', '.yml': 'YAML', '.toml': 'TOML', '.xml': 'XML',
+        '.md': 'Markdown', '.markdown': 'Markdown', '.rst': 'reStructuredText', '.mk': 'Makefile',
+        '.hh': 'C++', '.zsh': 'Shell', '.pyi': 'Python', '.mm': 'Objective-C', '.htm': 'HTML'
+    }
+    FILENAMES: ClassVar[Dict[str, str]] = {'Makefile': 'Makefile', 'GNUmakefile': 'Makefile',
+                                           'Dockerfile': 'Dockerfile', 'CMakeLists.txt': 'CMake'}
+
+    def __init__(self, repo_path: str, ref: str = "HEAD"):
+        self.repo_path = repo_path
+        self.ref = ref or "HEAD"
+
+    @classmethod
+    def detect_language(cls, path: str) -> str:
+        name = path.rsplit('/', 1)[-1]
+        if name in cls.FILENAMES:
+            return cls.FILENAMES[name]
+        dot = name.rfind('.')
+        ext = name[dot:].lower() if dot > 0 else ''
+        return RepoInventory.LANGUAGE_EXTENSIONS.get(ext) or cls.EXTRA_EXTENSIONS.get(ext, '')
+
+    def compute(self, workers: int = 0, include_generated: bool = False) -> Dict[str, Any]:
+        """统计所有文件并按语言汇总；workers 为 0 时使用 CPU 核数。
+
+        生成的、第三方和压缩的文件默认不计入（计入 generated_files）：路径命中的不读取内容。
+        """
+        reader = get_object_reader(self.repo_path, self.ref)
+        detector = get_tree_detector(reader)
+        cache_path = blob_cache_path(self.repo_path, self.CACHE_FILE)
+        cache = load_blob_cache(cache_path)
+
+        files: List[Tuple[str, str, str]] = []
+        pending: Dict[str, Tuple[str, str, int]] = {}
+        skipped = 0
+        generated = 0
+        for entry in reader.list_tree():
+            language = self.detect_language(entry["path"])
+            if not language or entry["mode"] in ('120000', '160000'):
+                skipped += 1
+                continue
+            if not include_generated and detector.classify_path(entry["path"]):
+                generated += 1
+                continue
+            key = f"{entry['sha']}:{language}"
+            files.append((entry["path"], language, key))
+            if lookup(cache, key) is None and key not in pending:
+                pending[key] = (entry["sha"], language, entry["size"])
+
+        if pending:
+            cache.update(self._count_pending(reader, list(pending.values()), workers))
+            save_blob_cache(cache_path, cache)
+
+        records = []
+        for path, language, key in files:
+            counts = cache.get(key)
+            if counts is not None and not include_generated and \
+                    detector.resolve(path, counts[3] if len(counts) > 3 else None):
+                generated += 1
+                continue
+            records.append((language, counts))
+        summary = self.aggregate(records)
+        binary = summary.pop("binary_files")
+        return {
+            "ref": self.ref,
+            "commit_sha": reader.commit_sha,
+            **summary,
+            "files_skipped": skipped + binary,
+            "generated_files": generated,
+            "computed": len(pending),
+            "cached": sum(1 for _, _, key in files if key not in pending)
+        }
+
+    @staticmethod
+    def aggregate(records: Iterable[Tuple[str, Optional[List[int]]]]) -> Dict[str, Any]:
+        """按语言汇总 (语言, [代码, 注释, 空行]) 记录；计数为 None 的（二进制文件）只计入 binary_files"""
+        totals: Dict[str, List[int]] = {}
+        binary = 0
+        for language, counts in records:
+            if counts is None:
+                binary += 1
+                continue
+            record = totals.setdefault(language, [0, 0, 0, 0])
+            record[0] += 1
+            record[1] += counts[0]
+            record[2] += counts[1]
+            record[3] += counts[2]
+
+        languages = [
+            {"language": language, "files": r[0], "code": r[1], "comment": r[2], "blank": r[3],
+             "lines": r[1] + r[2] + r[3]}
+            for language, r in sorted(totals.items(), key=lambda item: item[1][1], reverse=True)
+        ]
+        total_code = sum(item["code"] for item in languages)
+        for item in languages:
+            item["code_share"] = round(item["code"] / total_code * 100, 1) if total_code else 0.0
+        programming = [item for item in languages if item["language"] in RepoInventory.LANGUAGE_EXTENSIONS.values()]
+        return {
+            "primary_language": (programming or languages or [{"language": ""}])[0]["language"],
+            "languages": languages,
+            "totals": {
+                "files": sum(item["files"] for item in languages),
+                "code": total_code,
+                "comment": sum(item["comment"] for item in languages),
+                "blank": sum(item["blank"] for item in languages)
+            },
+            "binary_files": binary
+        }
+
+    def _count_pending(self, reader: GitObjectReader, pending: List[Tuple[str, str, int]],
+                       workers: int) -> Dict[str, Optional[List[Any]]]:
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(pending) < self.INLINE_THRESHOLD:
+            return {f"{sha}:{language}": count_blob(reader, sha, language) for sha, language, _ in pending}
+
+        # 按文件数和字节数切批，大文件优先分发，减少尾部等待
+        batches: List[List[Tuple[str, str]]] = [[]]
+        batch_bytes = 0
+        for sha, language, size in sorted(pending, key=lambda item: item[2], reverse=True):
+            if batches[-1] and (len(batches[-1]) >= self.BATCH_FILES or batch_bytes + size > self.BATCH_BYTES):
+                batches.append([])
+                batch_bytes = 0
+            batches[-1].append((sha, language))
+            batch_bytes += size
+
+        results: Dict[str, Optional[List[Any]]] = {}
+        with ProcessPoolExecutor(max_workers=min(workers, len(batches)), initializer=_init_worker,
+                                 initargs=(reader.repo_path, reader.commit_sha)) as executor:
+            for batch_result in executor.map(_count_batch, batches):
+                results.update(batch_result)
+        return results
+
+
+class LanguageStatsInput(BaseModel):
+    """Input schema for LanguageStatsAnalyzer."""
+    repo_path: str = Field(..., description="本地仓库路径（克隆目录、worktree 或裸镜像）")
+    ref: str = Field(default="HEAD", description="要统计的分支/标签/提交")
+    workers: int = Field(default=0, description="并行进程数，0 表示使用 CPU 核数")
+    include_generated: bool = Field(default=False, description="是否统计生成的、第三方（vendored）或压缩的文件（默认不计入）")
+
+
+class LanguageStatsAnalyzer(BaseTool):
+    name: str = "Language Statistics"
+    description: str = """统计仓库中每个已跟踪文件的代码行、注释行和空行（类似 cloc），按语言汇总并给出主要语言。
+    结果按文件内容哈希缓存，再次统计时只处理变化的文件。"""
+    args_schema: Type[BaseModel] = LanguageStatsInput
+
+    def _run(self, repo_path: str, ref: str = "HEAD", workers: int = 0,
+             include_generated: bool = False) -> Dict[str, Any]:
+        try:
+            if not os.path.isdir(repo_path):
+                return {"success": False, "error": f"仓库目录不存在: {repo_path}"}
+            return {"success": True, "repo_path": repo_path, **LanguageStats(repo_path, ref).compute(workers, include_generated)}
+        except Exception as e:
+            return {"success": False, "error": f"语言统计失败: {str(e)}"}
@@ -0,0 +1,141 @@
+# LineIndex.py
+from typing import Optional, Tuple, Union
+from array import array
+import threading
+import weakref
+import bisect
+import os
+
+
+class LineIndex:
+    """行号 -> 字节偏移的索引，按需（惰性）构建，不解码文件内容。
+
+    以 BLOCK_BYTES 为块记录“块之前的换行数”（bytes.count，C 速度），定位某一行时
+    二分找到所在块，把该块读出一次后在块内定位换行；只扫描到请求的行为止，
+    因此读取大文件中间的一段窗口不需要处理其后的内容。
+    """
+
+    BLOCK_BYTES = 8192
+
+    def __init__(self, buffer: Union[bytes, 'PreadBuffer']):
+        self._buffer = buffer
+        self.size = len(buffer)
+        # _newlines_before[i]：第 i 块之前的换行总数；最后一项为已扫描部分的换行总数
+        self._newlines_before = array('Q', [0])
+        self._scanned = 0
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        return self._scanned >= self.size
+
+    def _scan_until(self, newlines: int) -> None:
+        """向后扫描，直到已知的换行数达到 newlines 或到达文件末尾"""
+        with self._lock:
+            buffer, counts = self._buffer, self._newlines_before
+            while counts[-1] < newlines and self._scanned < self.size:
+                end = min(self._scanned + self.BLOCK_BYTES, self.size)
+                counts.append(counts[-1] + buffer[self._scanned:end].count(b'\n'))
+                self._scanned = end
+
+    def offset(self, line: int) -> int:
+        """第 line 行（从 0 开始）的起始字节偏移；超出文件末尾时返回文件大小"""
+        if line <= 0:
+            return 0
+        self._scan_until(line)
+        counts = self._newlines_before
+        if counts[-1] < line:
+            return self.size
+        # 第 line 个换行所在的块：counts[block] < line <= counts[block + 1]
+        block = bisect.bisect_left(counts, line) - 1
+        start = block * self.BLOCK_BYTES
+        # 整块只读一次（PreadBuffer 每次切片都是一次 pread），之后在 bytes 上查找
+        data = self._buffer[start:start + self.BLOCK_BYTES]
+        position = 0
+        for _ in range(line - counts[block]):
+            position = data.find(b'\n', position) + 1
+        return start + position
+
+    def span(self, start: int, end: int) -> Tuple[int, int]:
+        """[start, end) 行（从 0 开始）对应的字节范围"""
+        return self.offset(start), self.offset(end)
+
+    def line_count(self) -> int:
+        """总行数（会扫描整个文件；末尾没有换行的最后一行也计入）"""
+        self._scan_until(self.size + 1)
+        total = self._newlines_before[-1]
+        if self.size and self._buffer[self.size - 1:self.size] != b'\n':
+            total += 1
+        return total
+
+    def known_line_count(self) -> Optional[int]:
+        """已完整扫描时返回总行数，否则返回 None（不触发扫描）"""
+        return self.line_count() if self.complete else None
+
+
+class PreadBuffer:
+    """大文件的只读字节视图：切片时用 os.pread 按需读取，不整体读入也不做内存映射。
+
+    mmap 映射的文件被其他进程截断后，访问超出新长度的页会触发 SIGBUS 使整个进程崩溃；
+    pread 在同样情况下只返回较短（或空）的数据。长度固定为打开时的文件大小，
+    支持 LineIndex / ContentSniffer / ManifestParser 用到的 len()、切片和 find()。
+    """
+
+    FIND_CHUNK = 64 * 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        # 对象被回收（缓存淘汰）时关闭文件描述符
+        self._finalizer = weakref.finalize(self, os.close, self._fd)
+        self.size = os.fstat(self._fd).st_size
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[int, bytes]:
+        if isinstance(key, int):
+            index = key + self.size if key < 0 else key
+            data = self._read(index, 1) if 0 <= index < self.size else b''
+            if not data:
+                raise IndexError("index out of range")
+            return data[0]
+        start, stop, step = key.indices(self.size)
+        if step != 1:
+            raise ValueError("PreadBuffer 不支持步长切片")
+        return self._read(start, stop - start) if stop > start else b''
+
+    def find(self, sub: bytes, start: int = 0, end: Optional[int] = None) -> int:
+        end = self.size if end is None else min(end, self.size)
+        position = max(0, start)
+        # 相邻块重叠 len(sub) - 1 字节，跨块的匹配不会遗漏
+        overlap = max(0, len(sub) - 1)
+        while position < end:
+            chunk = self._read(position, min(self.FIND_CHUNK + overlap, end - position))
+            if not chunk:
+                break
+            found = chunk.find(sub)
+            if found >= 0:
+                return position + found
+            position += max(1, len(chunk) - overlap)
+        return -1
+
+    def _read(self, offset: int, length: int) -> bytes:
+        """读取 [offset, offset + length)；文件被截断时返回实际读到的部分"""
+        if not hasattr(os, 'pread'):
+            with self._lock:
+                os.lseek(self._fd, offset, os.SEEK_SET)
+                return os.read(self._fd, length)
+        parts = []
+        while length > 0:
+            data = os.pread(self._fd, length, offset)
+            if not data:
+                break
+            parts.append(data)
+            offset += len(data)
+            length -= len(data)
+        return b''.join(parts)
+
+    def close(self) -> None:
+        self._finalizer()
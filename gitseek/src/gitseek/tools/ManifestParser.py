@@ -0,0 +1,621 @@
+# ManifestParser.py
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Union
+import xml.etree.ElementTree as ET
+import tomllib
+import codecs
+import mmap
+import json
+import re
+import io
+import os
+
+
+class ChunkReader(io.RawIOBase):
+    """把字节块迭代器包装成只读文件对象（供 ElementTree.iterparse 使用）"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(target), len(self._pending))
+        target[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class JsonStream:
+    """从字节块流中按结构逐层读取 JSON：对象成员、数组元素逐个解码，内存中只保留当前缓冲区和当前成员的值。
+
+    用法：members() 逐个产出对象的键，调用方随后必须用 value() / skip() / members() / items()
+    消费该键对应的值；items() 对数组同理。
+    """
+
+    CHUNK_CHARS = 1 << 20
+    _WHITESPACE = re.compile(r'[ \t\r\n]*')
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')('replace')
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> None:
+        """丢弃已消费的部分，至少追加与当前缓冲区等量的新内容（重试解码大值时总开销保持线性）"""
+        buffer = self._buffer[self._pos:]
+        self._pos = 0
+        wanted, added, parts = max(self.CHUNK_CHARS, len(buffer)), 0, [buffer]
+        while added < wanted:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                parts.append(self._decoder.decode(b'', final=True))
+                self._eof = True
+                break
+            text = self._decoder.decode(bytes(chunk))
+            parts.append(text)
+            added += len(text)
+        self._buffer = ''.join(parts)
+
+    def peek(self) -> str:
+        """跳过空白，返回下一个字符（流结束时返回空串）"""
+        while True:
+            self._pos = self._WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._eof:
+                return ''
+            self._fill()
+
+    def _expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"JSON 格式错误：位置 {self._pos} 处应为 '{char}'")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """完整解码下一个值"""
+        while True:
+            self.peek()
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+                # 恰好在缓冲区末尾结束的数字可能被截断，读入更多内容后重试
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def members(self) -> Iterator[str]:
+        self._expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+            separator = self.peek()
+            self._pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"JSON 格式错误：位置 {self._pos - 1} 处应为 ',' 或 '}}'")
+
+    def items(self) -> Iterator[None]:
+        self._expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield None
+            separator = self.peek()
+            self._pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"JSON 格式错误：位置 {self._pos - 1} 处应为 ',' 或 ']'")
+
+    def skip(self) -> None:
+        """跳过下一个值：对象和数组逐层跳过，不整体解码"""
+        start = self.peek()
+        if start == '{':
+            for _ in self.members():
+                self.skip()
+        elif start == '[':
+            for _ in self.items():
+                self.skip()
+        else:
+            self.value()
+
+
+class ManifestParser:
+    """依赖清单与锁文件解析：始终解析完整文件，与 FileContentReader 的预览行数无关。
+
+    输入是字节块迭代器（工作区文件、git blob 或缓存中的内容按块读取），大型 JSON 锁文件用 JsonStream
+    逐个成员解码，pom.xml 用 iterparse 边读边丢弃已处理的元素，TOML 锁文件和 go.sum 逐行扫描，
+    因此几十 MB 的 package-lock.json 也只占用有限内存。
+    """
+
+    CHUNK_BYTES = 1 << 20
+    # 锁文件中逐个列出的包数量上限（计数始终覆盖全部）
+    MAX_LISTED = 200
+    PARSERS = {
+        'package.json': '_parse_package_json',
+        'package-lock.json': '_parse_package_lock',
+        'npm-shrinkwrap.json': '_parse_package_lock',
+        'requirements.txt': '_parse_requirements_txt',
+        'pyproject.toml': '_parse_pyproject_toml',
+        'poetry.lock': '_parse_toml_lock',
+        'uv.lock': '_parse_toml_lock',
+        'cargo.toml': '_parse_cargo_toml',
+        'cargo.lock': '_parse_toml_lock',
+        'go.mod': '_parse_go_mod',
+        'go.sum': '_parse_go_sum',
+        'pom.xml': '_parse_pom_xml',
+        'dockerfile': '_parse_docker_file',
+        'docker-compose.yml': '_parse_docker_file',
+        'docker-compose.yaml': '_parse_docker_file',
+    }
+    LOCKFILE_TYPES = {'poetry.lock': 'poetry_lockfile', 'uv.lock': 'uv_lockfile', 'cargo.lock': 'rust_cargo_lockfile'}
+    _REQUIREMENT_NAME = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+    _TOML_STRING = re.compile(r'^([A-Za-z0-9_-]+)\s*=\s*"((?:[^"\\]|\\.)*)"')
+    _TOML_TABLE = re.compile(r'^\[\[?\s*[A-Za-z0-9_.\-"\' ]+\]\]?\s*(#.*)?$')
+    _TOML_INT = re.compile(r'^([A-Za-z0-9_-]+)\s*=\s*(\d+)\s*$')
+    _MAVEN_PROPERTY = re.compile(r'\$\{([^}]+)\}')
+
+    # === 入口 ===
+
+    @classmethod
+    def supports(cls, file_path: str) -> bool:
+        return os.path.basename(file_path).lower() in cls.PARSERS
+
+    @classmethod
+    def parse_chunks(cls, file_path: str, chunks: Iterable[bytes]) -> Optional[Dict[str, Any]]:
+        """按文件名选择解析器；不支持的文件返回 None，解析失败返回 {"parse_error": ...}"""
+        filename = os.path.basename(file_path).lower()
+        method = cls.PARSERS.get(filename)
+        if method is None:
+            return None
+        try:
+            return getattr(cls, method)(chunks, filename)
+        except Exception as e:
+            return {"parse_error": str(e)}
+
+    @classmethod
+    def parse_file(cls, path: str) -> Optional[Dict[str, Any]]:
+        if not cls.supports(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return cls.parse_chunks(path, iter(lambda: f.read(cls.CHUNK_BYTES), b''))
+        except OSError as e:
+            return {"parse_error": str(e)}
+
+    @classmethod
+    def parse_blob(cls, reader, path: str, sha: str) -> Optional[Dict[str, Any]]:
+        """流式解析 git blob（reader 为 GitObjectReader）"""
+        if not cls.supports(path):
+            return None
+        chunks = reader.iter_blob(sha, cls.CHUNK_BYTES)
+        try:
+            return cls.parse_chunks(path, chunks)
+        finally:
+            chunks.close()
+
+    @classmethod
+    def parse_buffer(cls, path: str, buffer: Union[bytes, mmap.mmap]) -> Optional[Dict[str, Any]]:
+        """解析已在内存或已映射的内容（如 ContentCache 的条目），按块切片，不整体解码"""
+        step = cls.CHUNK_BYTES
+        return cls.parse_chunks(path, (buffer[i:i + step] for i in range(0, len(buffer), step)))
+
+    @classmethod
+    def parse_text(cls, path: str, text: str) -> Optional[Dict[str, Any]]:
+        return cls.parse_chunks(path, [text.encode('utf-8')])
+
+    # === 辅助方法 ===
+
+    @staticmethod
+    def _iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+        """逐行解码字节块（UTF-8，可带 BOM）"""
+        decoder = codecs.getincrementaldecoder('utf-8-sig')('replace')
+        pending = ''
+        for chunk in chunks:
+            lines = (pending + decoder.decode(bytes(chunk))).split('\n')
+            pending = lines.pop()
+            yield from lines
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+
+    @staticmethod
+    def _read_text(chunks: Iterable[bytes]) -> str:
+        """小型清单（package.json 之外的 TOML、Dockerfile 等）整体解码"""
+        return b''.join(bytes(chunk) for chunk in chunks).decode('utf-8-sig', errors='replace')
+
+    @classmethod
+    def _listed(cls, packages: List[str]) -> Dict[str, Any]:
+        packages = sorted(packages)
+        return {"packages": packages[:cls.MAX_LISTED], "packages_truncated": len(packages) > cls.MAX_LISTED}
+
+    # === Node.js ===
+
+    @classmethod
+    def _parse_package_json(cls, chunks: Iterable[bytes], filename: str) -> Dict[str, Any]:
+        """解析 package.json：只解码需要的字段，其余成员流式跳过"""
+        fields = {"name", "version", "description", "private", "dependencies", "devDependencies",
+                  "peerDependencies", "optionalDependencies", "scripts", "workspaces"}
+        data = {}
+        stream = JsonStream(chunks)
+        for key in stream.members():
+            if key in fields:
+                data[key] = stream.value()
+            else:
+                stream.skip()
+        workspaces = data.get("workspaces")
+        if isinstance(workspaces, dict):  # yarn 的 {"packages": [...]} 写法
+            workspaces = workspaces.get("packages")
+        return {
+            "type": "nodejs_package",
+            "name": data.get("name"),
+            "version": data.get("version"),
+            "description": data.get("description"),
+            "private": bool(data.get("private", False)),
+            "dependencies": data.get("dependencies") or {},
+            "devDependencies": data.get("devDependencies") or {},
+            "peerDependencies": data.get("peerDependencies") or {},
+            "optionalDependencies": data.get("optionalDependencies") or {},
+            "scripts": data.get("scripts") or {},
+            "workspaces": workspaces or []
+        }
+
+    @classmethod
+    def _parse_package_lock(cls, chunks: Iterable[bytes], filename: str) -> Dict[str, Any]:
+        """解析 package-lock.json / npm-shrinkwrap.json（v1 的 dependencies 树和 v2/v3 的 packages 表）。
+
+        packages 表逐个条目解码；v2 中冗余的 dependencies 树在已读到 packages 后流式跳过。
+        """
+        result: Dict[str, Any] = {"type": "npm_lockfile", "file": filename, "name": None, "version": None,
+                                  "lockfile_version": None}
+        packages: List[str] = []
+        counts = {"dev": 0, "optional": 0}
+        direct: Dict[str, Any] = {}
+        seen_packages = False
+
+        def record(name: str, entry: Dict[str, Any]) -> None:
+            packages.append(f"{name}@{entry.get('version', '')}")
+            counts["dev"] += bool(entry.get("dev"))
+            counts["optional"] += bool(entry.get("optional"))
+
+        def walk_v1(name: str, entry: Dict[str, Any]) -> None:
+            record(name, entry)
+            for child_name, child in (entry.get("dependencies") or {}).items():
+                walk_v1(child_name, child)
+
+        stream = JsonStream(chunks)
+        for key in stream.members():
+            if key in ("name", "version"):
+                result[key] = stream.value()
+            elif key == "lockfileVersion":
+                result["lockfile_version"] = stream.value()
+            elif key == "packages":
+                seen_packages = True
+                for path in stream.members():
+                    entry = stream.value()
+                    if not path:
+                        # 根项目自身：记录直接依赖
+                        for field in ("dependencies", "devDependencies", "optionalDependencies"):
+                            if entry.get(field):
+                                direct[field] = entry[field]
+                        continue
+                    if entry.get("link"):
+                        continue  # workspace 链接，目标目录另有条目
+                    # node_modules 之外的条目是 workspace 中的本地包
+                    name = path.rpartition('node_modules/')[2] if 'node_modules/' in path else entry.get("name", path)
+                    record(name, entry)
+            elif key == "dependencies" and not seen_packages and result["lockfile_version"] in (None, 1):
+                for name in stream.members():
+                    walk_v1(name, stream.value())
+            else:
+                stream.skip()
+
+        result.update({
+            "package_count": len(packages),
+            "unique_packages": len({p.rpartition('@')[0] for p in packages}),
+            "dev_package_count": counts["dev"],
+            "optional_package_count": counts["optional"],
+            "direct_dependencies": direct,
+            **cls._listed(packages)
+        })
+        return result
+
+    # === Python / Rust（TOML） ===
+
+    @classmethod
+    def _parse_requirements_txt(cls, chunks: Iterable[bytes], filename: str) -> Dict[str, Any]:
+        """解析 requirements.txt：支持行尾注释、续行、extras、环境标记，以及 -r / -e 等选项行"""
+        dependencies, includes = [], []
+        pending = ''
+        for raw in cls._iter_lines(chunks):
+            line = pending + raw.split(' #', 1)[0].strip()
+            if line.endswith('\\'):
+                pending = line[:-1] + ' '
+                continue
+            pending = ''
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith(('-r ', '--requirement ', '-c ', '--constraint ')):
+                includes.append(line.split(None, 1)[1])
+                continue
+            if line.startswith('-'):
+                continue  # -e / --index-url 等选项
+            match = cls._REQUIREMENT_NAME.match(line)
+            if match:
+                dependencies.append(match.group(1))
+        return {
+            "type": "python_requirements",
+            "dependencies": dependencies,
+            "total_dependencies": len(dependencies),
+            "includes": includes
+        }
+
+    @classmethod
+    def _parse_pyproject_toml(cls, chunks: Iterable[bytes], filename: str) -> Dict[str, Any]:
+        data = tomllib.loads(cls._read_text(chunks))
+        result: Dict[str, Any] = {"type": "python_pyproject"}
+        project = data.get('project')
+        if project:
+            result.update({
+                "name": project.get('name'),
+                "version": project.get('version'),
+                "dependencies": project.get('dependencies', []),
+                "optional_dependencies": project.get('optional-dependencies', {})
+            })
+        groups = data.get('dependency-groups')
+        if groups:
+            result["devDependencies"] = [item for items in groups.values() for item in items if isinstance(item, str)]
+        poetry = data.get('tool', {}).get('poetry')
+        if poetry:
+            result.update({
+                "name": poetry.get('name'),
+                "version": poetry.get('version'),
+                "dependencies": poetry.get('dependencies', {})
+            })
+            dev = dict(poetry.get('dev-dependencies', {}))
+            for group in poetry.get('group', {}).values():
+                dev.update(group.get('dependencies', {}))
+            if dev:
+                result["devDependencies"] = dev
+        return result
+
+    @classmethod
+    def _parse_cargo_toml(cls, chunks: Iterable[bytes], filename: str) -> Dict[str, Any]:
+        data = tomllib.loads(cls._read_text(chunks))
+        return {
+            "type": "rust_cargo",
+            "package": data.get('package', {}),
+            "dependencies": data.get('dependencies', {}),
+            "devDependencies": data.get('dev-dependencies', {}),
+            "workspace_members": data.get('workspace', {}).get('members', [])
+        }
+
+    @classmethod
+    def _parse_toml_lock(cls, chunks: Iterable[bytes], filename: str) -> Dict[str, Any]:
+        """逐行扫描 poetry.lock / uv.lock / Cargo.lock 中的 [[package]] 表，不整体解析 TOML"""
+        packages: List[str] = []
+        dev_count = 0
+        lock_version = None
+        current: Optional[Dict[str, Any]] = None
+        in_header = True  # 第一个表之前的顶层键（uv.lock / Cargo.lock 的 version）
+
+        def finish(package: Optional[Dict[str, Any]]) -> None:
+            nonlocal dev_count
+            if package and package.get("name"):
+                packages.append(f"{package['name']}@{package.get('version', '')}")
+                dev_count += package.get("category") == "dev"
+
+        for raw in cls._iter_lines(chunks):
+            line = raw.strip()
+            if cls._TOML_TABLE.match(line):
+                in_header = False
+                finish(current)
+                current = {} if line.split('#')[0].strip() == '[[package]]' else None
+                continue
+            if in_header:
+                match = cls._TOML_INT.match(line)
+                if match and match.group(1) == 'version':
+                    lock_version = int(match.group(2))
+                continue
+            if current is None:
+                continue
+            match = cls._TOML_STRING.match(line)
+            if match and match.group(1) in ("name", "version", "category"):
+                current[match.group(1)] = match.group(2)
+        finish(current)
+
+        result = {"type": cls.LOCKFILE_TYPES[filename], "package_count": len(packages), **cls._listed(packages)}
+        if lock_version is not None:
+            result["lock_version"] = lock_version
+        if dev_count:
+            result["dev_package_count"] = dev_count
+        return result
+
+    # === Go ===
+
+    @classmethod
+    def _parse_go_mod(cls, chunks: Iterable[bytes], filename: str) -> Dict[str, Any]:
+        """解析 go.mod：单行和块形式（require ( ... )）的 require / replace / exclude，区分 // indirect"""
+        result: Dict[str, Any] = {"type": "go_module", "module_name": None, "go_version": None, "toolchain": None}
+        direct, indirect, replaces, excludes = [], [], [], []
+        block = None
+        for raw in cls._iter_lines(chunks):
+            code, _, comment = raw.partition('//')
+            tokens = code.split()
+            if not tokens:
+                continue
+            if block is not None:
+                if tokens[0] == ')':
+                    block = None
+                    continue
+                verb = block
+            else:
+                verb, tokens = tokens[0], tokens[1:]
+                if tokens == ['(']:
+                    block = verb
+                    continue
+            args = [t.strip('"') for t in tokens]
+            if verb == 'module' and args:
+                result["module_name"] = args[0]
+            elif verb == 'go' and args:
+                result["go_version"] = args[0]
+            elif verb == 'toolchain' and args:
+                result["toolchain"] = args[0]
+            elif verb == 'require' and len(args) >= 2:
+                entry = {"module": args[0], "version": args[1]}
+                (indirect if 'indirect' in comment else direct).append(entry)
+            elif verb == 'replace' and '=>' in args:
+                arrow = args.index('=>')
+                replaces.append({"old": " ".join(args[:arrow]), "new": " ".join(args[arrow + 1:])})
+            elif verb == 'exclude' and len(args) >= 2:
+                excludes.append({"module": args[0], "version": args[1]})
+        result.update({"dependencies": direct, "indirect_dependencies": indirect,
+                       "replace": replaces, "exclude": excludes})
+        return result
+
+    @classmethod
+    def _parse_go_sum(cls, chunks: Iterable[bytes], filename: str) -> Dict[str, Any]:
+        """解析 go.sum：每个模块版本通常有内容和 /go.mod 两条校验记录，只按模块版本计数"""
+        versions = set()
+        entries = 0
+        for line in cls._iter_lines(chunks):
+            parts = line.split()
+            if len(parts) < 3:
+                continue
+            entries += 1
+            versions.add(f"{parts[0]}@{parts[1].removesuffix('/go.mod')}")
+        return {
+            "type": "go_sum",
+            "entries": entries,
+            "module_count": len({v.rpartition('@')[0] for v in versions}),
+            "package_count": len(versions),
+            **cls._listed(list(versions))
+        }
+
+    # === Java ===
+
+    @classmethod
+    def _parse_pom_xml(cls, chunks: Iterable[bytes], filename: str) -> Dict[str, Any]:
+        """用 iterparse 流式解析 pom.xml：项目坐标、parent、modules、properties 和依赖（test 作用域归入 devDependencies）"""
+        path: List[str] = []
+        project: Dict[str, str] = {}
+        parent: Dict[str, str] = {}
+        properties: Dict[str, str] = {}
+        modules: List[str] = []
+        dependencies: List[Dict[str, str]] = []
+        managed = 0
+        current: Optional[Dict[str, str]] = None
+
+        for event, element in ET.iterparse(ChunkReader(chunks), events=('start', 'end')):
+            tag = element.tag.rpartition('}')[2]
+            if event == 'start':
+                path.append(tag)
+                if tuple(path) in (('project', 'dependencies', 'dependency'),
+                                   ('project', 'dependencyManagement', 'dependencies', 'dependency')):
+                    current = {}
+                continue
+
+            text = (element.text or '').strip()
+            location = tuple(path)
+            if len(location) == 2 and location[0] == 'project':
+                if tag in ('groupId', 'artifactId', 'version', 'packaging', 'name', 'description'):
+                    project[tag] = text
+            elif location[:2] == ('project', 'parent') and len(location) == 3:
+                parent[tag] = text
+            elif location[:2] == ('project', 'properties') and len(location) == 3:
+                properties[tag] = text
+            elif location == ('project', 'modules', 'module'):
+                modules.append(text)
+            elif current is not None and location[-2] == 'dependency':
+                if tag != 'exclusions':
+                    current[tag] = text
+            elif current is not None and tag == 'dependency':
+                if location[1] == 'dependencies':
+                    dependencies.append(current)
+                else:
+                    managed += 1
+                current = None
+            path.pop()
+            if len(path) <= 2:
+                element.clear()  # 已处理完的子树释放内存
+
+        group_id = project.get('groupId') or parent.get('groupId')
+        version = project.get('version') or parent.get('version')
+        properties.update({"project.groupId": group_id or '', "project.version": version or '',
+                           "project.artifactId": project.get('artifactId', ''),
+                           "project.parent.version": parent.get('version', '')})
+
+        def resolve(value: Optional[str]) -> Optional[str]:
+            if not value:
+                return value
+            return cls._MAVEN_PROPERTY.sub(lambda m: properties.get(m.group(1), m.group(0)), value)
+
+        runtime, test = [], []
+        for dependency in dependencies:
+            item = {
+                "name": dependency.get('artifactId'),
+                "group_id": resolve(dependency.get('groupId')),
+                "artifact_id": dependency.get('artifactId'),
+                "version": resolve(dependency.get('version')),
+                "scope": dependency.get('scope', 'compile')
+            }
+            (test if item["scope"] == 'test' else runtime).append(item)
+
+        return {
+            "type": "java_maven",
+            "group_id": resolve(group_id),
+            "artifact_id": project.get('artifactId'),
+            "version": resolve(version),
+            "packaging": project.get('packaging', 'jar'),
+            "name": project.get('name'),
+            "parent": parent or None,
+            "modules": modules,
+            "dependencies": runtime,
+            "devDependencies": test,
+            "managed_dependency_count": managed
+        }
+
+    # === Docker ===
+
+    @classmethod
+    def _parse_docker_file(cls, chunks: Iterable[bytes], filename: str) -> Dict[str, Any]:
+        """Dockerfile 取 FROM 的基础镜像（跳过引用前面构建阶段的名称），docker-compose 取 image 字段"""
+        base_images, stages = [], set()
+        for line in cls._iter_lines(chunks):
+            stripped = line.strip()
+            if filename == 'dockerfile' and stripped.upper().startswith('FROM '):
+                parts = [p for p in stripped[5:].split() if not p.startswith('--')]
+                if not parts:
+                    continue
+                if len(parts) >= 3 and parts[1].upper() == 'AS':
+                    stages.add(parts[2].lower())
+                if parts[0] != 'scratch' and parts[0].lower() not in stages:
+                    base_images.append(parts[0])
+            elif filename != 'dockerfile' and stripped.startswith('image:'):
+                image = stripped[6:].strip().strip('"\'')
+                if image:
+                    base_images.append(image)
+        return {
+            "type": "docker",
+            "file_type": filename,
+            "base_images": base_images
+        }
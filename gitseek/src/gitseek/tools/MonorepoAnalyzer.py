@@ -0,0 +1,388 @@
+# MonorepoAnalyzer.py
+from crewai.tools import BaseTool
+from typing import Type, Dict, Any, List, Optional, Tuple, ClassVar, Iterable
+from pydantic import BaseModel, Field
+from concurrent.futures import ProcessPoolExecutor
+import re
+import os
+
+from .BlobCache import blob_cache_path, load_blob_cache, save_blob_cache, lookup
+from .GitObjectReader import GitObjectReader, get_object_reader
+from .IgnoreRules import IgnoreRules
+from .RepoInventory import RepoInventory
+from .GeneratedFileDetector import GeneratedFileDetector, get_tree_detector
+from .HotspotAnalyzer import HotspotAnalyzer
+from .LanguageStats import LanguageStats, count_blob
+from .LLMCodeSummarizer import LLMCodeSummarizer
+from .ManifestParser import ManifestParser
+
+
+# 标志子项目根目录的清单文件（小写文件名 -> 生态）
+PACKAGE_MANIFESTS: Dict[str, str] = {
+    'package.json': 'javascript', 'pyproject.toml': 'python', 'setup.py': 'python', 'setup.cfg': 'python',
+    'go.mod': 'go', 'cargo.toml': 'rust', 'pom.xml': 'java', 'build.gradle': 'java', 'build.gradle.kts': 'java',
+    'composer.json': 'php', 'gemfile': 'ruby', 'mix.exs': 'elixir', 'pubspec.yaml': 'dart'
+}
+# 需要解析依赖的文件（ManifestParser 支持的格式）；requirements.txt 本身不标志子项目
+DEPENDENCY_FILES: frozenset = frozenset({
+    'package.json', 'requirements.txt', 'pyproject.toml', 'go.mod', 'cargo.toml', 'pom.xml'
+})
+# 这些目录中的清单通常是测试样例，不视为子项目
+FIXTURE_DIRS: frozenset = frozenset(RepoInventory.TEST_DIRS | {'fixtures', 'testdata', '__fixtures__', 'test-fixtures'})
+
+
+def discover_packages(paths: Iterable[str], detector: Optional[GeneratedFileDetector] = None) -> List[Dict[str, Any]]:
+    """根据清单文件的位置发现子项目：每个含有清单的目录是一个子项目（根目录也可能是）。
+
+    跳过测试样例目录、第三方/生成目录中的清单。返回按路径排序的 [{"path", "manifests", "ecosystems"}]。
+    """
+    packages: Dict[str, Dict[str, Any]] = {}
+    for path in paths:
+        directory, _, name = path.rpartition('/')
+        ecosystem = PACKAGE_MANIFESTS.get(name.lower())
+        if ecosystem is None:
+            continue
+        if FIXTURE_DIRS.intersection(directory.lower().split('/')):
+            continue
+        if detector is not None and detector.classify_path(path):
+            continue
+        package = packages.setdefault(directory, {"path": directory, "manifests": [], "ecosystems": []})
+        package["manifests"].append(name)
+        if ecosystem not in package["ecosystems"]:
+            package["ecosystems"].append(ecosystem)
+    return [packages[key] for key in sorted(packages)]
+
+
+def owning_package(path: str, roots: frozenset) -> str:
+    """文件所属的子项目：向上查找最近的子项目根目录（找不到时归入根目录 ""）"""
+    directory = path.rpartition('/')[0]
+    while directory:
+        if directory in roots:
+            return directory
+        directory = directory.rpartition('/')[0]
+    return ""
+
+
+# === 进程池工作函数（模块级，可被 pickle） ===
+
+_WORKER_READER: Optional[GitObjectReader] = None
+
+
+def _init_worker(repo_path: str, commit_sha: str) -> None:
+    # 与 LanguageStats 相同：子进程必须使用自己的 cat-file 进程
+    global _WORKER_READER
+    _WORKER_READER = GitObjectReader(repo_path, commit_sha)
+
+
+def _analyze_package_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    return analyze_package_job(_WORKER_READER, job)
+
+
+def analyze_package_job(reader: GitObjectReader, job: Dict[str, Any]) -> Dict[str, Any]:
+    """计算一个子项目中未缓存的代码行和复杂度，并完整解析其依赖清单"""
+    summarizer = LLMCodeSummarizer()
+    loc = {f"{sha}:{language}": count_blob(reader, sha, language) for sha, language in job["loc"]}
+    complexity = {sha: HotspotAnalyzer.measure(path, reader.read_blob(sha), summarizer)
+                  for sha, path in job["complexity"]}
+    manifests = {}
+    for path, sha in job["manifests"]:
+        manifests[path] = ManifestParser.parse_blob(reader, path, sha) or {}
+    return {"index": job["index"], "loc": loc, "complexity": complexity, "manifests": manifests}
+
+
+class MonorepoAnalyzer:
+    """Monorepo 子项目分析：按清单文件位置划分子项目，逐个子项目统计结构、依赖和代码指标，再汇总。
+
+    文件列表和内容来自 git 对象库；代码行与复杂度沿用 LanguageStats / HotspotAnalyzer 按 blob 的缓存，
+    未缓存的部分以子项目为单位分发到进程池并行计算（每个工作进程使用自己的 cat-file 进程）。
+    """
+
+    # 未缓存的文件少于该数量时直接在当前进程计算
+    INLINE_THRESHOLD: ClassVar[int] = 200
+    TOP_COMPLEX_FILES: ClassVar[int] = 3
+    _REQUIREMENT_NAME = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+    def __init__(self, repo_path: str, ref: str = "HEAD"):
+        self.repo_path = repo_path
+        self.ref = ref or "HEAD"
+
+    def analyze(self, workers: int = 0, include_generated: bool = False) -> Dict[str, Any]:
+        reader = get_object_reader(self.repo_path, self.ref)
+        detector = get_tree_detector(reader)
+        # 树中只有已跟踪文件，仍应用默认排除（如提交进仓库的 node_modules）
+        ignore = IgnoreRules(self.repo_path, respect_gitignore=False)
+        entries = [e for e in reader.list_tree()
+                   if e["mode"] not in ('120000', '160000') and not ignore.is_path_ignored(e["path"])]
+
+        discovered, ordered = self._group(entries, detector)
+
+        complexity_path = blob_cache_path(self.repo_path, HotspotAnalyzer.CACHE_FILE)
+        loc_path = blob_cache_path(self.repo_path, LanguageStats.CACHE_FILE)
+        complexity_cache = load_blob_cache(complexity_path)
+        loc_cache = load_blob_cache(loc_path)
+
+        jobs = self._plan_jobs(ordered, detector, loc_cache, complexity_cache, include_generated)
+        manifests, computed = self._run_jobs(reader, jobs, workers, loc_cache, complexity_cache)
+        if computed:
+            save_blob_cache(complexity_path, complexity_cache)
+            save_blob_cache(loc_path, loc_cache)
+
+        return {
+            "ref": self.ref,
+            "commit_sha": reader.commit_sha,
+            **self._summarize(discovered, ordered, detector, loc_cache, complexity_cache, manifests,
+                              include_generated),
+            "computed": computed
+        }
+
+    def summarize(self, entries: List[Dict[str, Any]], detector: GeneratedFileDetector, loc_cache: Dict,
+                  complexity_cache: Dict, manifests: Dict[str, Dict[str, Any]],
+                  include_generated: bool = False) -> Dict[str, Any]:
+        """用调用方已有的文件列表、指标和清单解析结果划分并汇总子项目，不读取 git 对象、不计算缺失的指标。
+
+        entries 为 [{"path", "sha"}]（sha 只作为 loc_cache / complexity_cache 的键）；监听模式用工作区的实时数据调用。
+        """
+        discovered, ordered = self._group(entries, detector)
+        return self._summarize(discovered, ordered, detector, loc_cache, complexity_cache, manifests,
+                               include_generated)
+
+    @staticmethod
+    def _group(entries: List[Dict[str, Any]],
+               detector: GeneratedFileDetector) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """发现子项目并把文件分配到所属子项目，返回 (发现的子项目, 按路径排序的非空子项目)"""
+        discovered = discover_packages((e["path"] for e in entries), detector)
+        roots = frozenset(p["path"] for p in discovered)
+        packages = {p["path"]: {**p, "files": []} for p in discovered}
+        packages.setdefault("", {"path": "", "manifests": [], "ecosystems": [], "files": []})
+        for entry in entries:
+            packages[owning_package(entry["path"], roots)]["files"].append(entry)
+        ordered = [packages[key] for key in sorted(packages) if packages[key]["files"] or packages[key]["manifests"]]
+        return discovered, ordered
+
+    # === 任务划分与执行 ===
+
+    def _plan_jobs(self, packages: List[Dict[str, Any]], detector: GeneratedFileDetector, loc_cache: Dict,
+                   complexity_cache: Dict, include_generated: bool) -> List[Dict[str, Any]]:
+        """每个子项目一个任务，只包含缓存中没有的 blob；同一 blob 出现在多个子项目时只计算一次"""
+        extensions = tuple(LLMCodeSummarizer.LANGUAGE_EXTENSIONS.keys())
+        planned_loc, planned_complexity = set(), set()
+        jobs = []
+        for index, package in enumerate(packages):
+            job = {"index": index, "loc": [], "complexity": [], "manifests": [], "bytes": 0}
+            for entry in package["files"]:
+                path, sha = entry["path"], entry["sha"]
+                directory, _, name = path.rpartition('/')
+                if directory == package["path"] and name.lower() in DEPENDENCY_FILES:
+                    job["manifests"].append((path, sha))
+                if not include_generated and detector.classify_path(path):
+                    continue
+                language = LanguageStats.detect_language(path)
+                key = f"{sha}:{language}"
+                if language and key not in loc_cache and key not in planned_loc:
+                    planned_loc.add(key)
+                    job["loc"].append((sha, language))
+                    job["bytes"] += entry["size"]
+                cached = complexity_cache.get(sha)
+                if path.endswith(extensions) and entry["size"] <= HotspotAnalyzer.MAX_FILE_BYTES \
+                        and (cached is None or "generated" not in cached) and sha not in planned_complexity:
+                    planned_complexity.add(sha)
+                    job["complexity"].append((sha, path))
+                    job["bytes"] += entry["size"]
+            if job["loc"] or job["complexity"] or job["manifests"]:
+                jobs.append(job)
+        # 大任务优先分发，减少尾部等待
+        jobs.sort(key=lambda job: job["bytes"], reverse=True)
+        return jobs
+
+    def _run_jobs(self, reader: GitObjectReader, jobs: List[Dict[str, Any]], workers: int, loc_cache: Dict,
+                  complexity_cache: Dict) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        workers = workers or os.cpu_count() or 1
+        pending = sum(len(job["loc"]) + len(job["complexity"]) for job in jobs)
+        if workers <= 1 or len(jobs) <= 1 or pending < self.INLINE_THRESHOLD:
+            results = [analyze_package_job(reader, job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker,
+                                     initargs=(reader.repo_path, reader.commit_sha)) as executor:
+                results = list(executor.map(_analyze_package_job, jobs))
+
+        manifests: Dict[str, Dict[str, Any]] = {}
+        for result in results:
+            loc_cache.update(result["loc"])
+            complexity_cache.update(result["complexity"])
+            manifests.update(result["manifests"])
+        return manifests, pending
+
+    # === 汇总 ===
+
+    def _summarize(self, discovered: List[Dict[str, Any]], ordered: List[Dict[str, Any]],
+                   detector: GeneratedFileDetector, loc_cache: Dict, complexity_cache: Dict,
+                   manifests: Dict[str, Dict[str, Any]], include_generated: bool) -> Dict[str, Any]:
+        results = [self._summarize_package(package, detector, loc_cache, complexity_cache, manifests,
+                                           include_generated)
+                   for package in ordered]
+        self._link_internal_dependencies(results)
+        return {"is_monorepo": len(discovered) > 1, "packages": results, "rollup": self._rollup(results)}
+
+    def _summarize_package(self, package: Dict[str, Any], detector: GeneratedFileDetector, loc_cache: Dict,
+                           complexity_cache: Dict, manifests: Dict[str, Dict[str, Any]],
+                           include_generated: bool) -> Dict[str, Any]:
+        base = package["path"]
+        prefix_length = len(base) + 1 if base else 0
+        roles: Dict[str, int] = {}
+        directories = set()
+        records, complex_files = [], []
+        generated = 0
+        for entry in package["files"]:
+            path = entry["path"]
+            relative = path[prefix_length:]
+            if '/' in relative:
+                directories.add(relative.split('/', 1)[0])
+            name = relative.rsplit('/', 1)[-1]
+            dot = name.rfind('.')
+            ext = name[dot:].lower() if dot > 0 else ''
+            language = LanguageStats.detect_language(path)
+            parts = relative.lower().split('/')[:-1]
+            role = RepoInventory.classify(name, ext, RepoInventory.LANGUAGE_EXTENSIONS.get(ext, ''),
+                                          bool(RepoInventory.TEST_DIRS.intersection(parts)),
+                                          bool(RepoInventory.DOC_DIRS.intersection(parts)))
+            roles[role] = roles.get(role, 0) + 1
+
+            counts = lookup(loc_cache, f"{entry['sha']}:{language}") if language else None
+            metrics = lookup(complexity_cache, entry["sha"])
+            if not include_generated:
+                content_reason = (counts[3] if counts and len(counts) > 3 else None) or \
+                    (metrics.get("generated") if metrics else None)
+                if detector.resolve(path, content_reason):
+                    generated += 1
+                    continue
+            if language:
+                records.append((language, counts))
+            if metrics and path.endswith(tuple(LLMCodeSummarizer.LANGUAGE_EXTENSIONS.keys())):
+                complex_files.append((metrics["cyclomatic_complexity"], path, metrics))
+
+        stats = LanguageStats.aggregate(records)
+        stats.pop("binary_files")
+        dependencies, dev_dependencies, name = self._collect_dependencies(package, manifests)
+        complex_files.sort(key=lambda item: (-item[0], item[1]))
+        total_complexity = sum(item[0] for item in complex_files)
+        return {
+            "name": name or base or os.path.basename(os.path.abspath(self.repo_path)),
+            "path": base or ".",
+            "ecosystems": package["ecosystems"],
+            "manifests": package["manifests"],
+            "structure": {
+                "files": len(package["files"]),
+                "top_directories": sorted(directories)[:20],
+                "roles": dict(sorted(roles.items()))
+            },
+            "primary_language": stats["primary_language"],
+            "languages": stats["languages"][:5],
+            "totals": stats["totals"],
+            "dependencies": dependencies,
+            "dev_dependencies": dev_dependencies,
+            "internal_dependencies": [],
+            "code_metrics": {
+                "source_files": len(complex_files),
+                "avg_complexity": round(total_complexity / len(complex_files), 2) if complex_files else 0,
+                "max_complexity": complex_files[0][0] if complex_files else 0,
+                "function_count": sum(item[2]["function_count"] for item in complex_files),
+                "most_complex_files": [item[1] for item in complex_files[:self.TOP_COMPLEX_FILES]]
+            },
+            "generated_files": generated
+        }
+
+    def _collect_dependencies(self, package: Dict[str, Any],
+                              manifests: Dict[str, Dict[str, Any]]) -> Tuple[List[str], List[str], str]:
+        """子项目根目录下各清单的依赖名（去重排序）和清单中声明的包名"""
+        base = package["path"]
+        dependencies, dev_dependencies = set(), set()
+        name = ""
+        for entry in package["files"]:
+            parsed = manifests.get(entry["path"]) if entry["path"].rpartition('/')[0] == base else None
+            if not parsed:
+                continue
+            name = name or parsed.get("name") or parsed.get("module_name") or parsed.get("artifact_id") or \
+                (parsed.get("package") or {}).get("name") or ""
+            dependencies.update(self._dependency_names(parsed.get("dependencies")))
+            dev_dependencies.update(self._dependency_names(parsed.get("devDependencies")))
+        return sorted(dependencies), sorted(dev_dependencies - dependencies), name
+
+    def _dependency_names(self, declared: Any) -> List[str]:
+        """各清单格式的依赖声明统一成包名列表：dict 取键，字符串取 PEP 508 包名，go.mod 取 module"""
+        if not declared:
+            return []
+        if isinstance(declared, dict):
+            return [name for name in declared if name.lower() != 'python']
+        names = []
+        for item in declared:
+            if isinstance(item, dict):
+                # go.mod 的模块路径整体作为名称
+                names.append(item.get("module") or item.get("name") or "")
+                continue
+            match = self._REQUIREMENT_NAME.match(str(item))
+            if match and not str(item).lstrip().startswith('-'):
+                names.append(match.group(1))
+        return names
+
+    @staticmethod
+    def _link_internal_dependencies(packages: List[Dict[str, Any]]) -> None:
+        """依赖其他子项目时记录为内部依赖（按清单中声明的包名匹配）"""
+        by_name = {package["name"].lower(): package["name"] for package in packages if package["name"]}
+        for package in packages:
+            declared = set(package["dependencies"]) | set(package["dev_dependencies"])
+            package["internal_dependencies"] = sorted(
+                by_name[name.lower()] for name in declared
+                if name.lower() in by_name and by_name[name.lower()] != package["name"]
+            )
+
+    @staticmethod
+    def _rollup(packages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        ecosystems: Dict[str, int] = {}
+        for package in packages:
+            for ecosystem in package["ecosystems"]:
+                ecosystems[ecosystem] = ecosystems.get(ecosystem, 0) + 1
+        by_code = sorted(packages, key=lambda p: p["totals"]["code"], reverse=True)
+        by_complexity = sorted(packages, key=lambda p: p["code_metrics"]["avg_complexity"], reverse=True)
+        external = set()
+        for package in packages:
+            external.update(set(package["dependencies"]) - set(package["internal_dependencies"]))
+        return {
+            "package_count": len(packages),
+            "ecosystems": dict(sorted(ecosystems.items(), key=lambda item: item[1], reverse=True)),
+            "files": sum(p["structure"]["files"] for p in packages),
+            "code_lines": sum(p["totals"]["code"] for p in packages),
+            "external_dependencies": len(external),
+            "internal_edges": sum(len(p["internal_dependencies"]) for p in packages),
+            "largest_packages": [{"name": p["name"], "code": p["totals"]["code"]} for p in by_code[:10]],
+            "most_complex_packages": [{"name": p["name"], "avg_complexity": p["code_metrics"]["avg_complexity"]}
+                                      for p in by_complexity[:5] if p["code_metrics"]["source_files"]]
+        }
+
+
+class MonorepoInput(BaseModel):
+    """Input schema for MonorepoAnalyzerTool."""
+    repo_path: str = Field(..., description="本地仓库路径（克隆目录、worktree 或裸镜像）")
+    ref: str = Field(default="HEAD", description="要分析的分支/标签/提交")
+    workers: int = Field(default=0, description="并行进程数，0 表示使用 CPU 核数")
+    max_packages: int = Field(default=50, description="返回明细的子项目数量上限（按代码行从多到少），汇总始终覆盖全部子项目")
+    include_generated: bool = Field(default=False, description="是否统计生成的、第三方（vendored）或压缩的文件（默认不计入）")
+
+
+class MonorepoAnalyzerTool(BaseTool):
+    name: str = "Monorepo Analyzer"
+    description: str = """按 package.json / pyproject.toml / go.mod / Cargo.toml / pom.xml 等清单文件的位置发现子项目，
+    并行分析每个子项目的结构、依赖（含子项目之间的内部依赖）和代码指标（代码行、复杂度），返回逐个子项目的明细和整体汇总。"""
+    args_schema: Type[BaseModel] = MonorepoInput
+
+    def _run(self, repo_path: str, ref: str = "HEAD", workers: int = 0, max_packages: int = 50,
+             include_generated: bool = False) -> Dict[str, Any]:
+        try:
+            if not os.path.isdir(repo_path):
+                return {"success": False, "error": f"仓库目录不存在: {repo_path}"}
+            result = MonorepoAnalyzer(repo_path, ref).analyze(workers, include_generated)
+            packages = sorted(result["packages"], key=lambda p: p["totals"]["code"], reverse=True)
+            result["packages"] = packages[:max(1, max_packages)]
+            result["packages_truncated"] = len(packages) > len(result["packages"])
+            return {"success": True, "repo_path": repo_path, **result}
+        except Exception as e:
+            return {"success": False, "error": f"子项目分析失败: {str(e)}"}
@@ -0,0 +1,177 @@
+# MultiRefAnalyzer.py
+from crewai.tools import BaseTool
+from typing import Type, Dict, Any, List, ClassVar
+from pydantic import BaseModel, Field
+import os
+
+from .BlobCache import blob_cache_path, load_blob_cache, save_blob_cache
+from .GitObjectReader import get_object_reader
+from .FileSystemBrowser import FileSystemBrowser
+from .HotspotAnalyzer import HotspotAnalyzer
+
+
+class MultiRefInput(BaseModel):
+    """Input schema for MultiRefAnalyzer."""
+    repo_path: str = Field(..., description="本地仓库路径（克隆目录、worktree 或裸镜像）")
+    refs: List[str] = Field(..., description="要对比的分支/标签/提交，按时间顺序排列，例如 ['v1.0', 'v2.0', 'main']")
+    top_n: int = Field(default=10, description="每组对比中列出的复杂度变化最大的文件数量")
+
+
+class MultiRefAnalyzer(BaseTool):
+    name: str = "Multi-Ref Analyzer"
+    description: str = """在同一个对象库上对多个分支/标签/提交做架构和代码质量分析，无需为每个 ref 单独克隆。
+    每个 ref 通过 git 对象读取器访问，只有 blob 发生变化的文件会重新计算复杂度，
+    输出每个 ref 的指标以及相邻 ref 之间的指标差值和文件变更。"""
+    args_schema: Type[BaseModel] = MultiRefInput
+
+    # 文件变更列表最多列出的路径数（与 ManifestParser.MAX_LISTED 一致），总数另行给出
+    MAX_LISTED: ClassVar[int] = 200
+
+    def _run(self, repo_path: str, refs: List[str], top_n: int = 10) -> Dict[str, Any]:
+        try:
+            if not os.path.isdir(repo_path):
+                return {"success": False, "error": f"仓库目录不存在: {repo_path}"}
+            if not refs:
+                return {"success": False, "error": "至少需要一个 ref"}
+            return {"success": True, "repo_path": repo_path, **self.analyze(repo_path, refs, top_n)}
+
+        except Exception as e:
+            return {"success": False, "error": f"多版本分析失败: {str(e)}"}
+
+    def analyze(self, repo_path: str, refs: List[str], top_n: int = 10) -> Dict[str, Any]:
+        """依次分析各 ref；复杂度缓存按 blob SHA 在所有 ref 间共享"""
+        hotspot = HotspotAnalyzer()
+        cache_path = blob_cache_path(repo_path, hotspot.CACHE_FILE)
+        cache = load_blob_cache(cache_path)
+
+        per_ref = []
+        complexities = []
+        computed_total = 0
+        for ref in refs:
+            reader = get_object_reader(repo_path, ref)
+            entries = reader.list_tree()
+            complexity, computed = hotspot.compute_complexity(repo_path, ref, cache=cache)
+            computed_total += computed
+            complexities.append(complexity)
+            per_ref.append({
+                "ref": ref,
+                "commit_sha": reader.commit_sha,
+                "architecture": self._architecture_metrics(entries),
+                "code_quality": self._code_quality_metrics(complexity),
+                "complexity_computed": computed
+            })
+
+        deltas = []
+        for idx in range(1, len(refs)):
+            before, after = per_ref[idx - 1], per_ref[idx]
+            deltas.append({
+                "from": before["ref"],
+                "to": after["ref"],
+                "architecture": self._numeric_delta(before["architecture"], after["architecture"]),
+                "code_quality": self._numeric_delta(before["code_quality"], after["code_quality"]),
+                **self._file_changes(get_object_reader(repo_path, before["ref"]).list_tree(),
+                                     get_object_reader(repo_path, after["ref"]).list_tree()),
+                "top_complexity_changes": self._complexity_changes(complexities[idx - 1], complexities[idx], top_n)
+            })
+
+        if computed_total:
+            save_blob_cache(cache_path, cache)
+
+        return {
+            "refs": per_ref,
+            "deltas": deltas,
+            "complexity_computed": computed_total,
+            "complexity_cached": sum(len(c) for c in complexities) - computed_total
+        }
+
+    def _architecture_metrics(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """目录结构指标：文件数、体积、目录数、最大深度、语言分布、核心目录和配置文件"""
+        browser = FileSystemBrowser()
+        directories = set()
+        languages: Dict[str, int] = {}
+        max_depth = 0
+        for entry in entries:
+            parts = entry["path"].split('/')
+            max_depth = max(max_depth, len(parts) - 1)
+            for depth in range(1, len(parts)):
+                directories.add('/'.join(parts[:depth]))
+            ext = os.path.splitext(entry["path"])[1].lower()
+            if ext:
+                languages[ext] = languages.get(ext, 0) + 1
+
+        top_level = sorted({e["path"].split('/', 1)[0] for e in entries if '/' in e["path"]})
+        return {
+            "total_files": len(entries),
+            "total_bytes": sum(e["size"] for e in entries),
+            "directories": len(directories),
+            "max_depth": max_depth,
+            "file_types": dict(sorted(languages.items(), key=lambda item: item[1], reverse=True)[:15]),
+            "core_directories": [d for d in top_level
+                                 if any(pattern in d.lower() for pattern in browser.CORE_PATTERNS)],
+            "config_files": [e["path"] for e in entries if e["path"].rsplit('/', 1)[-1] in browser.CONFIG_PATTERNS]
+        }
+
+    def _code_quality_metrics(self, complexity: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """代码评审指标：源文件数、代码行数、复杂度汇总和高复杂度文件数"""
+        values = list(complexity.values())
+        total_complexity = sum(m["cyclomatic_complexity"] for m in values)
+        return {
+            "source_files": len(values),
+            "total_lines": sum(m["lines"] for m in values),
+            "total_cyclomatic_complexity": total_complexity,
+            "average_complexity": round(total_complexity / len(values), 2) if values else 0,
+            "max_complexity": max((m["cyclomatic_complexity"] for m in values), default=0),
+            "max_nesting_depth": max((m["max_nesting_depth"] for m in values), default=0),
+            "function_count": sum(m["function_count"] for m in values),
+            # 与 LLMCodeSummarizer 的复杂度等级一致：20 及以上为高复杂度
+            "high_complexity_files": sum(1 for m in values if m["cyclomatic_complexity"] >= 20)
+        }
+
+    @staticmethod
+    def _numeric_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+        """数值指标的差值（after - before），列表指标给出新增和移除项"""
+        delta = {}
+        for key, value in after.items():
+            previous = before.get(key)
+            if isinstance(value, (int, float)) and isinstance(previous, (int, float)):
+                delta[key] = round(value - previous, 2)
+            elif isinstance(value, list) and isinstance(previous, list):
+                delta[key] = {"added": [v for v in value if v not in previous],
+                              "removed": [v for v in previous if v not in value]}
+        return delta
+
+    @classmethod
+    def _file_changes(cls, before: List[Dict[str, Any]], after: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """按 blob SHA 比较两个 ref 的文件列表；每类最多列出 MAX_LISTED 个路径，并给出总数和是否截断"""
+        old = {e["path"]: e["sha"] for e in before}
+        new = {e["path"]: e["sha"] for e in after}
+        changes = {
+            "files_added": sorted(p for p in new if p not in old),
+            "files_removed": sorted(p for p in old if p not in new),
+            "files_modified": sorted(p for p in new if p in old and old[p] != new[p])
+        }
+        result = {}
+        for key, paths in changes.items():
+            result[key] = paths[:cls.MAX_LISTED]
+            result[f"{key}_count"] = len(paths)
+            result[f"{key}_truncated"] = len(paths) > cls.MAX_LISTED
+        return result
+
+    @staticmethod
+    def _complexity_changes(before: Dict[str, Dict[str, Any]], after: Dict[str, Dict[str, Any]],
+                            top_n: int) -> List[Dict[str, Any]]:
+        """复杂度变化最大的文件（新增文件的 before 记为 0）"""
+        changes = []
+        for path, metrics in after.items():
+            previous = before.get(path)
+            if previous is not None and previous["blob_sha"] == metrics["blob_sha"]:
+                continue
+            old_value = previous["cyclomatic_complexity"] if previous else 0
+            changes.append({
+                "path": path,
+                "before": old_value,
+                "after": metrics["cyclomatic_complexity"],
+                "delta": metrics["cyclomatic_complexity"] - old_value
+            })
+        changes.sort(key=lambda c: abs(c["delta"]), reverse=True)
+        return changes[:top_n]
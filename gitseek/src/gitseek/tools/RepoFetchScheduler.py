@@ -0,0 +1,195 @@
+# RepoFetchScheduler.py
+from typing import Dict, Any, List, Optional, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
+import re
+import os
+
+from .GitShellTool import GitShellTool
+from .GitArchiveFetcher import GitArchiveFetcher
+from .RepoMirrorCache import RepoMirrorCache
+from .CloneStore import CloneStore
+from .GitHubApiReader import GitHubAPIReader
+
+
+class BandwidthLimiter:
+    """所有下载共享的令牌桶限速器（字节/秒），0 表示不限速"""
+
+    def __init__(self, bytes_per_second: int = 0):
+        self.rate = bytes_per_second
+        self._allowance = float(bytes_per_second)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int) -> None:
+        if self.rate <= 0 or nbytes <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.rate, self._allowance + (now - self._last) * self.rate)
+            self._last = now
+            self._allowance -= nbytes
+            wait = -self._allowance / self.rate if self._allowance < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RepoFetchScheduler:
+    """并发获取多个仓库：限制同时进行的克隆数、总带宽和磁盘占用，
+    每个仓库独立超时和重试，并通过回调发出进度事件。
+
+    带宽上限只作用于归档下载（GitArchiveFetcher 经共享的 BandwidthLimiter 读取数据）；git 没有限制
+    传输速率的选项，git clone / fetch 不受该上限约束，只受并发数约束。
+    磁盘预算在每个仓库开始获取前按估计大小（GitHub API 的 size，取不到时用已完成仓库的平均大小）
+    在锁内预留，获取结束后换成实际大小；已用加已预留超出预算的仓库直接跳过。
+
+    `fetch_all` 按完成顺序逐个产出结果；传入 `analyze` 时，每个仓库获取完成后
+    立即在独立线程池中开始分析，无需等待整批完成。
+    """
+
+    def __init__(self, target_dir: str, max_concurrent: int = 4, max_bandwidth_bps: int = 0,
+                 disk_budget_bytes: int = 0, timeout: int = 600, retries: int = 2,
+                 need_history: bool = True, on_event: Callable[[Dict[str, Any]], None] = None,
+                 estimate_bytes: Callable[[str], int] = None):
+        self.target_dir = target_dir
+        self.max_concurrent = max(1, max_concurrent)
+        self.limiter = BandwidthLimiter(max_bandwidth_bps)
+        self.disk_budget_bytes = disk_budget_bytes
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.need_history = need_history
+        self.on_event = on_event
+        self.estimate_bytes = estimate_bytes or self._estimate_bytes
+        self._disk_used = 0
+        self._disk_reserved = 0
+        self._fetched_sizes: List[int] = []
+        self._disk_lock = threading.Lock()
+
+    def fetch_all(self, repo_urls: List[str],
+                  analyze: Callable[[Dict[str, Any]], Any] = None) -> Iterator[Dict[str, Any]]:
+        """并发获取仓库，按完成顺序产出每个仓库的结果"""
+        self._disk_used = self._current_disk_usage()
+        self._disk_reserved = 0
+        for url in repo_urls:
+            self._emit("queued", url)
+
+        analysis_pool = ThreadPoolExecutor(max_workers=self.max_concurrent) if analyze else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrent) as pool:
+                futures = {pool.submit(self._fetch_with_retries, url): url for url in repo_urls}
+                for future in as_completed(futures):
+                    result = future.result()
+                    if analysis_pool is not None and result["success"]:
+                        result["analysis"] = analysis_pool.submit(self._analyze, analyze, result)
+                    yield result
+        finally:
+            if analysis_pool is not None:
+                analysis_pool.shutdown(wait=True)
+
+    def _fetch_with_retries(self, repo_url: str) -> Dict[str, Any]:
+        started = time.monotonic()
+        reserved = self._reserve_disk(repo_url)
+        if reserved is None:
+            self._emit("skipped", repo_url, reason="disk_budget_exceeded", disk_used=self._disk_used,
+                       disk_reserved=self._disk_reserved)
+            return self._result(repo_url, False, "❌ Disk budget exceeded", 0, started)
+
+        fetched = 0
+        message = ""
+        try:
+            for attempt in range(1, self.retries + 2):
+                self._emit("started", repo_url, attempt=attempt)
+                message = self._fetch_once(repo_url)
+                if message.startswith(('✅', '⚠️')):
+                    fetched = self._parse_fetched_bytes(message)
+                    self._emit("finished", repo_url, attempt=attempt, fetched_bytes=fetched,
+                               elapsed=round(time.monotonic() - started, 2))
+                    return self._result(repo_url, True, message, attempt, started, fetched)
+
+                if attempt <= self.retries:
+                    self._emit("retry", repo_url, attempt=attempt, error=message)
+                    time.sleep(min(2 ** attempt, 30))
+        finally:
+            self._settle_disk(reserved, fetched)
+
+        self._emit("failed", repo_url, error=message)
+        return self._result(repo_url, False, message, self.retries + 1, started)
+
+    def _reserve_disk(self, repo_url: str) -> Optional[int]:
+        """获取前在锁内预留估计大小；超出预算时返回 None，未设预算时预留 0"""
+        if not self.disk_budget_bytes:
+            return 0
+        estimate = max(0, self.estimate_bytes(repo_url))
+        with self._disk_lock:
+            # 估计为 0 时仍要求预算有剩余
+            if self._disk_used + self._disk_reserved + max(estimate, 1) > self.disk_budget_bytes:
+                return None
+            self._disk_reserved += estimate
+            return estimate
+
+    def _settle_disk(self, reserved: int, fetched: int) -> None:
+        """获取结束（成功或失败）后释放预留，计入实际获取的大小"""
+        with self._disk_lock:
+            self._disk_reserved -= reserved
+            self._disk_used += fetched
+            if fetched:
+                self._fetched_sizes.append(fetched)
+
+    def _estimate_bytes(self, repo_url: str) -> int:
+        """仓库大小估计：GitHub 仓库取 API 的 size（KB），否则取已完成仓库的平均大小"""
+        if 'github.com' in repo_url and not GitArchiveFetcher.is_archive_url(repo_url):
+            owner, repo = RepoMirrorCache.parse_repo_url(repo_url)
+            metadata = GitHubAPIReader()._run(owner, repo)
+            if metadata.get("success") and metadata.get("size"):
+                return int(metadata["size"]) * 1024
+        with self._disk_lock:
+            sizes = list(self._fetched_sizes)
+        return sum(sizes) // len(sizes) if sizes else 0
+
+    def _fetch_once(self, repo_url: str) -> str:
+        """单次获取：归档下载经过共享限速器，克隆走 GitShellTool（镜像缓存）"""
+        git_tool = GitShellTool()
+        if git_tool.choose_backend(repo_url, need_history=self.need_history) != 'archive':
+            return git_tool._run(repo_url, self.target_dir, timeout=self.timeout,
+                                 fetch_backend='clone', need_history=self.need_history)
+
+        return GitArchiveFetcher().fetch(repo_url, self.target_dir, timeout=self.timeout, limiter=self.limiter)
+
+    def _analyze(self, analyze: Callable[[Dict[str, Any]], Any], result: Dict[str, Any]) -> Any:
+        self._emit("analysis_started", result["repo_url"])
+        try:
+            # 分析期间持有引用，其他获取触发的磁盘淘汰不会删除该仓库；获取完成到开始分析之间已被淘汰时直接失败
+            with CloneStore(self.target_dir).using(result["local_path"], result["repo_url"]) as ref_file:
+                if ref_file is None:
+                    raise FileNotFoundError(f"检出目录已被淘汰: {result['local_path']}")
+                return analyze(result)
+        finally:
+            self._emit("analysis_finished", result["repo_url"])
+
+    def _result(self, repo_url: str, success: bool, message: str, attempts: int, started: float,
+                fetched_bytes: int = 0) -> Dict[str, Any]:
+        return {
+            "repo_url": repo_url,
+            "success": success,
+            "local_path": GitArchiveFetcher.checkout_path(self.target_dir, repo_url),
+            "message": message,
+            "attempts": attempts,
+            "fetched_bytes": fetched_bytes,
+            "elapsed_seconds": round(time.monotonic() - started, 2)
+        }
+
+    def _emit(self, event: str, repo_url: str, **details: Any) -> None:
+        if self.on_event is not None:
+            self.on_event({"event": event, "repo_url": repo_url, "time": time.time(), **details})
+
+    def _current_disk_usage(self) -> int:
+        if not self.disk_budget_bytes or not os.path.isdir(self.target_dir):
+            return 0
+        return RepoMirrorCache._dir_size(self.target_dir)
+
+    @staticmethod
+    def _parse_fetched_bytes(message: str) -> int:
+        match = re.search(r'fetched_bytes: (\d+)', message)
+        return int(match.group(1)) if match else 0
+
@@ -0,0 +1,364 @@
+# RepoInventory.py
+from typing import Dict, Any, List, Optional, Iterable, Iterator, ClassVar, FrozenSet, Tuple
+from collections import deque
+import threading
+import os
+
+from .IgnoreRules import IgnoreRules
+
+
+class InventoryEntry:
+    """清单中的一个文件或目录（路径相对仓库根目录，使用 '/' 分隔）"""
+
+    __slots__ = ('path', 'name', 'is_dir', 'size', 'mtime_ns', 'inode', 'ext', 'language', 'role', 'depth')
+
+    def __init__(self, path: str, name: str, is_dir: bool, size: int, mtime_ns: int, inode: int,
+                 ext: str, language: str, role: str, depth: int):
+        self.path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.inode = inode
+        self.ext = ext
+        self.language = language
+        self.role = role
+        self.depth = depth
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class RepoInventory:
+    """一次 os.scandir 遍历得到的仓库文件清单，供各个工具查询。
+
+    每个条目只做一次 stat（DirEntry.stat 复用 scandir 的结果），
+    之后 FileSystemBrowser、LLMCodeSummarizer、SmartQuestionGuide 等都从内存中查询，
+    不再各自遍历目录。同一路径的清单通过 `get_inventory` 在进程内共享。
+    """
+
+    LANGUAGE_EXTENSIONS: ClassVar[Dict[str, str]] = {
+        '.py': 'Python', '.js': 'JavaScript', '.mjs': 'JavaScript', '.cjs': 'JavaScript',
+        '.ts': 'TypeScript', '.jsx': 'React', '.tsx': 'React TypeScript', '.java': 'Java',
+        '.cpp': 'C++', '.cc': 'C++', '.cxx': 'C++', '.hpp': 'C++', '.c': 'C', '.h': 'C',
+        '.go': 'Go', '.rs': 'Rust', '.rb': 'Ruby', '.php': 'PHP', '.cs': 'C#', '.swift': 'Swift',
+        '.kt': 'Kotlin', '.kts': 'Kotlin', '.scala': 'Scala', '.m': 'Objective-C', '.dart': 'Dart',
+        '.lua': 'Lua', '.r': 'R', '.jl': 'Julia', '.sh': 'Shell', '.bash': 'Shell', '.ps1': 'PowerShell',
+        '.vue': 'Vue', '.svelte': 'Svelte', '.html': 'HTML', '.css': 'CSS', '.scss': 'SCSS', '.sql': 'SQL'
+    }
+
+    CONFIG_NAMES: ClassVar[FrozenSet[str]] = frozenset([
+        'package.json', 'requirements.txt', 'pyproject.toml', 'setup.py', 'setup.cfg',
+        'pom.xml', 'build.gradle', 'build.gradle.kts', 'settings.gradle', 'CMakeLists.txt',
+        'Dockerfile', 'docker-compose.yml', 'docker-compose.yaml', '.env', 'config.json', 'settings.py',
+        'webpack.config.js', 'tsconfig.json', 'go.mod', 'Cargo.toml', 'composer.json', 'Gemfile',
+        'Makefile', 'tox.ini', '.editorconfig', '.gitignore', '.gitattributes'
+    ])
+    CONFIG_EXTENSIONS: ClassVar[FrozenSet[str]] = frozenset(['.toml', '.ini', '.cfg', '.conf', '.yml', '.yaml', '.properties'])
+    DOC_EXTENSIONS: ClassVar[FrozenSet[str]] = frozenset(['.md', '.rst', '.txt', '.adoc'])
+    DOC_NAMES: ClassVar[FrozenSet[str]] = frozenset(['README', 'LICENSE', 'CHANGELOG', 'CONTRIBUTING', 'AUTHORS', 'NOTICE'])
+    TEST_DIRS: ClassVar[FrozenSet[str]] = frozenset(['test', 'tests', '__tests__', 'spec', 'specs', 'testing'])
+    DOC_DIRS: ClassVar[FrozenSet[str]] = frozenset(['doc', 'docs', 'documentation'])
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.entries: Dict[str, InventoryEntry] = {}
+        self.children: Dict[str, List[str]] = {"": []}
+        # 无法读取的目录（权限不足等）-> 错误信息
+        self.errors: Dict[str, str] = {}
+        # 被忽略规则排除的条目数（被剪枝的目录按一个计）
+        self.ignored = 0
+        # 基于持久化索引构建时的增量扫描统计
+        self.scan_stats: Dict[str, Any] = {}
+
+    # === 构建 ===
+
+    @classmethod
+    def scan(cls, root: str, ignore: Optional[IgnoreRules] = None, workers: int = 0) -> 'RepoInventory':
+        """单次遍历构建清单：每个目录一次 scandir，每个保留的条目一次 stat；被忽略的目录整体剪枝。
+
+        workers > 1 时目录列举和 stat 分散到有界线程池（见 `_scan_parallel`），
+        结果与串行遍历完全相同（子项列表最终统一排序）。
+        """
+        inventory = cls(root)
+        # (相对路径, 绝对路径, 深度, 是否位于测试目录, 是否位于文档目录)
+        root_task = ("", inventory.root, 0, False, False)
+        if workers > 1:
+            inventory._scan_parallel(root_task, ignore, workers)
+        else:
+            stack = [root_task]
+            while stack:
+                subdirs, ignored = inventory._list_directory(*stack.pop(), ignore)
+                inventory.ignored += ignored
+                stack.extend(subdirs)
+
+        for names in inventory.children.values():
+            names.sort()
+        return inventory
+
+    def _list_directory(self, rel_dir: str, abs_dir: str, depth: int, in_test: bool, in_doc: bool,
+                        ignore: Optional[IgnoreRules]) -> Tuple[List[Tuple], int]:
+        """列出一个目录并记录其子项，返回 (待遍历的子目录任务, 被忽略的条目数)"""
+        names = self.children.setdefault(rel_dir, [])
+        try:
+            with os.scandir(abs_dir) as it:
+                dir_entries = list(it)
+        except OSError as e:
+            self.errors[rel_dir] = "权限不足" if isinstance(e, PermissionError) else str(e)
+            return [], 0
+
+        if ignore is not None:
+            ignore.load_directory(rel_dir, frozenset(e.name for e in dir_entries))
+
+        subdirs = []
+        ignored = 0
+        for dir_entry in dir_entries:
+            rel_path = f"{rel_dir}/{dir_entry.name}" if rel_dir else dir_entry.name
+            try:
+                is_dir = dir_entry.is_dir(follow_symlinks=False)
+                if ignore is not None and ignore.is_ignored(rel_path, is_dir):
+                    ignored += 1
+                    continue
+                stat = dir_entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            name = dir_entry.name
+            if is_dir:
+                entry = InventoryEntry(rel_path, name, True, 0, stat.st_mtime_ns, stat.st_ino,
+                                       '', '', 'directory', depth + 1)
+                lower = name.lower()
+                subdirs.append((rel_path, dir_entry.path, depth + 1,
+                                in_test or lower in self.TEST_DIRS, in_doc or lower in self.DOC_DIRS))
+            else:
+                dot = name.rfind('.')
+                ext = name[dot:].lower() if dot > 0 else ''
+                language = self.LANGUAGE_EXTENSIONS.get(ext, '')
+                entry = InventoryEntry(rel_path, name, False, stat.st_size, stat.st_mtime_ns, stat.st_ino,
+                                       ext, language, self.classify(name, ext, language, in_test, in_doc), depth + 1)
+            self.entries[rel_path] = entry
+            names.append(rel_path)
+        return subdirs, ignored
+
+    def _scan_parallel(self, root_task: Tuple, ignore: Optional[IgnoreRules], workers: int) -> None:
+        """多线程遍历（工作窃取）：每个线程优先处理自己队列尾部的目录（深度优先、局部性好），
+        空闲时从其他线程队列头部窃取较浅的目录。网络文件系统上 scandir/stat 的等待时间会释放 GIL，
+        多个目录的 I/O 因此可以重叠。各目录的子项写入不同的键，合并后统一排序，结果与串行一致。
+        """
+        queues = [deque() for _ in range(workers)]
+        queues[0].append(root_task)
+        pending = [1]
+        ignored = [0] * workers
+        lock = threading.Lock()
+        done = threading.Event()
+        failures: List[BaseException] = []
+
+        def take(index: int) -> Optional[Tuple]:
+            try:
+                return queues[index].pop()
+            except IndexError:
+                pass
+            for offset in range(1, workers):
+                try:
+                    return queues[(index + offset) % workers].popleft()
+                except IndexError:
+                    continue
+            return None
+
+        def worker(index: int) -> None:
+            try:
+                while not done.is_set():
+                    task = take(index)
+                    if task is None:
+                        done.wait(0.0005)
+                        continue
+                    subdirs, skipped = self._list_directory(*task, ignore)
+                    ignored[index] += skipped
+                    # 先计入新目录再发布到队列：否则其他线程可能先处理完新目录并递减计数，使计数提前归零
+                    with lock:
+                        pending[0] += len(subdirs)
+                    queues[index].extend(subdirs)
+                    with lock:
+                        pending[0] -= 1
+                        if pending[0] == 0:
+                            done.set()
+            except BaseException as e:  # 出错时让其他线程退出，并在主线程重新抛出
+                failures.append(e)
+                done.set()
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if failures:
+            raise failures[0]
+        self.ignored += sum(ignored)
+
+    @classmethod
+    def classify(cls, name: str, ext: str, language: str, in_test_dir: bool = False, in_doc_dir: bool = False) -> str:
+        """按文件名和所在目录判断角色：config / test / doc / source / other"""
+        lower = name.lower()
+        if in_test_dir or lower.startswith('test_') or '_test.' in lower or '.test.' in lower \
+                or '.spec.' in lower or '_spec.' in lower:
+            return 'test'
+        if name in cls.CONFIG_NAMES or ext in cls.CONFIG_EXTENSIONS:
+            return 'config'
+        if in_doc_dir or ext in cls.DOC_EXTENSIONS or name.split('.', 1)[0].upper() in cls.DOC_NAMES:
+            return 'doc'
+        if language:
+            return 'source'
+        return 'other'
+
+    # === 查询 ===
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, path: str) -> Optional[InventoryEntry]:
+        return self.entries.get(path.strip('/'))
+
+    def exists(self, path: str) -> bool:
+        return path.strip('/') in self.entries
+
+    def is_dir(self, path: str) -> bool:
+        entry = self.get(path)
+        return entry is not None and entry.is_dir
+
+    def list_dir(self, path: str = "") -> List[InventoryEntry]:
+        """目录的直接子项（按名称排序）"""
+        return [self.entries[p] for p in self.children.get(path.strip('/'), [])]
+
+    def walk(self, prefix: str = "", exclude_dirs: Iterable[str] = ()) -> Iterator[InventoryEntry]:
+        """深度优先先序遍历（同一目录内按名称排序，不含 prefix 自身）；exclude_dirs 中的目录不展开"""
+        excluded = set(exclude_dirs)
+        stack = [iter(self.children.get(prefix.strip('/'), []))]
+        while stack:
+            path = next(stack[-1], None)
+            if path is None:
+                stack.pop()
+                continue
+            entry = self.entries[path]
+            yield entry
+            if entry.is_dir and entry.name not in excluded:
+                stack.append(iter(self.children.get(path, [])))
+
+    def files(self, roles: Iterable[str] = None, extensions: Iterable[str] = None,
+              exclude_dirs: Iterable[str] = ()) -> List[InventoryEntry]:
+        """按角色、扩展名过滤文件，可跳过指定名称的目录"""
+        roles = set(roles) if roles else None
+        extensions = set(extensions) if extensions else None
+        result = []
+        for entry in self.walk(exclude_dirs=exclude_dirs):
+            if entry.is_dir:
+                continue
+            if roles is not None and entry.role not in roles:
+                continue
+            if extensions is not None and entry.ext not in extensions:
+                continue
+            result.append(entry)
+        return result
+
+    def select(self, prefix: str = "", recursive: bool = True, roles: Iterable[str] = None,
+               extensions: Iterable[str] = None, min_size: int = 0, max_size: int = 0) -> List[InventoryEntry]:
+        """prefix 下的条目（先序，同目录按名称排序）：按角色、扩展名、大小过滤文件。
+        非递归时只取直接子项，且未指定任何文件过滤条件时包含子目录；递归时只返回文件。
+        """
+        roles = set(roles) if roles else None
+        extensions = {e.lower() if e.startswith('.') else '.' + e.lower() for e in extensions} if extensions else None
+        filtered = roles is not None or extensions is not None or min_size or max_size
+        entries = self.walk(prefix) if recursive else self.list_dir(prefix)
+        result = []
+        for entry in entries:
+            if entry.is_dir:
+                if not recursive and not filtered:
+                    result.append(entry)
+                continue
+            if roles is not None and entry.role not in roles:
+                continue
+            if extensions is not None and entry.ext not in extensions:
+                continue
+            if entry.size < min_size or (max_size and entry.size > max_size):
+                continue
+            result.append(entry)
+        return result
+
+    def find_by_name(self, names: Iterable[str]) -> List[InventoryEntry]:
+        names = set(names)
+        return [entry for entry in self.walk() if entry.name in names]
+
+    def top_level_dirs(self) -> List[str]:
+        return [e.name for e in self.list_dir("") if e.is_dir]
+
+    def absolute(self, path: str) -> str:
+        return os.path.join(self.root, *path.split('/')) if path else self.root
+
+    def summary(self) -> Dict[str, Any]:
+        """文件数、总大小、按角色和语言的统计"""
+        roles: Dict[str, int] = {}
+        languages: Dict[str, int] = {}
+        total_size = 0
+        file_count = 0
+        for entry in self.entries.values():
+            if entry.is_dir:
+                continue
+            file_count += 1
+            total_size += entry.size
+            roles[entry.role] = roles.get(entry.role, 0) + 1
+            if entry.language:
+                languages[entry.language] = languages.get(entry.language, 0) + 1
+        return {
+            "root": self.root,
+            "total_files": file_count,
+            "total_directories": len(self.entries) - file_count,
+            "total_size": total_size,
+            "ignored_entries": self.ignored,
+            "roles": roles,
+            "languages": dict(sorted(languages.items(), key=lambda item: item[1], reverse=True))
+        }
+
+
+# 进程内共享的清单，键为 (仓库根目录的绝对路径, 用户排除模式, 是否遵循 .gitignore)
+_INVENTORIES: Dict[Tuple[str, Tuple[str, ...], bool], RepoInventory] = {}
+_INVENTORY_LOCK = threading.Lock()
+
+
+def get_inventory(root: str, refresh: bool = False, exclude_patterns: List[str] = None,
+                  respect_gitignore: bool = True, use_index: bool = True, workers: int = 0) -> RepoInventory:
+    """获取（必要时构建）目录清单；同一次运行中各工具共用一份。
+
+    默认排除 .git、node_modules 等目录并遵循 .gitignore / .git/info/exclude，
+    exclude_patterns 为额外的 gitignore 风格模式。use_index 时通过持久化的 FileIndex
+    增量扫描（只重新列出 mtime 变化的目录），否则完整遍历一次。
+    workers > 1 时完整遍历（包括索引的首次构建）使用并行遍历。
+    """
+    path = os.path.abspath(root)
+    key = (path, tuple(exclude_patterns or ()), respect_gitignore)
+    with _INVENTORY_LOCK:
+        inventory = _INVENTORIES.get(key)
+    if inventory is None or refresh:
+        ignore = IgnoreRules(path, exclude_patterns, respect_gitignore)
+        if use_index:
+            from .FileIndex import get_file_index
+            index = get_file_index(path, respect_gitignore)
+            scan_stats = index.refresh(ignore, workers=workers)
+            # 索引不含 exclude_patterns（各调用方共用一份），额外模式在生成清单时过滤
+            inventory = index.to_inventory(ignore)
+            inventory.scan_stats = scan_stats
+            inventory.ignored += scan_stats["ignored"]
+        else:
+            inventory = RepoInventory.scan(path, ignore, workers)
+        with _INVENTORY_LOCK:
+            _INVENTORIES[key] = inventory
+    return inventory
+
+
+def invalidate_inventory(root: str) -> None:
+    """目录内容变化后（重新克隆、检出等）丢弃缓存的清单"""
+    path = os.path.abspath(root)
+    with _INVENTORY_LOCK:
+        for key in [k for k in _INVENTORIES if k[0] == path]:
+            del _INVENTORIES[key]
@@ -0,0 +1,166 @@
+# RepoMirrorCache.py
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+import subprocess
+import json
+import os
+
+
+class RepoMirrorCache:
+    """按 owner/repo 管理裸镜像仓库的本地缓存。
+
+    镜像通过 `git clone --mirror` 创建，之后只做增量 `git fetch`；
+    分析用的工作目录是从镜像检出的 `git worktree`，并记录每次检出的 HEAD SHA。
+    """
+
+    METADATA_FILE = "metadata.json"
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    # === 路径与元数据 ===
+
+    @staticmethod
+    def parse_repo_url(repo_url: str) -> Tuple[str, str]:
+        """从仓库 URL 中提取 (owner, repo)"""
+        parts = [p for p in repo_url.rstrip('/').split('/') if p]
+        repo = parts[-1][:-4] if parts[-1].endswith('.git') else parts[-1]
+        owner = parts[-2] if len(parts) >= 2 else "_"
+        return owner.split(':')[-1], repo
+
+    def mirror_path(self, owner: str, repo: str) -> str:
+        """镜像仓库路径：<cache_dir>/<owner>/<repo>.git"""
+        return os.path.join(self.cache_dir, owner, f"{repo}.git")
+
+    def load_metadata(self, owner: str, repo: str) -> Dict[str, Any]:
+        """读取镜像的缓存记录（HEAD SHA、最近一次 fetch 时间等）"""
+        path = os.path.join(self.mirror_path(owner, repo), self.METADATA_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_metadata(self, owner: str, repo: str, metadata: Dict[str, Any]) -> None:
+        path = os.path.join(self.mirror_path(owner, repo), self.METADATA_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    # === 镜像维护 ===
+
+    def ensure_mirror(self, repo_url: str, blobless: bool = False, depth: int = 0,
+                      timeout: int = 600) -> Dict[str, Any]:
+        """确保镜像存在：不存在时 clone --mirror，存在时增量 fetch"""
+        owner, repo = self.parse_repo_url(repo_url)
+        mirror = self.mirror_path(owner, repo)
+        size_before = self._dir_size(mirror)
+
+        if os.path.isfile(os.path.join(mirror, 'HEAD')):
+            action = "fetched"
+            command = ['git', '--git-dir', mirror, 'fetch', '--prune', 'origin']
+            if depth:
+                command.insert(-1, f'--depth={depth}')
+        else:
+            action = "cloned"
+            os.makedirs(os.path.dirname(mirror), exist_ok=True)
+            command = ['git', 'clone', '--mirror']
+            if blobless:
+                command.append('--filter=blob:none')
+            if depth:
+                command += ['--depth', str(depth)]
+            command += [repo_url, mirror]
+
+        result = self._git(command, timeout)
+        if result.returncode != 0:
+            return {"success": False, "error": f"git {action[:-2]} failed: {result.stderr.strip()}"}
+
+        return {
+            "success": True,
+            "owner": owner,
+            "repo": repo,
+            "mirror_path": mirror,
+            "action": action,
+            "fetched_bytes": max(self._dir_size(mirror) - size_before, 0)
+        }
+
+    def resolve_ref(self, mirror: str, ref: str = "HEAD") -> Optional[str]:
+        """将分支、标签或 SHA 解析为提交 SHA"""
+        result = self._git(['git', '--git-dir', mirror, 'rev-parse', '--verify', f"{ref or 'HEAD'}^{{commit}}"])
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def checkout_worktree(self, repo_url: str, worktree_path: str, ref: str = "HEAD",
+                          sparse_paths: List[str] = None, strategy: str = "",
+                          timeout: int = 600) -> Dict[str, Any]:
+        """从镜像检出（或更新）指定 ref 的工作目录，并记录 HEAD SHA"""
+        owner, repo = self.parse_repo_url(repo_url)
+        mirror = self.mirror_path(owner, repo)
+
+        sha = self.resolve_ref(mirror, ref)
+        if not sha:
+            return {"success": False, "error": f"无法解析 ref: {ref}"}
+
+        # 清理目录已被手动删除的 worktree 登记
+        self._git(['git', '--git-dir', mirror, 'worktree', 'prune'])
+
+        if self.is_worktree_of(worktree_path, mirror):
+            result = self._git(['git', '-C', worktree_path, 'checkout', '--detach', '--force', sha], timeout)
+        else:
+            command = ['git', '--git-dir', mirror, 'worktree', 'add', '--detach', '--force']
+            if sparse_paths:
+                command.append('--no-checkout')
+            result = self._git(command + [os.path.abspath(worktree_path), sha], timeout)
+            if result.returncode == 0 and sparse_paths:
+                result = self._git(['git', '-C', worktree_path, 'sparse-checkout', 'set'] + list(sparse_paths), timeout)
+                if result.returncode == 0:
+                    result = self._git(['git', '-C', worktree_path, 'reset', '--hard', sha], timeout)
+        if result.returncode != 0:
+            return {"success": False, "error": f"worktree 检出失败: {result.stderr.strip()}"}
+
+        metadata = self.load_metadata(owner, repo)
+        previous_sha = metadata.get("head_sha")
+        metadata.update({
+            "repo_url": repo_url,
+            "ref": ref or "HEAD",
+            "head_sha": sha,
+            "previous_sha": previous_sha,
+            "changed": previous_sha != sha,
+            "worktree_path": os.path.abspath(worktree_path),
+            "strategy": strategy or metadata.get("strategy", ""),
+            "fetched_at": datetime.now().isoformat()
+        })
+        self._save_metadata(owner, repo, metadata)
+
+        return {"success": True, **metadata}
+
+    @staticmethod
+    def is_worktree_of(path: str, mirror: str) -> bool:
+        """判断目录是否为该镜像登记的 worktree（.git 为指向镜像的文件）"""
+        git_file = os.path.join(path, '.git')
+        if not os.path.isfile(git_file):
+            return False
+        try:
+            with open(git_file, 'r', encoding='utf-8') as f:
+                gitdir = f.read().strip().replace('gitdir:', '').strip()
+        except OSError:
+            return False
+        return os.path.abspath(gitdir).startswith(os.path.abspath(mirror) + os.sep)
+
+    # === 辅助方法 ===
+
+    @staticmethod
+    def _git(command: List[str], timeout: int = 120) -> subprocess.CompletedProcess:
+        return subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        """统计目录占用的字节数"""
+        total = 0
+        for root, dirs, files in os.walk(path):
+            for file in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    continue
+        return total
@@ -0,0 +1,500 @@
+# RepoWatcher.py
+from typing import Dict, Any, List, Optional, Set, Callable, ClassVar
+import ctypes.util
+import threading
+import ctypes
+import select
+import struct
+import errno
+import time
+import os
+
+from .IgnoreRules import IgnoreRules
+from .RepoInventory import RepoInventory, get_inventory
+from .FileIndex import get_file_index
+from .LanguageStats import LanguageStats, LineCounter
+from .HotspotAnalyzer import HotspotAnalyzer
+from .BlobCache import blob_cache_path, load_blob_cache, save_blob_cache, lookup
+from .LLMCodeSummarizer import LLMCodeSummarizer
+from .ManifestParser import ManifestParser
+from .MonorepoAnalyzer import MonorepoAnalyzer
+from .GeneratedFileDetector import get_generated_detector
+
+
+class InotifyBackend:
+    """基于 Linux inotify 的文件事件源（通过 ctypes 调用 libc，无第三方依赖）。
+
+    为每个未被忽略的目录添加监听；新建或移入的目录会立即补充监听，并把其中已有的文件
+    作为变化上报（避免监听建立前写入的文件被漏掉）。事件队列溢出时 poll 返回 None，由调用方全量重扫。
+    """
+
+    IN_MODIFY = 0x2
+    IN_ATTRIB = 0x4
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ONLYDIR = 0x1000000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                  | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, root: str, ignore: IgnoreRules):
+        self.root = os.path.abspath(root)
+        self.ignore = ignore
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "当前平台不支持 inotify")
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._watches: Dict[int, str] = {}
+        self._paths: Dict[str, int] = {}
+        try:
+            self._add_tree("")
+        except OSError:
+            self.close()
+            raise
+
+    def poll(self, timeout: float) -> Optional[Set[str]]:
+        """等待最多 timeout 秒，返回变化的相对路径集合（可能为空）；队列溢出时返回 None"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', errors='surrogateescape')
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    return None
+                if not self._handle(wd, mask, name, changed):
+                    return None
+        return changed
+
+    def _handle(self, wd: int, mask: int, name: str, changed: Set[str]) -> bool:
+        if mask & self.IN_IGNORED:
+            path = self._watches.pop(wd, None)
+            if path is not None and self._paths.get(path) == wd:
+                del self._paths[path]
+            return True
+        directory = self._watches.get(wd)
+        if directory is None:
+            return True
+        if not name:
+            # 被监听的目录自身被删除/移走：其父目录会收到对应事件
+            return True
+        path = f"{directory}/{name}" if directory else name
+        is_dir = bool(mask & self.IN_ISDIR)
+        if self.ignore.is_path_ignored(path, is_dir):
+            return True
+        changed.add(path)
+        if is_dir and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+            try:
+                changed.update(self._add_tree(path))
+            except OSError:
+                return False  # 监听数达到上限等，交给全量重扫
+        elif is_dir and mask & (self.IN_MOVED_FROM | self.IN_DELETE):
+            self._remove_tree(path)
+        return True
+
+    def _add_tree(self, rel_dir: str) -> List[str]:
+        """为 rel_dir 及其未被忽略的子目录添加监听，返回其中已有的文件"""
+        files = []
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            abs_dir = os.path.join(self.root, *current.split('/')) if current else self.root
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(abs_dir), self.WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    continue
+                raise OSError(error, f"inotify_add_watch 失败: {abs_dir}（可调大 fs.inotify.max_user_watches）")
+            self._watches[wd] = current
+            self._paths[current] = wd
+            try:
+                with os.scandir(abs_dir) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            self.ignore.load_directory(current, frozenset(e.name for e in entries))
+            for entry in entries:
+                path = f"{current}/{entry.name}" if current else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if self.ignore.is_ignored(path, is_dir):
+                    continue
+                if is_dir:
+                    stack.append(path)
+                elif rel_dir:
+                    files.append(path)
+        return files
+
+    def _remove_tree(self, rel_dir: str) -> None:
+        prefix = rel_dir + '/'
+        for path in [p for p in self._paths if p == rel_dir or p.startswith(prefix)]:
+            wd = self._paths.pop(path)
+            self._watches.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingBackend:
+    """轮询事件源：定期完整遍历一次（每个条目一次 stat），与上一次快照比较 size/mtime/inode"""
+
+    def __init__(self, root: str, ignore: IgnoreRules):
+        self.root = os.path.abspath(root)
+        self.ignore = ignore
+        self._snapshot = self._take()
+
+    def _take(self) -> Dict[str, tuple]:
+        inventory = RepoInventory.scan(self.root, self.ignore)
+        return {path: (e.is_dir, e.size, e.mtime_ns, e.inode) for path, e in inventory.entries.items()}
+
+    def poll(self, timeout: float) -> Optional[Set[str]]:
+        time.sleep(timeout)
+        snapshot = self._take()
+        previous = self._snapshot
+        self._snapshot = snapshot
+        changed = {path for path, state in snapshot.items() if previous.get(path) != state}
+        changed.update(path for path in previous if path not in snapshot)
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class RepoWatcher:
+    """本地工作副本的监听模式：订阅文件事件（优先 inotify，否则轮询），增量维护
+    文件清单、逐文件指标（代码行和复杂度）和依赖清单解析结果。
+
+    指标按内容哈希（与 git blob SHA 相同）缓存，并与 LanguageStats、HotspotAnalyzer 的缓存共用，
+    已提交且未修改的文件直接命中。每批变化处理完后调用 on_change(summary)，
+    summary["sections"] 列出受影响的报告部分。
+    """
+
+    DEPENDENCY_FILES: ClassVar[Dict[str, str]] = {
+        'requirements.txt': 'python', 'pyproject.toml': 'python', 'package.json': 'javascript',
+        'go.mod': 'go', 'cargo.toml': 'rust', 'pom.xml': 'java'
+    }
+
+    def __init__(self, root: str, exclude_patterns: List[str] = None, respect_gitignore: bool = True,
+                 backend: str = "auto", interval: float = 1.0, debounce: float = 0.2,
+                 on_change: Optional[Callable[[Dict[str, Any]], None]] = None, include_generated: bool = False,
+                 output_paths: List[str] = None):
+        self.root = os.path.abspath(root)
+        self.include_generated = include_generated
+        # 监听期间自己写入的文件/目录（报告、渲染缓存）位于工作副本内时一并忽略，否则每次写入都会再次触发重新生成
+        self.exclude_patterns = list(exclude_patterns or []) + self._output_patterns(self.root, output_paths or [])
+        self.respect_gitignore = respect_gitignore
+        self.interval = interval
+        self.debounce = debounce
+        self.on_change = on_change
+        self.ignore = IgnoreRules(self.root, self.exclude_patterns, respect_gitignore)
+        self.backend = self._create_backend(backend)
+        self.revision = 0
+        self.file_metrics: Dict[str, Dict[str, Any]] = {}
+        self.dependencies: Dict[str, Dict[str, Any]] = {}
+        self._summarizer = LLMCodeSummarizer()
+        self._complexity_cache_path = blob_cache_path(self.root, HotspotAnalyzer.CACHE_FILE)
+        self._loc_cache_path = blob_cache_path(self.root, LanguageStats.CACHE_FILE)
+        self._complexity_cache = load_blob_cache(self._complexity_cache_path)
+        self._loc_cache = load_blob_cache(self._loc_cache_path)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _output_patterns(root: str, output_paths: List[str]) -> List[str]:
+        """把位于 root 内的输出路径转换为锚定到根目录的忽略模式（root 本身和 root 之外的路径跳过）"""
+        patterns = []
+        for path in output_paths:
+            rel = os.path.relpath(os.path.abspath(path), root)
+            if rel == '.' or rel == os.pardir or rel.startswith(os.pardir + os.sep):
+                continue
+            patterns.append('/' + rel.replace(os.sep, '/'))
+        return patterns
+
+    def _create_backend(self, backend: str):
+        if backend in ("auto", "inotify"):
+            try:
+                return InotifyBackend(self.root, self.ignore)
+            except (OSError, AttributeError):
+                if backend == "inotify":
+                    raise
+        return PollingBackend(self.root, self.ignore)
+
+    @property
+    def backend_name(self) -> str:
+        return "inotify" if isinstance(self.backend, InotifyBackend) else "polling"
+
+    # === 生命周期 ===
+
+    def prime(self) -> Dict[str, Any]:
+        """首次全量计算清单、指标和依赖解析"""
+        return self.apply(None)
+
+    def start(self) -> None:
+        """在后台线程中持续监听"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="gitseek-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.backend.close()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.poll_once()
+
+    def poll_once(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """等待一批事件并处理；事件停止到达 debounce 秒后才处理，合并编辑器的连续写入"""
+        changed = self.backend.poll(self.interval if timeout is None else timeout)
+        if changed is not None and not changed:
+            return None
+        while changed is not None:
+            more = self.backend.poll(self.debounce)
+            if more is None:
+                changed = None
+            elif not more:
+                break
+            else:
+                changed |= more
+        return self.apply(changed)
+
+    # === 增量更新 ===
+
+    def apply(self, changed: Optional[Set[str]]) -> Dict[str, Any]:
+        """处理一批变化的路径（None 表示全量重算）"""
+        with self._lock:
+            index = get_file_index(self.root, self.respect_gitignore)
+            if changed:
+                index.update_files(changed, self.ignore)
+            # 目录 mtime 变化（新建/删除/重命名）由索引增量扫描处理
+            inventory = get_inventory(self.root, refresh=True, exclude_patterns=self.exclude_patterns,
+                                      respect_gitignore=self.respect_gitignore)
+            # .gitattributes 的 linguist 标记变化会影响所有文件是否跳过，按全量重算处理
+            if changed is not None and any(p.rsplit('/', 1)[-1] == '.gitattributes' for p in changed):
+                changed = None
+            if changed is None:
+                self.file_metrics.clear()
+                self.dependencies.clear()
+                paths = {entry.path for entry in inventory.entries.values() if not entry.is_dir}
+            else:
+                paths = set(changed)
+            detector = None if self.include_generated else get_generated_detector(self.root)
+
+            sections: Set[str] = set()
+            for path in paths:
+                entry = inventory.get(path)
+                if entry is not None and entry.is_dir:
+                    continue  # 目录内的文件会各自上报
+                if entry is None:
+                    prefix = path + '/'
+                    for stale in [p for p in self.file_metrics if p == path or p.startswith(prefix)]:
+                        del self.file_metrics[stale]
+                        sections.update(("structure", "language_stats", "code_quality"))
+                    for stale in [p for p in self.dependencies if p == path or p.startswith(prefix)]:
+                        del self.dependencies[stale]
+                        sections.add("dependencies")
+                    continue
+                if path not in self.file_metrics:
+                    sections.add("structure")
+                metrics = self._file_metrics(index, entry, detector)
+                if metrics != self.file_metrics.get(path):
+                    self.file_metrics[path] = metrics
+                    sections.update(("language_stats", "code_quality"))
+                if entry.name.lower() in self.DEPENDENCY_FILES:
+                    parsed = self._parse_dependencies(inventory.absolute(path))
+                    if parsed != self.dependencies.get(path):
+                        self.dependencies[path] = parsed
+                        sections.add("dependencies")
+
+            if sections & {"language_stats", "code_quality"}:
+                save_blob_cache(self._complexity_cache_path, self._complexity_cache)
+                save_blob_cache(self._loc_cache_path, self._loc_cache)
+            self.revision += 1
+            summary = {
+                "revision": self.revision,
+                "backend": self.backend_name,
+                "full_rescan": changed is None,
+                "changed_count": len(paths),
+                "changed": sorted(paths)[:50],
+                "sections": sorted(sections),
+                "scan_stats": inventory.scan_stats
+            }
+        if self.on_change is not None:
+            self.on_change(summary)
+        return summary
+
+    def _file_metrics(self, index, entry, detector) -> Dict[str, Any]:
+        """单个文件的代码行和复杂度（按内容哈希缓存）；生成的、第三方和压缩的文件默认不统计"""
+        language = LanguageStats.detect_language(entry.path)
+        if not language:
+            return {"language": ""}
+        abs_path = os.path.join(self.root, *entry.path.split('/'))
+        if detector is not None:
+            reason = detector.classify_file(entry.path, abs_path, language)
+            if reason:
+                return {"language": "", "generated": reason}
+        sha = index.content_hash(entry.path)
+        metrics: Dict[str, Any] = {"language": language, "sha": sha}
+
+        key = f"{sha}:{language}"
+        counts = lookup(self._loc_cache, key) if sha else None
+        if counts is None:
+            counts = self._count_file(abs_path, language)
+            if sha is not None:
+                self._loc_cache[key] = counts
+        metrics["loc"] = counts
+
+        if entry.ext in self._summarizer.LANGUAGE_EXTENSIONS and entry.size <= HotspotAnalyzer.MAX_FILE_BYTES:
+            complexity = lookup(self._complexity_cache, sha)
+            if complexity is None or "generated" not in complexity:
+                try:
+                    with open(abs_path, 'rb') as f:
+                        raw = f.read()
+                except OSError:
+                    return metrics
+                complexity = HotspotAnalyzer.measure(entry.path, raw, self._summarizer)
+                if sha:
+                    self._complexity_cache[sha] = complexity
+            metrics["complexity"] = complexity
+        return metrics
+
+    @staticmethod
+    def _count_file(abs_path: str, language: str) -> Optional[List[int]]:
+        counter = LineCounter(language)
+        try:
+            with open(abs_path, 'rb') as f:
+                first = True
+                while True:
+                    chunk = f.read(LanguageStats.CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    if first and b'\0' in chunk[:8192]:
+                        return None
+                    first = False
+                    counter.feed(chunk)
+        except OSError:
+            return None
+        return counter.finish()
+
+    @staticmethod
+    def _parse_dependencies(abs_path: str) -> Dict[str, Any]:
+        return ManifestParser.parse_file(abs_path) or {}
+
+    # === 当前状态 ===
+
+    def language_stats(self) -> Dict[str, Any]:
+        """工作区（含未提交修改）的语言与代码行统计"""
+        with self._lock:
+            records = [(m["language"], m.get("loc")) for m in self.file_metrics.values() if m["language"]]
+        stats = LanguageStats.aggregate(records)
+        stats["files_skipped"] = stats.pop("binary_files")
+        stats["ref"] = "working tree"
+        return stats
+
+    def code_quality(self) -> Dict[str, Any]:
+        with self._lock:
+            values = [m["complexity"] for m in self.file_metrics.values() if m.get("complexity")]
+        total = sum(v["cyclomatic_complexity"] for v in values)
+        return {
+            "source_files": len(values),
+            "total_lines": sum(v["lines"] for v in values),
+            "avg_complexity": round(total / len(values), 2) if values else 0,
+            "max_complexity": max((v["cyclomatic_complexity"] for v in values), default=0),
+            "function_count": sum(v["function_count"] for v in values)
+        }
+
+    def dependency_summary(self) -> Dict[str, Dict[str, Any]]:
+        """按生态整理的依赖清单：{生态: {"文件 (字段)": [包名...]}}，与架构分析的 dependencies 结构一致"""
+        summary: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            items = sorted(self.dependencies.items())
+        for path, parsed in items:
+            ecosystem = self.DEPENDENCY_FILES.get(path.rsplit('/', 1)[-1].lower(), 'other')
+            for field in ("dependencies", "devDependencies"):
+                packages = parsed.get(field)
+                if packages:
+                    label = path if field == "dependencies" else f"{path} ({field})"
+                    summary.setdefault(ecosystem, {})[label] = list(packages)
+        return summary
+
+    def structure(self) -> Dict[str, Any]:
+        """工作区的顶层目录概要（与架构分析的 structure 结构一致），每个目录附带其中的文件数"""
+        with self._lock:
+            paths = list(self.file_metrics)
+        counts: Dict[str, int] = {}
+        for path in paths:
+            if '/' in path:
+                top = path.split('/', 1)[0]
+                counts[top] = counts.get(top, 0) + 1
+        items = [{"name": name, "type": "directory", "description": f"{count} 个文件"}
+                 for name, count in sorted(counts.items())]
+        return {"root": {"name": os.path.basename(self.root), "type": "directory", "items": items}}
+
+    def packages(self) -> Dict[str, Any]:
+        """工作区（含未提交修改）的子项目划分与汇总，直接使用已增量维护的逐文件指标和依赖解析"""
+        with self._lock:
+            metrics = sorted(self.file_metrics.items())
+            manifests = dict(self.dependencies)
+        entries, loc, complexity = [], {}, {}
+        for path, item in metrics:
+            # 未能计算内容哈希的文件以路径为键
+            key = item.get("sha") or path
+            entries.append({"path": path, "sha": key})
+            if item["language"]:
+                loc[f"{key}:{item['language']}"] = item.get("loc")
+            if item.get("complexity"):
+                complexity[key] = item["complexity"]
+            elif item.get("generated"):
+                complexity[key] = {"generated": item["generated"]}
+        return MonorepoAnalyzer(self.root).summarize(entries, get_generated_detector(self.root), loc, complexity,
+                                                     manifests, self.include_generated)
+
+    def merge_into(self, project_data: Dict[str, Any]) -> Dict[str, Any]:
+        """把工作区的实时数据合并到报告数据中（覆盖目录概要、语言统计、子项目、依赖和平均复杂度）"""
+        metadata = project_data.setdefault('metadata', {})
+        metadata.setdefault('name', os.path.basename(self.root))
+        metadata['clone_path'] = self.root
+        architecture = project_data.setdefault('architecture', {})
+        architecture['structure'] = self.structure()
+        architecture['language_stats'] = self.language_stats()
+        architecture['packages'] = self.packages()
+        dependencies = self.dependency_summary()
+        if dependencies:
+            architecture['dependencies'] = dependencies
+        code_review = project_data.setdefault('code_review', {})
+        code_review['avg_complexity'] = self.code_quality()['avg_complexity']
+        return project_data
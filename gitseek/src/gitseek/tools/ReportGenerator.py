@@ -3,9 +3,13 @@ from typing import Type, Dict, Any, List
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import ClassVar
+import hashlib
 import json
 import os
 
+from .LanguageStats import LanguageStats
+from .MonorepoAnalyzer import MonorepoAnalyzer
+
 
 class ReportGenerationInput(BaseModel):
     """Input schema for ReportGenerator."""
@@ -14,6 +18,52 @@ class ReportGenerationInput(BaseModel):
     generate_qa: bool = Field(default=True, description="是否生成 QA 数据集")
 
 
+class SectionCache:
+    """报告各部分的渲染缓存，保存在报告旁的 .report-sections.json。
+
+    每部分以其输入数据的 JSON 指纹为键；监听模式下一次编辑通常只改变少数输入，
+    其余部分直接复用上次生成的文本。
+    """
+
+    CACHE_FILE: ClassVar[str] = ".report-sections.json"
+
+    def __init__(self, output_path: str):
+        self.path = self.path_for(output_path)
+        self.rendered: List[str] = []
+        self.reused: List[str] = []
+        self._old: Dict[str, Dict[str, str]] = {}
+        self._new: Dict[str, Dict[str, str]] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._old = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def path_for(cls, output_path: str) -> str:
+        """报告 output_path 对应的缓存文件路径"""
+        return os.path.join(os.path.dirname(output_path) or ".", cls.CACHE_FILE)
+
+    def render(self, name: str, inputs: Any, build) -> str:
+        key = hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        cached = self._old.get(name)
+        if cached and cached.get('key') == key:
+            text = cached['text']
+            self.reused.append(name)
+        else:
+            text = build()
+            self.rendered.append(name)
+        self._new[name] = {'key': key, 'text': text}
+        return text
+
+    def save(self) -> None:
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self._new, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+
 class ReportGenerator(BaseTool):
     name: str = "Technical Report Generator"
     description: str = """将所有分析结果整合为结构化的 Markdown 技术报告。
@@ -85,7 +135,15 @@ class ReportGenerator(BaseTool):
 
 {dependencies}
 
-### 2.5 架构评估
+### 2.5 语言与代码规模
+
+{language_stats}
+
+### 2.6 子项目（Monorepo）
+
+{packages}
+
+### 2.7 架构评估
 
 {architecture_assessment}
 
@@ -201,46 +259,69 @@ class ReportGenerator(BaseTool):
             architecture = project_data.get('architecture', {})
             code_review = project_data.get('code_review', {})
             community = project_data.get('community', {})
+            language_stats = self._get_language_stats(architecture, metadata)
+            packages = self._get_packages(architecture, metadata)
             
-            # 生成报告内容
+            # 生成报告内容：各部分按输入数据的指纹缓存，输入未变化的部分直接复用上次的文本
+            # 本地提交历史由社区分析任务写入 community_data.json 的 history 字段
+            history = project_data.get('history') or community.get('history', {})
+            sections = SectionCache(output_path)
+            render = sections.render
             report_content = self.REPORT_TEMPLATE.format(
                 project_name=metadata.get('name', 'Unknown Project'),
                 timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 repo_url=metadata.get('html_url', ''),
-                main_language=metadata.get('language', 'N/A'),
+                main_language=metadata.get('language') or language_stats.get('primary_language') or 'N/A',
                 full_name=metadata.get('full_name', 'N/A'),
                 stars=metadata.get('stars', 0),
                 forks=metadata.get('forks', 0),
                 contributors=community.get('total_contributors', 0),
                 health_score=community.get('health_score', 0),
-                executive_summary=self._generate_executive_summary(project_data),
+                executive_summary=render('executive_summary', project_data,
+                                         lambda: self._generate_executive_summary(project_data)),
                 description=metadata.get('description', 'No description available.'),
                 topics=self._format_topics(metadata.get('topics', [])),
                 license=metadata.get('license', 'No license'),
                 created_at=self._format_date(metadata.get('created_at')),
                 updated_at=self._format_date(metadata.get('updated_at')),
                 size=metadata.get('size', 0),
-                directory_structure=self._format_directory_structure(architecture),
-                core_modules=self._format_core_modules(architecture),
-                config_files=self._format_config_files(architecture),
-                dependencies=self._format_dependencies(architecture),
-                architecture_assessment=self._assess_architecture(architecture),
-                reviewed_files=self._format_reviewed_files(code_review),
-                code_quality_metrics=self._format_quality_metrics(code_review),
-                design_patterns=self._format_design_patterns(code_review),
-                code_complexity=self._format_code_complexity(code_review),
-                code_recommendations=self._format_code_recommendations(code_review),
-                community_health=self._format_community_health(community),
-                issue_analysis=self._format_issue_analysis(community),
-                pr_analysis=self._format_pr_analysis(community),
-                contributors_analysis=self._format_contributors(community),
-                activity_trends=self._format_activity_trends(metadata, community),
-                project_strengths=self._identify_strengths(project_data),
-                improvement_areas=self._identify_improvements(project_data),
-                strategic_recommendations=self._generate_strategic_recommendations(project_data),
-                technical_debt=self._assess_technical_debt(code_review),
-                conclusion=self._generate_conclusion(project_data)
+                directory_structure=render('directory_structure', architecture,
+                                           lambda: self._format_directory_structure(architecture)),
+                core_modules=render('core_modules', architecture, lambda: self._format_core_modules(architecture)),
+                config_files=render('config_files', architecture, lambda: self._format_config_files(architecture)),
+                dependencies=render('dependencies', architecture, lambda: self._format_dependencies(architecture)),
+                language_stats=render('language_stats', language_stats,
+                                      lambda: self._format_language_stats(language_stats)),
+                packages=render('packages', packages, lambda: self._format_packages(packages)),
+                architecture_assessment=render('architecture_assessment', architecture,
+                                               lambda: self._assess_architecture(architecture)),
+                reviewed_files=render('reviewed_files', code_review, lambda: self._format_reviewed_files(code_review)),
+                code_quality_metrics=render('code_quality_metrics', code_review,
+                                            lambda: self._format_quality_metrics(code_review)),
+                design_patterns=render('design_patterns', code_review,
+                                       lambda: self._format_design_patterns(code_review)),
+                code_complexity=render('code_complexity', code_review,
+                                       lambda: self._format_code_complexity(code_review)),
+                code_recommendations=render('code_recommendations', code_review,
+                                            lambda: self._format_code_recommendations(code_review)),
+                community_health=render('community_health', community,
+                                        lambda: self._format_community_health(community)),
+                issue_analysis=render('issue_analysis', community, lambda: self._format_issue_analysis(community)),
+                pr_analysis=render('pr_analysis', community, lambda: self._format_pr_analysis(community)),
+                contributors_analysis=render('contributors_analysis', community,
+                                             lambda: self._format_contributors(community)),
+                activity_trends=render('activity_trends', [metadata, community, history],
+                                       lambda: self._format_activity_trends(metadata, community, history)),
+                project_strengths=render('project_strengths', project_data,
+                                         lambda: self._identify_strengths(project_data)),
+                improvement_areas=render('improvement_areas', project_data,
+                                         lambda: self._identify_improvements(project_data)),
+                strategic_recommendations=render('strategic_recommendations', project_data,
+                                                 lambda: self._generate_strategic_recommendations(project_data)),
+                technical_debt=render('technical_debt', code_review, lambda: self._assess_technical_debt(code_review)),
+                conclusion=render('conclusion', project_data, lambda: self._generate_conclusion(project_data))
             )
+            sections.save()
             
             # 写入报告文件
             with open(output_path, 'w', encoding='utf-8') as f:
@@ -250,6 +331,8 @@ class ReportGenerator(BaseTool):
                 "success": True,
                 "report_path": output_path,
                 "report_size": len(report_content),
+                "sections_rendered": sections.rendered,
+                "sections_reused": sections.reused,
                 "timestamp": datetime.now().isoformat()
             }
             
@@ -285,6 +368,8 @@ class ReportGenerator(BaseTool):
                 with open('output/scout_data.json', 'r', encoding='utf-8') as f:
                     scout_data = json.load(f)
                     data['metadata'] = scout_data.get('metadata', {})
+                    if scout_data.get('clone_path'):
+                        data['metadata'].setdefault('clone_path', scout_data['clone_path'])
                     print(f"✅ 加载元数据: {data['metadata'].get('name', 'Unknown')} - {data['metadata'].get('stars', 0)} stars")
             
             # 读取架构数据
@@ -458,6 +543,77 @@ class ReportGenerator(BaseTool):
         
         return result
 
+    def _get_language_stats(self, arch: Dict, metadata: Dict) -> Dict:
+        """优先使用架构分析中的语言统计，没有时对克隆目录现场统计（结果按内容哈希缓存）"""
+        stats = arch.get('language_stats') or {}
+        if stats.get('languages'):
+            return stats
+        clone_path = metadata.get('clone_path', '')
+        if clone_path and os.path.isdir(clone_path):
+            try:
+                return LanguageStats(clone_path).compute()
+            except Exception as e:
+                print(f"⚠️ 语言统计失败: {e}")
+        return {}
+
+    def _get_packages(self, arch: Dict, metadata: Dict) -> Dict:
+        """优先使用架构分析中的子项目结果，没有时对克隆目录现场分析"""
+        packages = arch.get('packages') or {}
+        if packages.get('packages'):
+            return packages
+        clone_path = metadata.get('clone_path', '')
+        if clone_path and os.path.isdir(clone_path):
+            try:
+                return MonorepoAnalyzer(clone_path).analyze()
+            except Exception as e:
+                print(f"⚠️ 子项目分析失败: {e}")
+        return {}
+
+    def _format_packages(self, data: Dict) -> str:
+        """格式化各子项目的结构、依赖和代码指标"""
+        packages = data.get('packages', [])
+        if not data.get('is_monorepo') or len(packages) < 2:
+            return "单一项目：未发现多个子项目清单（package.json / pyproject.toml / go.mod 等）"
+
+        rollup = data.get('rollup', {})
+        ecosystems = '、'.join(f"{name} {count} 个" for name, count in rollup.get('ecosystems', {}).items())
+        result = (f"共 **{rollup.get('package_count', len(packages))}** 个子项目（{ecosystems}），"
+                  f"外部依赖 {rollup.get('external_dependencies', 0)} 个，"
+                  f"子项目之间的内部依赖 {rollup.get('internal_edges', 0)} 条。\n\n")
+        result += "| 子项目 | 路径 | 主要语言 | 文件数 | 代码行 | 依赖数 | 内部依赖 | 平均复杂度 |\n"
+        result += "|--------|------|----------|--------|--------|--------|----------|------------|\n"
+        ordered = sorted(packages, key=lambda p: p.get('totals', {}).get('code', 0), reverse=True)
+        for package in ordered[:20]:
+            internal = ', '.join(package.get('internal_dependencies', [])) or '-'
+            result += (f"| {package['name']} | `{package['path']}` | {package.get('primary_language') or '-'} "
+                       f"| {package['structure']['files']} | {package['totals']['code']} "
+                       f"| {len(package.get('dependencies', []))} | {internal} "
+                       f"| {package['code_metrics']['avg_complexity']} |\n")
+        if len(packages) > 20:
+            result += f"\n*... 以及其他 {len(packages) - 20} 个子项目*\n"
+        return result
+
+    def _format_language_stats(self, stats: Dict) -> str:
+        """格式化各语言的文件数和代码/注释/空行数"""
+        languages = stats.get('languages', [])
+        if not languages:
+            return "语言统计数据未获取"
+
+        result = "| 语言 | 文件数 | 代码行 | 注释行 | 空行 | 代码占比 |\n|------|--------|--------|--------|------|----------|\n"
+        for item in languages[:12]:
+            result += (f"| {item['language']} | {item['files']} | {item['code']} | {item['comment']} "
+                       f"| {item['blank']} | {item.get('code_share', 0)}% |\n")
+        if len(languages) > 12:
+            result += f"\n*... 以及其他 {len(languages) - 12} 种语言*\n"
+
+        totals = stats.get('totals', {})
+        if totals:
+            comment_ratio = totals['comment'] / (totals['code'] + totals['comment']) * 100 \
+                if totals.get('code') or totals.get('comment') else 0
+            result += (f"\n**合计:** {totals.get('files', 0)} 个文件，代码 {totals.get('code', 0)} 行，"
+                       f"注释 {totals.get('comment', 0)} 行（注释率 {comment_ratio:.1f}%），空行 {totals.get('blank', 0)} 行\n")
+        return result
+
     def _format_reviewed_files(self, code_review: Dict) -> str:
         """格式化审查的文件列表"""
         files = code_review.get('reviewed_files', [])
@@ -587,12 +743,72 @@ class ReportGenerator(BaseTool):
         
         return result
 
-    def _format_activity_trends(self, metadata: Dict, community: Dict) -> str:
+    def _format_activity_trends(self, metadata: Dict, community: Dict, history: Dict = None) -> str:
         """格式化活跃度趋势"""
-        return f"""基于最近更新时间和社区活动:
+        result = f"""基于最近更新时间和社区活动:
 - 最后更新: {self._format_date(metadata.get('updated_at'))}
 - 活跃度: {community.get('activity_level', '未知')}
 """
+        if not history or not history.get('total_commits'):
+            return result
+
+        cadence = history.get('commit_cadence', {})
+        result += f"""
+**本地提交历史:**
+- 提交总数: {history.get('total_commits', 0)}，作者数: {history.get('total_authors', 0)}，涉及文件: {history.get('files_touched', 0)}
+- 首次提交: {self._format_date(history.get('first_commit'))}，最近提交: {self._format_date(history.get('last_commit'))}
+- 提交节奏: 平均每周 {cadence.get('commits_per_week', 'N/A')} 次，最长间隔 {cadence.get('longest_gap_days', 'N/A')} 天，距最近提交 {cadence.get('days_since_last_commit', 'N/A')} 天
+"""
+
+        weekly = history.get('weekly_activity', [])[-12:]
+        if weekly:
+            peak = max(w.get('commits', 0) for w in weekly) or 1
+            result += "\n**最近 12 周提交量:**\n\n```\n"
+            for week in weekly:
+                commits = week.get('commits', 0)
+                result += f"{week.get('week')} {'█' * round(commits / peak * 20):<20} {commits}\n"
+            result += "```\n"
+
+        churn_files = history.get('top_churn_files', [])[:5]
+        if churn_files:
+            result += "\n**变更最频繁的文件:**\n\n| 文件 | 提交数 | 变更行数 | 最近修改 |\n|------|--------|----------|----------|\n"
+            for file_info in churn_files:
+                result += (f"| `{file_info.get('path')}` | {file_info.get('commits', 0)} | "
+                           f"{file_info.get('churn', 0)} | {self._format_date(file_info.get('last_touch'))} |\n")
+
+        return result
+
+    def _assess_architecture(self, arch: Dict) -> str:
+        """根据架构分析结果给出架构评估要点"""
+        if not arch:
+            return "架构数据未获取"
+
+        points = []
+        core_dirs = arch.get('core_directories', [])
+        if core_dirs:
+            points.append(f"✅ 代码按 {len(core_dirs)} 个核心目录组织，模块边界较清晰")
+        else:
+            points.append("⚠️ 未识别到明确的核心目录，建议梳理模块划分")
+
+        config_files = arch.get('config_files', [])
+        if config_files:
+            points.append(f"✅ 包含 {len(config_files)} 个配置文件，构建与运行环境有据可查")
+
+        deps = arch.get('dependencies', {})
+        if deps:
+            total = sum(len(packages) for groups in deps.values() if isinstance(groups, dict)
+                        for packages in groups.values() if isinstance(packages, (list, dict)))
+            points.append(f"📦 涉及 {len(deps)} 个技术生态，共 {total} 项依赖声明")
+
+        packages = arch.get('packages') or {}
+        if packages.get('is_monorepo'):
+            points.append(f"🧩 Monorepo 结构，包含 {len(packages.get('packages', []))} 个子项目")
+
+        languages = (arch.get('language_stats') or {}).get('languages', [])
+        if len(languages) > 1:
+            points.append(f"🛠️ 使用 {len(languages)} 种编程语言，主要语言为 {languages[0].get('language', 'N/A')}")
+
+        return "\n".join(f"- {point}" for point in points)
 
     def _identify_strengths(self, data: Dict) -> str:
         """识别项目优势"""
@@ -4,6 +4,8 @@ from pydantic import BaseModel, Field
 import json
 import os
 
+from .RepoInventory import get_inventory
+
 class QuestionGuideInput(BaseModel):
     """Input schema for SmartQuestionGuide."""
     repo_data: Dict = Field(..., description="仓库分析数据")
@@ -143,7 +145,15 @@ class SmartQuestionGuide(BaseTool):
         """检查是否有详细文档"""
         metadata = repo_data.get('metadata', {})
         description = metadata.get('description', '')
-        has_readme = os.path.exists('cloned_repos/README.md')  # 简化判断
+        # 从本地克隆的文件清单中查找 README 和文档目录（与其他工具共用一次目录遍历）；
+        # 没有克隆路径时只看描述，不能退回到整个克隆目录（那里是所有仓库的上级目录）
+        clone_path = repo_data.get('clone_path') or metadata.get('clone_path') or ''
+        has_readme = False
+        if clone_path and os.path.isdir(clone_path):
+            inventory = get_inventory(clone_path)
+            has_readme = any(entry.name.upper().startswith('README')
+                             or (entry.is_dir and entry.name.lower() in inventory.DOC_DIRS)
+                             for entry in inventory.list_dir(""))
         
         return bool(description and len(description) > 50) or has_readme
 
@@ -0,0 +1,15 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path_factory, monkeypatch):
+    """持久化索引、blob 缓存和镜像缓存都写到临时目录，不落到开发者的 ~/.cache 或被分析仓库的 .git 中"""
+    root = tmp_path_factory.mktemp("gitseek-cache")
+    monkeypatch.setenv("GITSEEK_INDEX_DIR", str(root / "index"))
+    monkeypatch.setenv("GITSEEK_BLOB_CACHE_DIR", str(root / "blobs"))
+    monkeypatch.setenv("GITSEEK_MIRROR_CACHE", str(root / "mirrors"))
@@ -0,0 +1,16 @@
+from gitseek.tools.BatchFileReader import BatchFileContentReader
+
+
+def test_windows_of_the_same_file_are_all_read(tmp_path):
+    """同一文件的不同行范围都要读取；完全重复的请求只读一次并在 duplicates 中列出"""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "app.py").write_text("".join(f"line {n}\n" for n in range(1, 31)))
+
+    result = BatchFileContentReader()._run(["app.py:1-5", "app.py:20-25", "app.py:1-5", "*.py", "app.py"],
+                                           repo_path=str(repo))
+    assert result["success"], result
+    assert [(f["path"], f.get("start_line")) for f in result["files"]] == \
+        [("app.py", 1), ("app.py", 20), ("app.py", 1)]
+    assert "line 20" in result["files"][1]["content"]
+    assert result["duplicates"] == ["app.py:1-5", "app.py"]
@@ -0,0 +1,13 @@
+from gitseek.tools import BlobCache
+from gitseek.tools.BlobCache import load_blob_cache, lookup, save_blob_cache
+
+
+def test_save_keeps_most_recently_used_entries(tmp_path, monkeypatch):
+    """超过上限时按最近使用淘汰：lookup 命中的条目保留，最久未使用的被丢弃"""
+    monkeypatch.setattr(BlobCache, "MAX_ENTRIES", 2)
+    path = str(tmp_path / "cache.json")
+    cache = {"a": [1], "b": [2], "c": [3]}
+    assert lookup(cache, "a") == [1]
+    assert lookup(cache, "missing") is None
+    save_blob_cache(path, cache)
+    assert list(load_blob_cache(path)) == ["c", "a"]
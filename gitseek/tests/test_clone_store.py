@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from gitseek.tools.CloneStore import CloneStore
+from gitseek.tools.RepoFetchScheduler import RepoFetchScheduler
+
+
+def make_checkout(root, name, size=1024):
+    path = root / name
+    path.mkdir(parents=True)
+    (path / "data.bin").write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_entries_are_keyed_by_owner_and_repo(tmp_path):
+    """不同所有者的同名仓库各自登记，引用按 owner/repo 区分"""
+    store = CloneStore(str(tmp_path), budget_bytes=0)
+    store.record_fetch("https://github.com/alice/utils", make_checkout(tmp_path, "alice-utils"))
+    store.record_fetch("https://github.com/bob/utils.git", make_checkout(tmp_path, "bob-utils"))
+    assert [e["name"] for e in store.usage()["entries"]] == ["bob/utils", "alice/utils"]
+
+    with store.using(str(tmp_path / "alice-utils")) as ref_file:
+        assert ref_file is not None
+        in_use = {e["name"]: e["in_use"] for e in store.usage()["entries"]}
+    assert in_use == {"alice/utils": True, "bob/utils": False}
+
+
+def test_referenced_checkout_survives_eviction(tmp_path):
+    store = CloneStore(str(tmp_path), budget_bytes=1)
+    old = make_checkout(tmp_path, "old")
+    store.record_fetch("https://github.com/alice/old", old)
+    with store.using(old, "https://github.com/alice/old"):
+        assert store.evict() == []
+    assert store.evict() == ["alice/old"]
+
+
+def test_analysis_fails_when_checkout_was_evicted(tmp_path):
+    """获取完成后、分析开始前仓库已被淘汰时，分析直接失败而不是读取不存在的目录"""
+    scheduler = RepoFetchScheduler(str(tmp_path))
+    result = {"repo_url": "https://github.com/alice/gone", "local_path": str(tmp_path / "gone")}
+    analyzed = []
+    with pytest.raises(FileNotFoundError):
+        scheduler._analyze(analyzed.append, result)
+    assert analyzed == []
+
+
+def test_concurrent_fetches_reserve_the_disk_budget(tmp_path, monkeypatch):
+    """并发获取在开始前预留估计大小：两个仓库同时开始时，超出预算的那个被跳过而不是一起获取"""
+    scheduler = RepoFetchScheduler(str(tmp_path / "cloned"), max_concurrent=2, disk_budget_bytes=100,
+                                   estimate_bytes=lambda url: 60)
+    started = []
+
+    def fake_fetch(url):
+        started.append(url)
+        time.sleep(0.2)
+        return "✅ fetched\n   fetched_bytes: 50"
+
+    monkeypatch.setattr(scheduler, "_fetch_once", fake_fetch)
+    results = list(scheduler.fetch_all(["https://github.com/alice/a", "https://github.com/bob/b"]))
+    assert len(started) == 1
+    assert sorted(r["success"] for r in results) == [False, True]
+    assert scheduler._disk_used == 50 and scheduler._disk_reserved == 0
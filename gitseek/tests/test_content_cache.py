@@ -0,0 +1,38 @@
+from gitseek.tools.ContentCache import ContentCache
+from gitseek.tools.FileContentReader import FileContentReader
+
+
+def test_large_file_survives_truncation(tmp_path, monkeypatch):
+    """大文件按需读取：读取后文件被截断，后续访问只得到较短内容，不会因 SIGBUS 崩溃"""
+    monkeypatch.setattr(ContentCache, "MAX_ENTRY_BYTES", 1024)
+    path = tmp_path / "big.log"
+    path.write_bytes(b"".join(b"line %d\n" % n for n in range(2000)))
+
+    content = ContentCache().get_file(str(path))
+    assert content.mapped
+    assert content.index.line_count() == 2000
+    begin, finish = content.index.span(1000, 1002)
+    assert content.buffer[begin:finish] == b"line 1000\nline 1001\n"
+
+    path.write_bytes(b"short\n")
+    assert content.buffer[begin:finish] == b""
+    assert content.buffer[0:6] == b"short\n"
+    assert content.buffer.find(b"line") == -1
+
+
+def test_reader_windows_large_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(ContentCache, "MAX_ENTRY_BYTES", 1024)
+    path = tmp_path / "big.txt"
+    path.write_bytes(b"".join(b"row %d\n" % n for n in range(5000)))
+    result = FileContentReader()._run(str(path), start_line=4000, end_line=4001)
+    assert result["content"] == "row 3999\nrow 4000"
+
+
+def test_truncation_note_reports_the_lines_shown(tmp_path):
+    """max_lines 超过 MAX_WINDOW_LINES 时按实际返回的行数提示截断"""
+    path = tmp_path / "long.txt"
+    path.write_bytes(b"".join(b"row %d\n" % n for n in range(3000)))
+    result = FileContentReader()._run(str(path), max_lines=5000, parse_content=False)
+    lines = result["content"].split("\n")
+    assert result["end_line"] == FileContentReader.MAX_WINDOW_LINES
+    assert lines[-1] == f"... (文件超过{FileContentReader.MAX_WINDOW_LINES}行，已截断)"
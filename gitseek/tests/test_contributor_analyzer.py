@@ -0,0 +1,37 @@
+from gitseek.tools.ContributorAnalyzer import ContributorAnalyzer
+from gitseek.tools.GitHistoryAnalyzer import HistoryStats
+
+
+def make_stats(*authors):
+    stats = HistoryStats()
+    for commits, name, email in authors:
+        stats.authors[f"{name} <{email}>"] = [commits, commits * 10, commits, 1_600_000_000, 1_700_000_000,
+                                              name, email]
+        stats.total_commits += commits
+    return stats
+
+
+def test_same_name_merges_only_with_the_same_email_domain():
+    """同名身份只在邮箱域名相同时合并；邮箱相同的身份总是合并"""
+    stats = make_stats(
+        (6, "John Smith", "john@acme.com"),
+        (2, "john smith", "jsmith@acme.com"),
+        (3, "John Smith", "john.smith@example.org"),
+        (1, "J. Smith", "john@acme.com"),
+    )
+    result = ContributorAnalyzer().compute(stats)
+    assert result["total_contributors"] == 2
+    merged, other = result["top_10_contributors"]
+    assert merged["contributions"] == 9
+    assert sorted(merged["emails"]) == ["john@acme.com", "jsmith@acme.com"]
+    assert other["contributions"] == 3 and other["emails"] == ["john.smith@example.org"]
+    assert result["total_contributions"] == 12
+
+
+def test_gini_and_bus_factor():
+    stats = make_stats((8, "Ann", "ann@a.io"), (1, "Bob", "bob@b.io"), (1, "Cid", "cid@c.io"))
+    result = ContributorAnalyzer().compute(stats)
+    assert result["bus_factor"] == 1
+    assert result["gini_coefficient"] == round(2 * (1 + 2 + 24) / (3 * 10) - 4 / 3, 4)
+    assert ContributorAnalyzer._gini([5, 5, 5]) == 0.0
+    assert ContributorAnalyzer._bus_factor([3, 3, 2, 2], 10) == 2
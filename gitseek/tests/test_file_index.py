@@ -0,0 +1,81 @@
+import os
+import time
+
+from gitseek.tools.FileIndex import FileIndex
+from gitseek.tools.RepoInventory import get_inventory
+
+
+def test_exclude_patterns_do_not_rebuild_shared_index(tmp_path):
+    """不同 exclude_patterns 的调用方共用一份索引：额外模式只在生成清单时过滤，不会清空重建"""
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "gen").mkdir()
+    (repo / "src" / "app.py").write_text("print(1)\n")
+    (repo / "src" / "app.min.js").write_text("x\n")
+    (repo / "gen" / "out.py").write_text("x = 1\n")
+
+    full = get_inventory(str(repo), refresh=True)
+    assert {"src/app.py", "src/app.min.js", "gen/out.py"} <= set(full.entries)
+
+    filtered = get_inventory(str(repo), refresh=True, exclude_patterns=["gen/", "*.min.js"])
+    assert filtered.scan_stats["files_changed"] == 0
+    assert filtered.scan_stats["directories_listed"] == 0
+    assert "gen" not in filtered.entries and "gen/out.py" not in filtered.entries
+    assert "src/app.min.js" not in filtered.entries
+    assert "src/app.py" in filtered.entries
+    assert filtered.ignored == 2
+
+    again = get_inventory(str(repo), refresh=True)
+    assert again.scan_stats["files_changed"] == 0
+    assert again.scan_stats["directories_listed"] == 0
+    assert "gen/out.py" in again.entries
+
+
+def test_in_place_edit_is_detected_without_directory_change(tmp_path):
+    """原地改写文件不改变目录 mtime：refresh 仍 stat 文件，content_hash 不返回旧哈希"""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    target = repo / "app.py"
+    target.write_text("old\n")
+    index = FileIndex(str(repo))
+    index.refresh()
+    old_hash = index.content_hash("app.py")
+
+    directory_mtime = os.stat(repo).st_mtime_ns
+    with open(target, "r+") as f:
+        f.write("new\n")
+    os.utime(target, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+    assert os.stat(repo).st_mtime_ns == directory_mtime
+
+    # 未 refresh 时 content_hash 也会发现文件已变化
+    new_hash = index.content_hash("app.py")
+    assert new_hash != old_hash
+    stats = index.refresh()
+    assert stats["directories_reused"] == 1 and stats["files_changed"] == 0
+
+    with open(target, "r+") as f:
+        f.write("abc\n")
+    os.utime(target, ns=(time.time_ns(), time.time_ns() + 2 * 10 ** 9))
+    stats = index.refresh()
+    assert stats["directories_listed"] == 0 and stats["files_changed"] == 1
+    assert index.content_hash("app.py") not in (old_hash, new_hash)
+
+
+def test_old_index_databases_are_pruned(tmp_path, monkeypatch):
+    """打开索引时删除长期未使用的数据库（连同 -wal 文件），其余超出上限的按最近使用淘汰"""
+    monkeypatch.setattr(FileIndex, "MAX_INDEX_FILES", 3)
+    index_dir = tmp_path / "index"
+    index_dir.mkdir()
+    now = time.time()
+    for name, mtime in (("ancient", 1000), ("older", now - 30), ("recent", now - 20), ("newest", now - 10)):
+        (index_dir / f"{name}-0.sqlite").write_bytes(b"")
+        (index_dir / f"{name}-0.sqlite-wal").write_bytes(b"")
+        os.utime(index_dir / f"{name}-0.sqlite", (mtime, mtime))
+    repo = tmp_path / "repo"
+    repo.mkdir()
+
+    index = FileIndex(str(repo), index_dir=str(index_dir))
+    remaining = {p.name for p in index_dir.iterdir() if p.name.endswith(".sqlite")}
+    assert remaining == {"recent-0.sqlite", "newest-0.sqlite", os.path.basename(index.db_path)}
+    assert not (index_dir / "ancient-0.sqlite-wal").exists()
+    assert not (index_dir / "older-0.sqlite-wal").exists()
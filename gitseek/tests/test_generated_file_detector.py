@@ -0,0 +1,109 @@
+import os
+from collections import OrderedDict
+
+import pytest
+
+from gitseek.tools import GeneratedFileDetector as detector_module
+from gitseek.tools.FileSystemBrowser import FileSystemBrowser
+from gitseek.tools.GeneratedFileDetector import GeneratedFileDetector, get_tree_detector
+
+
+@pytest.mark.parametrize("path", [
+    "vue.config.js",
+    "resources/js/bootstrap.js",
+    "src/moment-utils.js",
+    "src/react-app.js",
+    "src/lodash.js",
+    "extern/bindings.c",
+])
+def test_first_party_files_named_like_libraries_are_kept(path):
+    assert GeneratedFileDetector().classify_path(path) is None
+
+
+@pytest.mark.parametrize("path", [
+    "jquery-3.6.0.js",
+    "static/js/jquery-3.6.0.min.js",
+    "dist/vue.global.prod.js",
+    "public/react-dom.production.min.js",
+    "static/js/jquery.js",
+    "assets/lib/lodash.js",
+    "web/vendor/app.js",
+])
+def test_library_distributions_are_vendored(path):
+    assert GeneratedFileDetector().classify_path(path) == "vendored"
+
+
+def test_gitattributes_patterns_match_the_full_path_only():
+    """与 git 一致：匹配目录的模式不作用于目录中的文件，需要写作 dir/**"""
+    detector = GeneratedFileDetector({
+        "": "gen linguist-generated\nassets/** linguist-vendored\nbuild/ linguist-generated\n*.pb.js -linguist-generated\n",
+        "web": "out linguist-generated=true\n",
+    })
+    assert detector.attributes("gen") == {"generated": True}
+    assert detector.attributes("gen/model.py") == {}
+    assert detector.attributes("src/gen") == {"generated": True}
+    assert detector.attributes("assets/css/site.css") == {"vendored": True}
+    assert detector.attributes("build/app.js") == {}
+    assert detector.attributes("web/out/app.js") == {}
+    assert detector.attributes("web/out") == {"generated": True}
+    assert detector.attributes("api/service.pb.js") == {"generated": False}
+
+
+def make_repo(root):
+    for path, content in {
+        "src/app.py": "print(1)\n",
+        "src/api_pb2.py": "x = 1\n",
+        "static/app.min.js": "x\n",
+        "vendor/lib/util.py": "y = 2\n",
+        "third_party/keep/own.py": "z = 3\n",
+        ".gitattributes": "third_party/keep/** -linguist-vendored\n",
+    }.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(content)
+
+
+def tree_paths(node):
+    if node.get("type") == "file":
+        return {node["path"]}
+    return set().union(set(), *(tree_paths(child) for child in node.get("items", [])))
+
+
+def test_browser_structure_skips_generated_files_by_default(tmp_path):
+    """tree/compact 结构默认不列出生成、第三方和压缩文件，include_generated 时全部列出"""
+    repo = tmp_path / "repo"
+    make_repo(repo)
+    browser = FileSystemBrowser()
+
+    default = {os.path.relpath(p, repo) for p in tree_paths(browser._run(str(repo))["structure"])}
+    assert default == {"src/app.py", "third_party/keep/own.py", ".gitattributes"}
+    names = {item["name"] for item in browser._run(str(repo))["structure"]["items"]}
+    assert "vendor" not in names and "third_party" in names
+
+    everything = {os.path.relpath(p, repo)
+                  for p in tree_paths(browser._run(str(repo), include_generated=True)["structure"])}
+    assert {"src/api_pb2.py", "static/app.min.js", "vendor/lib/util.py"} <= everything
+
+    compact = browser._run(str(repo), output_format="compact")["structure"]
+    assert "vendor" not in compact and "app.min.js" not in compact
+    assert "vendor" in browser._run(str(repo), output_format="compact", include_generated=True)["structure"]
+
+
+def test_tree_detectors_are_bounded(monkeypatch):
+    """按提交缓存的检测器按最近使用保留 MAX_DETECTORS 个"""
+    monkeypatch.setattr(detector_module, "MAX_DETECTORS", 2)
+    monkeypatch.setattr(detector_module, "_TREE_DETECTORS", OrderedDict())
+
+    class Reader:
+        repo_path = "/repo"
+
+        def __init__(self, sha):
+            self.commit_sha = sha
+
+        def list_tree(self):
+            return []
+
+    first = get_tree_detector(Reader("a"))
+    get_tree_detector(Reader("b"))
+    assert get_tree_detector(Reader("a")) is first
+    get_tree_detector(Reader("c"))
+    assert list(detector_module._TREE_DETECTORS) == [("/repo", "a"), ("/repo", "c")]
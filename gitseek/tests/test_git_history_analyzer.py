@@ -0,0 +1,35 @@
+import subprocess
+
+import pytest
+
+from gitseek.tools.GitHistoryAnalyzer import GitHistoryAnalyzer
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), "-c", "user.name=Ann", "-c", "user.email=ann@example.com",
+                           *args], check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / "目录").mkdir()
+    (tmp_path / "目录" / "文件.py").write_text("a\n")
+    (tmp_path / 'quote"d name.txt').write_text("b\n")
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", "-A")
+    git(tmp_path, "commit", "-qm", "first")
+    git(tmp_path, "commit", "-q", "--allow-empty", "-m", "empty")
+    (tmp_path / "目录" / "文件.py").write_text("a\nb\n")
+    git(tmp_path, "commit", "-qam", "second")
+    return tmp_path
+
+
+@pytest.mark.parametrize("line_stats", [True, False])
+def test_paths_match_ls_tree_for_non_ascii_names(repo, line_stats):
+    """git log 中的路径与 ls-tree 一致：非 ASCII 和带引号的文件名不被 C 风格转义"""
+    stats = GitHistoryAnalyzer().analyze(str(repo), line_stats=line_stats)
+    tracked = set(git(repo, "-c", "core.quotePath=false", "ls-tree", "-r", "-z", "--name-only", "HEAD")
+                  .split("\0")) - {""}
+    assert set(stats.files) == tracked
+    assert stats.total_commits == 3
+    assert stats.files["目录/文件.py"][0] == 2
@@ -0,0 +1,56 @@
+import subprocess
+
+from gitseek.tools import GitObjectReader as module
+from gitseek.tools.GitObjectReader import get_object_reader
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), "-c", "user.name=Ann", "-c", "user.email=ann@example.com",
+                           *args], check=True, capture_output=True, text=True).stdout
+
+
+def make_repo(path, commits=1):
+    path.mkdir()
+    git(path, "init", "-q")
+    for n in range(commits):
+        (path / "a.txt").write_text(f"{n}\n")
+        git(path, "add", "a.txt")
+        git(path, "commit", "-qm", f"c{n}")
+    return path
+
+
+def test_readers_follow_new_commits(tmp_path):
+    """同一提交复用读取器；本地新提交后 HEAD 立即指向新提交的读取器"""
+    repo = make_repo(tmp_path / "repo")
+    reader = get_object_reader(str(repo), "HEAD")
+    assert get_object_reader(str(repo), "HEAD") is reader
+
+    (repo / "a.txt").write_text("new\n")
+    git(repo, "commit", "-qam", "new")
+    newer = get_object_reader(str(repo), "HEAD")
+    assert newer is not reader and newer.read_file("a.txt") == b"new\n"
+
+
+def test_is_dir(tmp_path):
+    repo = make_repo(tmp_path / "repo")
+    (repo / "src" / "pkg").mkdir(parents=True)
+    (repo / "src" / "pkg" / "m.py").write_text("x\n")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-qm", "nested")
+    reader = get_object_reader(str(repo))
+    assert reader.is_dir("src") and reader.is_dir("src/pkg/") and reader.is_dir("")
+    assert not reader.is_dir("src/pkg/m.py") and not reader.is_dir("sr")
+
+
+def test_least_recently_used_readers_are_closed(tmp_path, monkeypatch):
+    monkeypatch.setattr(module, "MAX_READERS", 2)
+    repo = make_repo(tmp_path / "repo", commits=3)
+    readers = []
+    for n in range(3):
+        readers.append(get_object_reader(str(repo), f"HEAD~{n}"))
+        readers[-1].read_file("a.txt")
+    assert readers[0]._process is None
+    assert all(reader._process is not None for reader in readers[1:])
+    assert get_object_reader(str(repo), "HEAD~2") is readers[2]
+    module._close_readers()
+    assert all(reader._process is None for reader in readers)
@@ -0,0 +1,66 @@
+import subprocess
+
+import pytest
+
+from gitseek.tools.CloneStore import CloneStore
+from gitseek.tools.GitArchiveFetcher import GitArchiveFetcher
+from gitseek.tools.GitShellTool import GitShellTool
+
+
+@pytest.mark.parametrize("url, backend", [
+    ("https://github.com/psf/requests", "clone"),
+    ("https://github.com/psf/requests.git", "clone"),
+    ("https://codeload.github.com/psf/requests/tar.gz/refs/heads/main", "archive"),
+    ("https://github.com/psf/requests/archive/refs/tags/v2.31.0.tar.gz", "archive"),
+    ("https://api.github.com/repos/psf/requests/tarball/main", "archive"),
+    ("https://example.com/releases/requests-2.31.0.tgz", "archive"),
+    ("https://github.com/archive/foo", "clone"),
+    ("https://github.com/psf/archive", "clone"),
+    ("https://github.com/tarball/archive.git", "clone"),
+])
+def test_choose_backend_clones_unless_given_an_archive(url, backend):
+    """默认需要提交历史，只有归档地址才直接下载"""
+    assert GitShellTool().choose_backend(url) == backend
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://codeload.github.com/psf/requests/tar.gz/refs/heads/main", ("psf", "requests")),
+    ("https://github.com/psf/requests/archive/refs/tags/v2.31.0.tar.gz", ("psf", "requests")),
+    ("https://api.github.com/repos/psf/requests/tarball/main", ("psf", "requests")),
+    ("https://example.com/releases/requests.tar.gz", ("releases", "requests")),
+    ("git@github.com:psf/requests.git", ("psf", "requests")),
+    ("https://github.com/archive/foo", ("archive", "foo")),
+    ("https://github.com/psf/tarball.git", ("psf", "tarball")),
+    ("https://github.com/psf/requests/tarball/main", ("psf", "requests")),
+])
+def test_archive_urls_resolve_to_the_repository_name(url, expected):
+    assert GitArchiveFetcher.parse_repo_url(url) == expected
+
+
+def make_source(root, owner, content):
+    path = root / owner / "utils"
+    path.mkdir(parents=True)
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    (path / "owner.txt").write_text(content)
+    subprocess.run(["git", "-C", str(path), "add", "-A"], check=True)
+    subprocess.run(["git", "-C", str(path), "-c", "user.name=Ann", "-c", "user.email=ann@example.com",
+                    "commit", "-qm", "content"], check=True)
+    return str(path)
+
+
+def test_same_named_repositories_get_separate_checkouts(tmp_path):
+    """不同所有者的同名仓库检出到 <owner>/<repo>，互不覆盖，淘汰其一不影响另一个"""
+    target = tmp_path / "cloned"
+    tool = GitShellTool()
+    for owner in ("alice", "bob"):
+        message = tool._run(make_source(tmp_path / "src", owner, owner), str(target), clone_strategy="full",
+                            use_cache=False)
+        assert message.startswith("✅"), message
+    assert (target / "alice" / "utils" / "owner.txt").read_text() == "alice"
+    assert (target / "bob" / "utils" / "owner.txt").read_text() == "bob"
+
+    store = CloneStore(str(target))
+    with store.using(str(target / "bob" / "utils"), str(tmp_path / "src" / "bob" / "utils")):
+        assert store.evict(target_bytes=1) == ["alice/utils"]
+    assert not (target / "alice").exists()
+    assert (target / "bob" / "utils" / "owner.txt").exists()
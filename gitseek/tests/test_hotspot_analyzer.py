@@ -0,0 +1,71 @@
+import json
+import subprocess
+
+from gitseek.tools.BlobCache import blob_cache_path
+from gitseek.tools.GitHistoryAnalyzer import GitHistoryAnalyzer
+from gitseek.tools.HotspotAnalyzer import HotspotAnalyzer
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), "-c", "user.name=Ann", "-c", "user.email=ann@example.com",
+                           *args], check=True, capture_output=True, text=True).stdout
+
+
+def commit_file(repo, name, content, message):
+    (repo / name).write_text(content)
+    git(repo, "add", name)
+    git(repo, "commit", "-qm", message)
+    return git(repo, "rev-parse", "HEAD").strip()
+
+
+def test_history_is_reused_until_head_moves(tmp_path, monkeypatch):
+    """同一提交只执行一次 git log；HEAD 前进后重新解析"""
+    git(tmp_path, "init", "-q")
+    commit_file(tmp_path, "a.py", "def f():\n    return 1\n", "first")
+
+    calls = []
+    analyze = GitHistoryAnalyzer.analyze
+
+    def counting_analyze(self, *args, **kwargs):
+        calls.append(args)
+        return analyze(self, *args, **kwargs)
+
+    monkeypatch.setattr(GitHistoryAnalyzer, "analyze", counting_analyze)
+    (tmp_path / "b.py").write_text("def g():\n    return 0\n")
+    git(tmp_path, "add", "b.py")
+    git(tmp_path, "commit", "-qm", "add b")
+    tool = HotspotAnalyzer()
+    first = tool._run(str(tmp_path))
+    assert first["success"] and first["complexity_computed"] == 2
+    again = tool._run(str(tmp_path))
+    assert again["complexity_computed"] == 0
+    assert len(calls) == 1
+
+    # 新提交只修改 a.py：只重新计算变化的文件，历史重新解析
+    commit_file(tmp_path, "a.py", "def f(x):\n    if x:\n        return 2\n    return 3\n", "second")
+    result = tool._run(str(tmp_path))
+    assert len(calls) == 2
+    assert result["complexity_computed"] == 1 and result["complexity_cached"] == 1
+    hotspots = {h["path"]: h for h in result["hotspots"]}
+    assert hotspots["a.py"]["commits"] == 2
+    assert hotspots["a.py"]["cyclomatic_complexity"] > \
+        {h["path"]: h for h in first["hotspots"]}["a.py"]["cyclomatic_complexity"]
+
+
+def test_cache_keeps_blobs_of_other_refs(tmp_path):
+    """分析一个 ref 后保存缓存时，不会丢弃其他 ref（例如多版本对比）计算过的 blob"""
+    git(tmp_path, "init", "-q")
+    first = commit_file(tmp_path, "a.py", "def f():\n    return 1\n", "first")
+    commit_file(tmp_path, "a.py", "def f():\n    return 2\n", "second")
+
+    tool = HotspotAnalyzer()
+    old, _ = tool.compute_complexity(str(tmp_path), first)
+    new, computed = tool.compute_complexity(str(tmp_path), "HEAD")
+    assert computed == 1
+
+    with open(blob_cache_path(str(tmp_path), tool.CACHE_FILE), encoding="utf-8") as f:
+        cache = json.load(f)
+    assert {old["a.py"]["blob_sha"], new["a.py"]["blob_sha"]} <= set(cache)
+    _, computed = tool.compute_complexity(str(tmp_path), first)
+    assert computed == 0
+
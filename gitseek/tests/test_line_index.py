@@ -0,0 +1,24 @@
+from gitseek.tools.LineIndex import LineIndex, PreadBuffer
+
+
+def test_offset_reads_each_block_once(tmp_path, monkeypatch):
+    """定位行偏移时整块只 pread 一次，而不是每个换行一次"""
+    lines = [f"line {i}\n".encode() for i in range(5000)]
+    path = tmp_path / "big.txt"
+    path.write_bytes(b"".join(lines))
+    buffer = PreadBuffer(str(path))
+    index = LineIndex(buffer)
+    index.line_count()
+
+    reads = []
+    read = PreadBuffer._read
+
+    def counting_read(self, offset, length):
+        reads.append((offset, length))
+        return read(self, offset, length)
+
+    monkeypatch.setattr(PreadBuffer, "_read", counting_read)
+    for line in (1, 777, 4999, 5000):
+        assert index.offset(line) == sum(len(chunk) for chunk in lines[:line])
+    assert len(reads) == 4
+    assert index.offset(6000) == len(buffer)
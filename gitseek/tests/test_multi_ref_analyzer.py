@@ -0,0 +1,16 @@
+from gitseek.tools.MultiRefAnalyzer import MultiRefAnalyzer
+
+
+def test_file_changes_are_capped_with_counts(monkeypatch):
+    """文件变更列表超过上限时截断，总数和截断标记总是给出"""
+    monkeypatch.setattr(MultiRefAnalyzer, "MAX_LISTED", 3)
+    before = [{"path": f"old{i}.py", "sha": "a"} for i in range(5)] + [{"path": "same.py", "sha": "s"},
+                                                                     {"path": "edit.py", "sha": "1"}]
+    after = [{"path": f"new{i}.py", "sha": "b"} for i in range(4)] + [{"path": "same.py", "sha": "s"},
+                                                                    {"path": "edit.py", "sha": "2"}]
+    changes = MultiRefAnalyzer._file_changes(before, after)
+    assert changes["files_added"] == ["new0.py", "new1.py", "new2.py"]
+    assert changes["files_added_count"] == 4 and changes["files_added_truncated"]
+    assert changes["files_removed_count"] == 5 and changes["files_removed_truncated"]
+    assert changes["files_modified"] == ["edit.py"]
+    assert changes["files_modified_count"] == 1 and not changes["files_modified_truncated"]
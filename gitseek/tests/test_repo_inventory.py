@@ -0,0 +1,49 @@
+import time
+
+from gitseek.tools.IgnoreRules import IgnoreRules
+from gitseek.tools.RepoInventory import RepoInventory
+
+
+class SlowTasks(list):
+    """逐个发布子目录任务并在每次发布后让出执行权，放大发布与计数之间的窗口"""
+
+    def __iter__(self):
+        for task in list.__iter__(self):
+            yield task
+            time.sleep(0.01)
+
+
+def build_tree(root, packages=4, files=3):
+    for p in range(packages):
+        directory = root / f"pkg{p}"
+        directory.mkdir()
+        for k in range(files):
+            (directory / f"f{k}.py").write_text("x\n")
+
+
+def test_parallel_scan_counts_directories_before_publishing(tmp_path, monkeypatch):
+    """其他线程处理完刚发布的目录时，计数不能提前归零而漏掉尚未处理的目录"""
+    build_tree(tmp_path)
+    expected = sorted(RepoInventory.scan(str(tmp_path), IgnoreRules(str(tmp_path)), 1).entries)
+
+    list_directory = RepoInventory._list_directory
+
+    def slow_list_directory(self, *args):
+        subdirs, ignored = list_directory(self, *args)
+        return SlowTasks(subdirs), ignored
+
+    monkeypatch.setattr(RepoInventory, "_list_directory", slow_list_directory)
+    for _ in range(5):
+        inventory = RepoInventory.scan(str(tmp_path), IgnoreRules(str(tmp_path)), 4)
+        assert sorted(inventory.entries) == expected
+
+
+def test_malformed_gitignore_pattern_is_skipped(tmp_path):
+    """无法转换为正则的模式被跳过，同一 .gitignore 中的其他规则仍然生效"""
+    (tmp_path / ".gitignore").write_text("[z-a]\n*.log\nbuild/\n")
+    rules = IgnoreRules(str(tmp_path))
+    assert IgnoreRules.parse_pattern("[z-a]") is None
+    assert rules.is_ignored("debug.log")
+    assert rules.is_ignored("build", is_dir=True)
+    assert not rules.is_ignored("z")
+    assert not rules.is_ignored("src/app.py")
@@ -0,0 +1,30 @@
+import json
+import subprocess
+
+from gitseek.tools.RepoWatcher import RepoWatcher
+
+
+def test_merge_into_reflects_working_tree_changes(tmp_path):
+    """报告为受影响的 structure 部分使用工作区的实时目录概要和子项目，而不是 HEAD 或旧的架构数据"""
+    repo = tmp_path / "repo"
+    (repo / "api").mkdir(parents=True)
+    (repo / "api" / "server.py").write_text("def serve():\n    return 1\n")
+    (repo / "api" / "pyproject.toml").write_text('[project]\nname = "api"\ndependencies = ["flask"]\n')
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+
+    watcher = RepoWatcher(str(repo), backend="polling")
+    watcher.prime()
+    (repo / "web").mkdir()
+    (repo / "web" / "index.js").write_text("function main() { return 1; }\n")
+    (repo / "web" / "package.json").write_text(json.dumps({"name": "web", "dependencies": {"api": "1.0"}}))
+    summary = watcher.apply({"web", "web/index.js", "web/package.json"})
+    assert "structure" in summary["sections"]
+
+    architecture = watcher.merge_into({"architecture": {"structure": {"root": {"items": []}}}})["architecture"]
+    assert [item["name"] for item in architecture["structure"]["root"]["items"]] == ["api", "web"]
+    packages = architecture["packages"]
+    assert packages["is_monorepo"]
+    by_name = {package["name"]: package for package in packages["packages"]}
+    assert by_name["web"]["internal_dependencies"] == ["api"]
+    assert by_name["api"]["dependencies"] == ["flask"]
+    assert by_name["web"]["primary_language"] == "JavaScript"
@@ -0,0 +1,51 @@
+import subprocess
+
+from gitseek.tools.ReportGenerator import ReportGenerator, SectionCache
+from gitseek.tools.RepoWatcher import RepoWatcher
+
+
+def make_repo(root):
+    (root / "src").mkdir()
+    (root / "src" / "app.py").write_text("def main():\n    if True:\n        return 1\n")
+    (root / "requirements.txt").write_text("requests>=2\n")
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+
+
+def test_watch_mode_writes_report(tmp_path, monkeypatch):
+    """监听模式的首次计算结果可以直接生成报告"""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    make_repo(repo)
+    monkeypatch.chdir(tmp_path)
+
+    watcher = RepoWatcher(str(repo), backend="polling")
+    summary = watcher.prime()
+    assert "dependencies" in summary["sections"]
+
+    generator = ReportGenerator()
+    output_path = tmp_path / "output" / "report.md"
+    result = generator._run(project_data=watcher.merge_into(generator._load_data_from_files()),
+                            output_path=str(output_path), generate_qa=False)
+    assert result["success"], result.get("error")
+    report = output_path.read_text(encoding="utf-8")
+    assert "### 2.7 架构评估" in report
+    assert "Python" in report
+
+
+def test_watcher_ignores_its_own_report(tmp_path, monkeypatch):
+    """报告写在被监听的工作副本内时，写入报告和渲染缓存不会再次触发重新生成"""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    make_repo(repo)
+    monkeypatch.chdir(repo)
+    output_path = "output/project_analysis_report.md"
+
+    watcher = RepoWatcher(str(repo), backend="polling", interval=0, debounce=0,
+                          output_paths=["output", output_path, SectionCache.path_for(output_path)])
+    watcher.prime()
+    generator = ReportGenerator()
+    result = generator._run(project_data=watcher.merge_into(generator._load_data_from_files()),
+                            output_path=output_path, generate_qa=False)
+    assert result["success"], result.get("error")
+    summary = watcher.poll_once()
+    assert summary is None, summary["changed"]
@@ -0,0 +1,16 @@
+from gitseek.tools.SmartQuestionGuide import SmartQuestionGuide
+
+
+def test_readme_check_uses_the_real_clone_path(tmp_path, monkeypatch):
+    """README 只在实际的克隆目录中查找；没有克隆路径时不去扫描 cloned_repos 上级目录"""
+    store = tmp_path / "cloned_repos"
+    (store / "bare").mkdir(parents=True)
+    (store / "documented").mkdir()
+    (store / "documented" / "README.md").write_text("# demo\n")
+    (store / "README.md").write_text("store\n")
+    monkeypatch.chdir(tmp_path)
+
+    guide = SmartQuestionGuide()
+    assert not guide._has_detailed_documentation({"metadata": {"description": "short"}})
+    assert not guide._has_detailed_documentation({"metadata": {}, "clone_path": str(store / "bare")})
+    assert guide._has_detailed_documentation({"metadata": {}, "clone_path": str(store / "documented")})